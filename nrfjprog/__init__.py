@@ -26,4 +26,21 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-"""Package marker file."""
+"""nrfjprog: the command-line tool, and Session for using it as a library."""
+
+import sys
+
+
+def __getattr__(name):
+    """
+    Import Session when it is first used, so the CLI does not load every model module at startup.
+
+    """
+    if name == 'Session':
+        from nrfjprog.session import Session
+        return Session
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+if sys.version_info < (3, 7): # Module __getattr__ is only called from Python 3.7.
+    from nrfjprog.session import Session
@@ -33,6 +33,9 @@ It receives the command and options from the user and passes it to model/perform
 """
 
 import argparse
+import sys
+
+from .model import clockspeed
 
 
 class Nrfjprog(object):
@@ -45,6 +48,8 @@ class Nrfjprog(object):
     nrfjprog_epilog = "Just like any standard command line tool, one positional command can be specified, followed by it's specific arguments. To see arguments for a specific command type: python nrfjprog COMMAND -h (i.e. python nrfjprog erase -h)."
 
     help_messages = {
+        'batch' : 'Runs a script of commands over one connection to the device.',
+        'daemon' : 'Runs a session server that keeps debuggers connected between commands. Commands are sent to it while it is running.',
         'erase' : "Erases the device's FLASH.",
         'halt' : "Halts the device's CPU.",
         'ids' : 'Displays the serial numbers of all debuggers connected to the PC.',
@@ -57,6 +62,7 @@ class Nrfjprog(object):
         'readtofile' : "Reads and stores the device's memory.",
         'recover' : 'Erases all user FLASH and RAM and disables any readback protection mechanisms that are enabled.',
         'reset' : 'Resets the device.',
+        'rtt' : "Streams the output of the device's firmware from its SEGGER RTT up-buffers.",
         'run' : "Runs the device's CPU.",
         'verify' : "Verifies that the device's memory contains the correct data.",
         'version' : 'Display the nrfjprog and JLinkARM DLL versions.'
@@ -70,8 +76,7 @@ class Nrfjprog(object):
         self.parser = argparse.ArgumentParser(description=self.nrfjprog_description, epilog=self.nrfjprog_epilog)
         self.subparsers = self.parser.add_subparsers(dest='command')
         self.args = None
-
-        self._add_commands()
+        self._added_commands = set()
 
     def add_common_properties_to_command(self, parser, connects=True): # TODO fix doc and param names for callback as string.
         """
@@ -83,6 +88,8 @@ class Nrfjprog(object):
         self._add_daplink_argument(parser)
         self._add_openocd_argument(parser)
         self._add_quiet_argument(parser)
+        self._add_timings_argument(parser)
+        self._add_timingsfile_argument(parser)
 
         if connects:
             self._add_clockspeed_argument(parser)
@@ -94,7 +101,14 @@ class Nrfjprog(object):
         Parse user input and execute the requested functionality.
 
         """
-        self.args = self.parser.parse_args()
+        argv = sys.argv[1:]
+        self.args = self.parse_args(argv)
+
+        if self._run_on_session_server(argv):
+            return
+
+        from .model import timings
+        timings.enable_from_args(self.args)
 
         if self.args.daplink:
             from .model.perform_command_daplink import DapLink
@@ -113,32 +127,104 @@ class Nrfjprog(object):
         func = getattr(perform_command, self.args.command, function_not_found)
 
         log(self.args, self.help_messages[self.args.command])
-        func(self.args)
+        try:
+            func(self.args)
+        finally:
+            timings.report(self.args.command)
+
+    def parse_args(self, argv=None):
+        """
+        Parse argv (sys.argv by default). Several --snr arguments (or --allprobes) select gang programming: the serial numbers are moved to args.gang_snrs and args.snr is left empty.
+
+        :param List argv: The command-line arguments to parse.
+        :return Object: The parsed arguments.
+        """
+        if argv is None:
+            argv = sys.argv[1:]
+        self._add_commands(argv[0] if argv and argv[0] in self.help_messages else None)
+
+        args = self.parser.parse_args(argv)
+
+        if hasattr(args, 'snr'):
+            snrs = args.snr or []
+            args.snr = snrs[0] if len(snrs) == 1 else None
+            args.gang_snrs = snrs if len(snrs) > 1 or getattr(args, 'allprobes', False) else None
+
+            if args.gang_snrs is not None and args.command != 'program':
+                self.parser.error('Only the program command accepts more than one --snr.')
+            if args.gang_snrs is not None and (args.daplink or args.openocd):
+                self.parser.error('Programming several debuggers at once is only supported with JLink debuggers.')
+
+        if args.command in ('batch', 'rtt') and (args.daplink or args.openocd):
+            self.parser.error('The {} command is only supported with JLink debuggers.'.format(args.command))
+
+        return args
+
+    def _run_on_session_server(self, argv):
+        """
+        Forward a JLink command to the session server if one is running.
 
-    def _add_commands(self):
+        :param List argv: The command-line arguments.
+        :return Boolean: If the session server ran the command.
+        """
+        if self.args.command in ('batch', 'daemon', 'rtt') or self.args.daplink or self.args.openocd or getattr(self.args, 'gang_snrs', None) is not None:
+            return False
+
+        from .model import session_server
+        if not session_server.server_running():
+            return False
+
+        output, error = session_server.send_command(argv)
+        sys.stdout.write(output)
+        assert (error is None), error
+        return True
+
+    def _add_commands(self, command=None):
         """
         Split up the functionality of nrfjprog into multiple sub-commands.
 
-        :param Object subparsers: https://docs.python.org/3/library/argparse.html#sub-commands.
+        :param String command: Only add the sub-command the arguments select, to save building the others. All are added if None (i.e. for --help). Sub-commands already added are skipped.
         """
-        self._add_erase_command()
-        self._add_halt_command()
-        self._add_ids_command()
-        self._add_memrd_command()
-        self._add_memwr_command()
-        self._add_pinresetenable_command()
-        self._add_program_command()
-        self._add_readback_command()
-        self._add_readregs_command()
-        self._add_readtofile_command()
-        self._add_recover_command()
-        self._add_reset_command()
-        self._add_run_command()
-        self._add_verify_command()
-        self._add_version_command()
+        add_command_functions = [('batch', self._add_batch_command),
+                                 ('daemon', self._add_daemon_command),
+                                 ('erase', self._add_erase_command),
+                                 ('halt', self._add_halt_command),
+                                 ('ids', self._add_ids_command),
+                                 ('memrd', self._add_memrd_command),
+                                 ('memwr', self._add_memwr_command),
+                                 ('pinresetenable', self._add_pinresetenable_command),
+                                 ('program', self._add_program_command),
+                                 ('rbp', self._add_readback_command),
+                                 ('readregs', self._add_readregs_command),
+                                 ('readtofile', self._add_readtofile_command),
+                                 ('recover', self._add_recover_command),
+                                 ('reset', self._add_reset_command),
+                                 ('rtt', self._add_rtt_command),
+                                 ('run', self._add_run_command),
+                                 ('verify', self._add_verify_command),
+                                 ('version', self._add_version_command)]
+
+        for name, add_command in add_command_functions:
+            if (command is None or name == command) and name not in self._added_commands:
+                add_command()
+                self._added_commands.add(name)
 
     # The top-level positional commands of our command-line interface.
 
+    def _add_batch_command(self):
+        batch_parser = self.subparsers.add_parser('batch', help=self.help_messages['batch'])
+        self.add_common_properties_to_command(batch_parser)
+
+        self._add_script_argument(batch_parser)
+
+    def _add_daemon_command(self):
+        daemon_parser = self.subparsers.add_parser('daemon', help=self.help_messages['daemon'])
+        self.add_common_properties_to_command(daemon_parser, connects=False)
+
+        self._add_idletimeout_argument(daemon_parser)
+        self._add_socket_argument(daemon_parser)
+        self._add_stop_argument(daemon_parser)
+
     def _add_erase_command(self):
         erase_parser = self.subparsers.add_parser('erase', help=self.help_messages['erase'])
         self.add_common_properties_to_command(erase_parser)
@@ -176,8 +262,16 @@ class Nrfjprog(object):
         self.add_common_properties_to_command(program_parser)
 
         self._add_file_argument(program_parser)
+        self._add_noimagecache_argument(program_parser)
+        self._add_allprobes_argument(program_parser)
         self._add_erase_before_flash_group(program_parser)
+        self._add_keep_argument(program_parser)
+        self._add_skipsoftdevice_argument(program_parser)
+        self._add_dryrun_argument(program_parser)
+        self._add_flashloader_argument(program_parser)
         self._add_verify_argument(program_parser)
+        self._add_crcverify_argument(program_parser)
+        self._add_verifyreport_argument(program_parser)
         self._add_reset_group(program_parser)
 
     def _add_readback_command(self):
@@ -195,6 +289,8 @@ class Nrfjprog(object):
         self.add_common_properties_to_command(readtofile_parser)
 
         self._add_file_argument(readtofile_parser)
+        self._add_chunksize_argument(readtofile_parser)
+        self._add_format_argument(readtofile_parser)
         self._add_readcode_argument(readtofile_parser)
         self._add_readram_argument(readtofile_parser)
         self._add_readuicr_argument(readtofile_parser)
@@ -211,6 +307,14 @@ class Nrfjprog(object):
 
         self._add_reset_group(reset_parser)
 
+    def _add_rtt_command(self):
+        rtt_parser = self.subparsers.add_parser('rtt', help=self.help_messages['rtt'])
+        self.add_common_properties_to_command(rtt_parser)
+
+        self._add_channel_argument(rtt_parser)
+        self._add_duration_argument(rtt_parser)
+        self._add_outfile_argument(rtt_parser)
+
     def _add_run_command(self):
         run_parser = self.subparsers.add_parser('run', help=self.help_messages['run'])
         self.add_common_properties_to_command(run_parser)
@@ -223,6 +327,10 @@ class Nrfjprog(object):
         self.add_common_properties_to_command(verify_parser)
 
         self._add_file_argument(verify_parser)
+        self._add_noimagecache_argument(verify_parser)
+        self._add_crcverify_argument(verify_parser)
+        self._add_verifyreport_argument(verify_parser)
+        self._add_skipsoftdevice_argument(verify_parser)
 
     def _add_version_command(self):
         version_parser = self.subparsers.add_parser('version', help=self.help_messages['version'])
@@ -239,8 +347,11 @@ class Nrfjprog(object):
     def _add_erase_before_flash_group(self, parser):
         erase_before_flash_group = parser.add_mutually_exclusive_group()
         self._add_eraseall_argument(erase_before_flash_group)
+        self._add_erasemode_argument(erase_before_flash_group)
         self._add_sectors_erase_argument(erase_before_flash_group)
         self._add_sectorsuicr_erase_argument(erase_before_flash_group)
+        self._add_differential_argument(erase_before_flash_group)
+        self._add_incremental_argument(erase_before_flash_group)
 
     def _add_reset_group(self, parser):
         reset_group = parser.add_mutually_exclusive_group()
@@ -253,8 +364,20 @@ class Nrfjprog(object):
     def _add_addr_argument(self, parser):
         parser.add_argument('-a', '--addr', type=self.auto_int, help='The address in memory to be read/written.', required=True)
 
+    def _add_allprobes_argument(self, parser):
+        parser.add_argument('--allprobes', action='store_true', help='Program and verify FILE on every debugger connected to the PC at once.')
+
+    def _add_channel_argument(self, parser):
+        parser.add_argument('--channel', type=int, action='append', metavar='CHANNEL', help='An RTT up-buffer to stream. Can be given more than once, the lines of each channel are then prefixed with [CHANNEL]. 0 by default.')
+
+    def _add_chunksize_argument(self, parser):
+        parser.add_argument('--chunksize', type=self.word_multiple, help='The number of bytes read from the device at a time, a multiple of 4. 0x4000 by default.', default=0x4000)
+
     def _add_clockspeed_argument(self, parser):
-        parser.add_argument('-c', '--clockspeed', type=int, metavar='CLOCKSPEEDKHZ', help='Sets the debugger SWD clock speed in kHz for the operation.')
+        parser.add_argument('-c', '--clockspeed', type=clockspeed.parse, metavar='CLOCKSPEEDKHZ', help='Sets the debugger SWD clock speed in kHz for the operation. auto finds the fastest reliable speed, remembers it per debugger and falls back to slower speeds on transfer errors.')
+
+    def _add_crcverify_argument(self, parser):
+        parser.add_argument('--crcverify', action='store_true', help='Verify with CRC32s computed by the device for each page, only pages whose CRC differs are read back. Resets the device and overwrites its RAM. Debuggers that can not run code on the device read everything back.')
 
     def _add_daplink_argument(self, parser):
         parser.add_argument('--daplink', action='store_true', help='PC is connected to a CMSIS-DAP/DAP-Link debugger.')
@@ -267,9 +390,21 @@ class Nrfjprog(object):
     def _add_deviceversion_argument(self, parser):
         parser.add_argument('--deviceversion', type=str, help='The version of the target device.', required=False, choices=self.NRF5_DEVICE_VERSIONS)
 
+    def _add_differential_argument(self, parser):
+        parser.add_argument('--differential', action='store_true', help='Only erase and write the pages whose contents on the device differ from FILE.')
+
+    def _add_dryrun_argument(self, parser):
+        parser.add_argument('--dryrun', action='store_true', help='Print the pages that would be erased and the blocks that would be written, with an estimate of the time it would take, without changing the device.')
+
+    def _add_duration_argument(self, parser):
+        parser.add_argument('--duration', type=float, metavar='SECONDS', help='Stop after SECONDS. Runs until interrupted (Ctrl-C) by default.')
+
     def _add_eraseall_argument(self, parser):
         parser.add_argument('-e', '--eraseall', action='store_true', help='Erase all user FLASH including UICR.')
 
+    def _add_erasemode_argument(self, parser):
+        parser.add_argument('--erase', choices=['all', 'sectors', 'sectorsanduicr', 'auto'], metavar='MODE', help='Erase before programming: all, sectors, sectorsanduicr (like --eraseall, --sectorserase and --sectorsanduicrerase) or auto, which estimates the time of a mass erase and of erasing only the sectors FILE contains data in from the device\'s page size and erase timings measured on it, and does the quicker one.')
+
     def _add_erasepage_argument(self, parser):
         parser.add_argument('--erasepage', type=self.auto_int, metavar='PAGESTARTADDR', help='Erase the page starting at the address PAGESTARTADDR.')
 
@@ -282,12 +417,33 @@ class Nrfjprog(object):
     def _add_file_argument(self, parser):
         parser.add_argument('-f', '--file', help='The hex file to be used in this operation.', required=True)
 
+    def _add_flashloader_argument(self, parser):
+        parser.add_argument('--flashloader', action='store_true', help='Write FLASH through a loader running from the device\'s RAM, so data is transferred while the previous block is written. Overwrites the start of RAM. JLink only.')
+
+    def _add_format_argument(self, parser):
+        parser.add_argument('--format', help='The format of FILE: text (ADDRESS: WORD lines), bin (raw binary, one region only) or hex (Intel HEX). text by default.', choices=['text', 'bin', 'hex'], default='text')
+
+    def _add_idletimeout_argument(self, parser):
+        parser.add_argument('--idletimeout', type=int, metavar='SECONDS', help='Disconnect from a debugger when no command has used it for SECONDS. 300 by default.', default=300)
+
+    def _add_incremental_argument(self, parser):
+        parser.add_argument('--incremental', action='store_true', help='Like --differential, but compare FILE with the pages the last program with --snr wrote to this device instead of reading them back. Reads the device back once if it was replaced or programmed by other means. JLink only.')
+
+    def _add_keep_argument(self, parser):
+        parser.add_argument('--keep', type=self.address_range, action='append', default=[], metavar='START-END', help='Preserve the contents from address START up to END (i.e. a UICR range or bootloader settings page): if an erase covers it, it is read before erasing and written back. Can be given more than once. JLink only.')
+
     def _add_length_argument(self, parser):
         parser.add_argument('-l', '--length', type=self.auto_int, help='The number of bytes to be read. 4 (one word) by default.', default=4)
 
+    def _add_noimagecache_argument(self, parser):
+        parser.add_argument('--noimagecache', action='store_true', help='Always parse FILE instead of loading it from the cache of parsed hex files in ~/.nrfjprog/images.')
+
     def _add_openocd_argument(self, parser):
         parser.add_argument('--openocd', action='store_true', help='PC should use openOCD as debugger host.')
 
+    def _add_outfile_argument(self, parser):
+        parser.add_argument('--outfile', metavar='FILE', help='Write the output to FILE instead of stdout.')
+
     def _add_pc_argument(self, parser):
         parser.add_argument('--pc', type=self.auto_int, metavar='PC_ADDR', help='Initial program counter to start the CPU running from.')
 
@@ -315,21 +471,42 @@ class Nrfjprog(object):
     def _add_sectorsuicr_erase_argument(self, parser):
         parser.add_argument('-u', '--sectorsanduicrerase', action='store_true', help='Erase all sectors that FILE contains data in and the UICR (unconditionally) before programming.')
 
+    def _add_script_argument(self, parser):
+        parser.add_argument('--script', default='-', help='File of commands to run, without the program name (i.e. program -f app.hex --sectorserase). One command per line or separated by ;, text after # is ignored. Read from stdin by default.')
+
+    def _add_skipsoftdevice_argument(self, parser):
+        parser.add_argument('--skipsoftdevice', action='store_true', help='Leave out the MBR and SoftDevice in FILE if the device has a SoftDevice with the same info structure (magic number, size and FWID at 0x3000). Ignored with --eraseall. JLink only.')
+
     def _add_snr_argument(self, parser):
-        parser.add_argument('-s', '--snr', type=int, help='Selects the debugger with the given serial number among all those connected to the PC for the operation.')
+        parser.add_argument('-s', '--snr', type=int, action='append', help='Selects the debugger with the given serial number among all those connected to the PC for the operation. The program command accepts several to program the debuggers at once.')
+
+    def _add_socket_argument(self, parser):
+        parser.add_argument('--socket', help='The Unix socket the session server listens on. Clients use $NRFJPROG_SESSION_SOCKET, or a per-user file in the temporary directory by default.')
 
     def _add_sp_argument(self, parser):
         parser.add_argument('--sp', type=self.auto_int, metavar='SP_ADDR', help='Initial stack pointer.')
 
+    def _add_stop_argument(self, parser):
+        parser.add_argument('--stop', action='store_true', help='Stop the running session server.')
+
     def _add_sysreset_argument(self, parser):
         parser.add_argument('-r', '--systemreset', action='store_true', help='Executes a system reset.')
 
+    def _add_timings_argument(self, parser):
+        parser.add_argument('--timings', action='store_true', help='Print the time spent, bytes moved and calls made in each phase of the operation (i.e. connect, erase, write, read). Also enabled by $NRFJPROG_TIMINGS.')
+
+    def _add_timingsfile_argument(self, parser):
+        parser.add_argument('--timingsfile', metavar='FILE', help='Append the timings of the operation to FILE as one line of JSON. Also enabled by $NRFJPROG_TIMINGS_FILE.')
+
     def _add_val_argument(self, parser):
         parser.add_argument('--val', type=self.auto_int, help='The 32 bit word to be written to memory.', required=True)
 
     def _add_verify_argument(self, parser):
         parser.add_argument('-v', '--verify', action='store_true', help='Read back memory and verify that it matches FILE.')
 
+    def _add_verifyreport_argument(self, parser):
+        parser.add_argument('--verifyreport', metavar='REPORTFILE', help='Write the mismatching address ranges and the status of each page as JSON to REPORTFILE.')
+
     # Helpers.
 
     @staticmethod
@@ -340,6 +517,34 @@ class Nrfjprog(object):
         """
         return int(number, 0)
 
+    @staticmethod
+    def word_multiple(number):
+        """
+        Parse a positive multiple of the 4 byte word size, in the same bases as auto_int.
+
+        """
+        try:
+            value = int(number, 0)
+        except ValueError:
+            raise argparse.ArgumentTypeError('{} is not a number.'.format(number))
+        if value <= 0 or value % 4:
+            raise argparse.ArgumentTypeError('{} is not a positive multiple of 4.'.format(number))
+        return value
+
+    @staticmethod
+    def address_range(text):
+        """
+        Parse START-END, where both addresses accept the same bases as auto_int, into a (start, end) tuple.
+
+        """
+        try:
+            start, end = (int(addr, 0) for addr in text.split('-'))
+        except ValueError:
+            raise argparse.ArgumentTypeError('{} is not an address range START-END.'.format(text))
+        if end <= start:
+            raise argparse.ArgumentTypeError('The range {} ends before it starts.'.format(text))
+        return start, end
+
 
 def main():
     """
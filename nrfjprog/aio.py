@@ -0,0 +1,151 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+An asyncio interface to nrfjprog, for programs that drive many JLink debuggers from one event loop (Python 3.5 and later).
+
+Each Probe runs its Session's methods one at a time on a thread of its own, so the blocking debugger library never blocks the event
+loop and every call into it for a debugger comes from the same thread. The Session stays connected between calls.
+
+    async with aio.Probe(snr=682123456) as probe:
+        await probe.program('app.hex', erase='sectors', verify=True)
+        await probe.reset()
+        data = await probe.memrd(0x10000060, 8)
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+
+from nrfjprog.session import Session
+
+
+DEFAULT_MAX_PENDING = 8
+
+
+class Probe(object):
+    """
+    One JLink debugger, driven from an asyncio event loop.
+
+    At most max_pending calls may wait for a probe at a time, later callers wait until there is room. Cancelling a call that has not
+    started yet removes it from the queue. A call that already runs on the debugger is finished, its result is dropped.
+    """
+    def __init__(self, snr=None, clockspeed=None, deviceversion=None, max_pending=DEFAULT_MAX_PENDING):
+        """
+        :param int    snr:           Serial number of the debugger. The only connected debugger is used if None.
+        :param        clockspeed:    SWD clock speed in kHz or 'auto', see --clockspeed.
+        :param String deviceversion: The version of the target device (i.e. 'NRF52_FP1'), to skip detecting it.
+        :param int    max_pending:   Calls that may be queued for the debugger before callers are made to wait.
+        """
+        self.snr = snr
+        self.clockspeed = clockspeed
+        self.deviceversion = deviceversion
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._pending = asyncio.Semaphore(max_pending)
+        self._session = None # Only used on the executor's thread.
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def program(self, file, **options):
+        """
+        :return ProgramResult: See Session.program().
+        """
+        return await self.call('program', file, **options)
+
+    async def verify(self, file, **options):
+        """
+        :return VerifyReport: See Session.verify().
+        """
+        return await self.call('verify', file, **options)
+
+    async def erase(self, **options):
+        await self.call('erase', **options)
+
+    async def reset(self, kind='system'):
+        await self.call('reset', kind)
+
+    async def memrd(self, addr, length=4):
+        """
+        :return bytes: length bytes read from addr.
+        """
+        return await self.call('memrd', addr, length)
+
+    async def memwr(self, addr, value):
+        await self.call('memwr', addr, value)
+
+    async def call(self, method, *args, **kwargs):
+        """
+        Call any method of the debugger's Session.
+
+        :param String method: The name of the Session method, i.e. 'program'.
+        :return: What the method returns.
+        """
+        try:
+            inspect.signature(getattr(Session, method)).bind(None, *args, **kwargs)
+        except (AttributeError, TypeError) as error:
+            raise ValueError('Invalid call of Session.{}: {}'.format(method, error))
+
+        async with self._pending:
+            return await asyncio.get_event_loop().run_in_executor(self._executor, self._execute, method, args, kwargs)
+
+    async def close(self):
+        """
+        Disconnect from the debugger once the queued calls are done.
+
+        """
+        await asyncio.get_event_loop().run_in_executor(self._executor, self._disconnect)
+        self._executor.shutdown(wait=False)
+
+    # Helpers.
+
+    def _execute(self, method, args, kwargs):
+        """
+        Call the Session method on the executor's thread, connecting first if needed.
+
+        """
+        if self._session is None:
+            self._session = Session(snr=self.snr, clockspeed=self.clockspeed, deviceversion=self.deviceversion)
+
+        try:
+            return getattr(self._session, method)(*args, **kwargs)
+        except Exception:
+            self._disconnect() # The connection may be left in an unknown state.
+            raise
+
+    def _disconnect(self):
+        session, self._session = self._session, None
+        if session is not None:
+            try:
+                session.close()
+            except Exception:
+                pass # The debugger may already be gone.
@@ -0,0 +1,94 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Reads the steps of a batch script: nrfjprog commands without the program name, one per line or separated by ;. Text after # is a comment.
+
+"""
+
+import shlex
+import sys
+
+
+UNSUPPORTED_COMMANDS = ['batch', 'daemon']
+
+
+def parse_steps(text):
+    """
+    :param String text: The script.
+    :return List: The command-line arguments of each step.
+    """
+    steps = []
+    for line in text.splitlines():
+        for command in _split_commands(line):
+            argv = shlex.split(command, comments=True)
+            if argv:
+                steps.append(argv)
+    return steps
+
+
+def _split_commands(line):
+    """
+    Split line on the ; that are not quoted, escaped or in a comment.
+
+    :param String line: A line of the script.
+    :return List: The text of each command.
+    """
+    commands = []
+    start = 0
+    quote = None
+    escaped = False
+    for index, char in enumerate(line):
+        if escaped:
+            escaped = False
+        elif char == '\\' and quote != "'":
+            escaped = True
+        elif quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '#':
+            break
+        elif char == ';':
+            commands.append(line[start:index])
+            start = index + 1
+    commands.append(line[start:])
+    return commands
+
+
+def read_steps(path):
+    """
+    :param String path: The script file, or - for stdin.
+    :return List: The command-line arguments of each step.
+    """
+    if path == '-':
+        return parse_steps(sys.stdin.read())
+
+    with open(path, 'r') as file:
+        return parse_steps(file.read())
@@ -0,0 +1,87 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Moves bytes-like buffers between nrfjprog and the debugger API without building a list of Python ints for the whole buffer.
+
+pynrfjprog takes any sequence of byte values but unpacks it into one int object per byte before calling the DLL, and returns what it
+reads as a list of ints. Transfers are therefore split into CHUNK_SIZE pieces, so only one chunk's worth of those objects exists at a
+time, and every chunk read is packed into a bytearray straight away.
+"""
+
+CHUNK_SIZE = 0x4000
+
+
+def write(api, addr, data, control, chunk_size=CHUNK_SIZE):
+    """
+    Write data to addr in chunks.
+
+    :param API     api:     The pynrfjprog API instance.
+    :param int     addr:    Where to write.
+    :param         data:    bytes, bytearray or memoryview to write.
+    :param Boolean control: True to let the API control the NVMC (when writing FLASH).
+    """
+    for chunk_addr, chunk in chunks(addr, data, chunk_size):
+        api.write(chunk_addr, _byte_values(chunk), control)
+
+
+def read(api, addr, length, chunk_size=CHUNK_SIZE):
+    """
+    Read length bytes from addr in chunks.
+
+    :return bytearray: The data read.
+    """
+    data = bytearray(length)
+    for offset in range(0, length, chunk_size):
+        size = min(chunk_size, length - offset)
+        data[offset : offset + size] = bytearray(api.read(addr + offset, size))
+    return data
+
+
+def chunks(addr, data, chunk_size=CHUNK_SIZE):
+    """
+    Split data at addr into chunks, without copying it.
+
+    :return Generator: (address, memoryview) of each chunk.
+    """
+    view = memoryview(data)
+    for offset in range(0, len(view), chunk_size):
+        yield addr + offset, view[offset : offset + chunk_size]
+
+
+# Helpers.
+
+def _byte_values(view):
+    """
+    A sequence that iterates as ints, without copying the data if possible.
+
+    """
+    try:
+        return view.cast('B')
+    except AttributeError: # Python 2's memoryview iterates as characters and can not be cast.
+        return bytearray(view.tobytes())
@@ -0,0 +1,143 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Negotiates the fastest SWD clock speed a debugger and its target transfer data reliably at, for --clockspeed auto.
+
+Each speed is validated by reading a region with known contents (the FICR) and comparing it with a read at a slower speed. The
+fastest speed that passed is remembered per debugger serial number, and BackoffAPI drops to the next slower speed whenever a
+transfer fails later on.
+"""
+
+import argparse
+import functools
+
+from nrfjprog.model import probe_cache
+
+
+AUTO = 'auto'
+SPEEDS_KHZ = [1000, 2000, 4000, 5000, 8000] # nRF5x devices specify SWDCLK up to 8 MHz.
+SAFE_SPEED_KHZ = SPEEDS_KHZ[0]
+VALIDATION_READS = 2 # Reads compared at each speed, so a marginal speed is less likely to pass by chance.
+
+CACHE_NAME = 'clockspeeds'
+
+RETRIED_METHODS = ['read', 'read_u32', 'write', 'write_u32', 'erase_all', 'erase_page', 'erase_uicr', 'read_device_version']
+
+
+def parse(value):
+    """
+    The argparse type of --clockspeed: a speed in kHz or 'auto'.
+
+    """
+    if value == AUTO:
+        return AUTO
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid clock speed: '{}' (expected kHz or {})".format(value, AUTO))
+
+
+def slower(speed):
+    """
+    :param int speed: The current speed in kHz.
+    :return int: The next slower speed of SPEEDS_KHZ, or None if speed is already the slowest.
+    """
+    slower_speeds = [candidate for candidate in SPEEDS_KHZ if candidate < speed]
+    return slower_speeds[-1] if slower_speeds else None
+
+
+def cached(snr):
+    """
+    :param int snr: Serial number of the debugger.
+    :return int: The fastest reliable speed found for snr before, or None.
+    """
+    entry = probe_cache.ProbeCache(CACHE_NAME).get(snr)
+    return entry['clockspeed'] if entry else None
+
+
+def store(snr, speed):
+    probe_cache.ProbeCache(CACHE_NAME).put(snr, {'clockspeed': speed})
+
+
+def negotiate(reconnect, read, errors, speed=SAFE_SPEED_KHZ):
+    """
+    Step up through SPEEDS_KHZ from speed until a speed fails to read the reference data back correctly.
+
+    :param Function reconnect: reconnect(speed) reconnecting to the debugger at speed kHz.
+    :param Function read:      read() returning the validation region. The data read at the starting speed is the reference.
+    :param Tuple    errors:    Exception types that mean a speed is unreliable.
+    :param int      speed:     The speed currently connected at.
+    :return int: The fastest speed that passed. The debugger is left connected at it.
+    """
+    reference = read()
+    best = speed
+
+    for candidate in [candidate for candidate in SPEEDS_KHZ if candidate > speed]:
+        try:
+            reconnect(candidate)
+            passed = all(read() == reference for _ in range(VALIDATION_READS))
+        except errors:
+            passed = False
+
+        if not passed:
+            reconnect(best)
+            break
+        best = candidate
+
+    return best
+
+
+class BackoffAPI(object):
+    """
+    Wraps an API instance so transfers that fail with a transfer error are retried at the next slower speed.
+
+    Only the methods in RETRIED_METHODS are retried, they can be repeated without side effects. Everything else is passed through.
+    """
+    def __init__(self, api, back_off, is_transfer_error):
+        """
+        :param API      api:               The API instance to wrap.
+        :param Function back_off:          back_off() reconnecting at the next slower speed. Returns False if there is none.
+        :param Function is_transfer_error: is_transfer_error(error) telling if an exception raised by api is worth a retry.
+        """
+        self.api = api
+        self._back_off = back_off
+        self._is_transfer_error = is_transfer_error
+
+    def __getattr__(self, name):
+        if name in RETRIED_METHODS:
+            return functools.partial(self._call, name)
+        return getattr(self.api, name)
+
+    def _call(self, name, *args, **kwargs):
+        while True:
+            try:
+                return getattr(self.api, name)(*args, **kwargs)
+            except Exception as error:
+                if not self._is_transfer_error(error) or not self._back_off():
+                    raise
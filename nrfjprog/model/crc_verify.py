@@ -0,0 +1,203 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Verifies FLASH by running a CRC32 routine on the device and only reading back the regions whose CRC does not match.
+
+Expected data is split at page boundaries and each piece becomes a job in a table in RAM: ADDRESS, SIZE and the CRC the routine
+stores. The routine sets DONE when every job is done. A few words per page move over SWD instead of every byte.
+
+RAM layout from NRF5xDevice.ram_start:
+    0x000 The routine (Thumb code that also runs on the Cortex-M0 of nRF51 devices), followed by its table of CRC32 nibble values.
+    0x100 DONE, COUNT and then ADDRESS, SIZE and CRC of each job.
+    The stack is at the end of RAM.
+"""
+
+import struct
+import time
+import zlib
+
+from nrfjprog.model import buffers
+
+
+JOBS_OFFSET = 0x100
+JOB = struct.Struct('<III')
+STACK_SIZE = 0x100 # Only used if a fault is taken, the routine runs with interrupts disabled.
+
+TIMEOUT_SECONDS = 10.0
+
+CRC_CODE = [
+    0xB672, #        cpsid i              ; The application's interrupt handlers must not run.
+    0x4F12, #        ldr  r7, [pc, #72]   ; r7 = job table
+    0xA412, #        adr  r4, table       ; r4 = CRC32 table, one word per nibble value
+    0x687E, #        ldr  r6, [r7, #4]    ; COUNT
+    0x1C3D, #        adds r5, r7, #0
+    0x3508, #        adds r5, #8          ; r5 = first job
+    0x2E00, # job:   cmp  r6, #0
+    0xD019, #        beq  done
+    0x6829, #        ldr  r1, [r5, #0]    ; ADDRESS
+    0x686A, #        ldr  r2, [r5, #4]    ; SIZE
+    0x2000, #        movs r0, #0
+    0x43C0, #        mvns r0, r0          ; crc = 0xFFFFFFFF
+    0x2A00, # byte:  cmp  r2, #0
+    0xD00E, #        beq  store
+    0x780B, #        ldrb r3, [r1, #0]
+    0x4058, #        eors r0, r3
+    0x0703, #        lsls r3, r0, #28
+    0x0E9B, #        lsrs r3, r3, #26     ; r3 = (crc & 0xF) * 4
+    0x0900, #        lsrs r0, r0, #4
+    0x58E3, #        ldr  r3, [r4, r3]
+    0x4058, #        eors r0, r3
+    0x0703, #        lsls r3, r0, #28
+    0x0E9B, #        lsrs r3, r3, #26
+    0x0900, #        lsrs r0, r0, #4
+    0x58E3, #        ldr  r3, [r4, r3]
+    0x4058, #        eors r0, r3
+    0x3101, #        adds r1, #1
+    0x3A01, #        subs r2, #1
+    0xE7EE, #        b    byte
+    0x43C0, # store: mvns r0, r0
+    0x60A8, #        str  r0, [r5, #8]    ; CRC
+    0x350C, #        adds r5, #12
+    0x3E01, #        subs r6, #1
+    0xE7E3, #        b    job
+    0x2001, # done:  movs r0, #1
+    0x6038, #        str  r0, [r7, #0]    ; DONE
+    0xE7FE, # idle:  b    idle
+    0xBF00, #        nop
+]                                         # The address of the job table and the nibble table follow.
+
+
+def _nibble_table():
+    table = []
+    for value in range(16):
+        for _ in range(4):
+            value = (value >> 1) ^ (0xEDB88320 if value & 1 else 0)
+        table.append(value)
+    return table
+
+
+NIBBLE_TABLE = _nibble_table()
+
+
+def crc32(data):
+    try:
+        return zlib.crc32(data) & 0xFFFFFFFF
+    except TypeError: # Python 2 does not take memoryviews.
+        return zlib.crc32(bytes(bytearray(data))) & 0xFFFFFFFF
+
+
+def split_pages(blocks, page_size):
+    """
+    Split blocks at page boundaries.
+
+    :param List blocks:    (address, data) of each block.
+    :param int  page_size: The device's page size.
+    :return List: (address, data) of each piece, no piece crosses a page boundary.
+    """
+    pieces = []
+    for addr, data in blocks:
+        data = memoryview(data)
+        offset = 0
+        while offset < len(data):
+            size = min(len(data) - offset, page_size - (addr + offset) % page_size)
+            pieces.append((addr + offset, data[offset : offset + size]))
+            offset += size
+    return pieces
+
+
+class CrcRunner(object):
+    """
+    Computes CRC32s of regions of the device's memory on the device.
+
+    """
+    def __init__(self, api, device):
+        """
+        :param API         api:    A connected pynrfjprog API instance.
+        :param NRF5xDevice device: The target device.
+        """
+        self.api = api
+        self.code_addr = device.ram_start
+        self.jobs_addr = device.ram_start + JOBS_OFFSET
+        self.stack_addr = device.ram_end
+        self.max_jobs = (device.ram_size - JOBS_OFFSET - 8 - STACK_SIZE) // JOB.size
+        self.timeout = TIMEOUT_SECONDS
+
+    def compute(self, regions):
+        """
+        Reset and halt the CPU and compute the CRC32 of each region. Overwrites RAM, then resets the device so the application runs again.
+
+        :param List regions: (address, size) of each region.
+        :return List: The CRC32 of each region.
+        """
+        self.api.sys_reset() # Stops the peripherals and DMA the application started.
+        self.api.halt()
+        try:
+            code = struct.pack('<{}H'.format(len(CRC_CODE)), *CRC_CODE) + struct.pack('<I', self.jobs_addr) + struct.pack('<16I', *NIBBLE_TABLE)
+            self.api.write(self.code_addr, bytearray(code), False)
+
+            crcs = []
+            for start in range(0, len(regions), self.max_jobs):
+                crcs.extend(self._compute(regions[start : start + self.max_jobs]))
+            return crcs
+        finally:
+            self.api.sys_reset() # Also when the routine did not finish, so it is not left running.
+
+    # Helpers.
+
+    def _compute(self, regions):
+        jobs = struct.pack('<II', 0, len(regions)) + b''.join(JOB.pack(addr, size, 0) for addr, size in regions)
+        self.api.write(self.jobs_addr, bytearray(jobs), False)
+        self.api.run(self.code_addr, self.stack_addr)
+
+        deadline = time.time() + self.timeout
+        while self.api.read_u32(self.jobs_addr) != 1:
+            assert (time.time() < deadline), 'The CRC routine on the device did not finish.'
+        self.api.halt()
+
+        results = bytearray(self.api.read(self.jobs_addr + 8, len(regions) * JOB.size))
+        return [JOB.unpack_from(results, index * JOB.size)[2] for index in range(len(regions))]
+
+
+def verify(api, device, blocks, report):
+    """
+    Verify blocks with CRC32s computed on the device, reading back only the pages whose CRC does not match.
+
+    :param API          api:    A connected pynrfjprog API instance.
+    :param NRF5xDevice  device: The target device.
+    :param List         blocks: (address, expected data) of each block.
+    :param VerifyReport report: The report to add the results to.
+    """
+    pieces = split_pages(blocks, device.page_size)
+    crcs = CrcRunner(api, device).compute([(addr, len(data)) for addr, data in pieces])
+
+    for (addr, data), crc in zip(pieces, crcs):
+        if crc == crc32(data):
+            report.add_verified(addr, len(data))
+        else:
+            report.add(addr, data, buffers.read(api, addr, len(data)))
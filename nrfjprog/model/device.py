@@ -61,6 +61,10 @@ PAGE_SIZE = {'NRF52_FP1'      : 0x1000,
              'NRF51_XLR2'     : 0x400,
              'NRF51_XLR1'     : 0x400}
 
+FICR_CODEPAGESIZE = 0x10000010 # Followed by CODESIZE, the number of FLASH pages.
+FICR_DEVICEID = 0x10000060 # 64 bit unique device identifier.
+FICR_INFO_PART = 0x10000100 # Part number (i.e. 0x52832) on nRF52 devices. nRF51 devices do not implement this register.
+
 
 class NRF5xDevice(object):
     """
@@ -78,6 +82,7 @@ class NRF5xDevice(object):
         Initialize the device specific specs.
 
         """
+        self.family = device_version[:5]
         self.flash_size = FLASH_SIZE[device_version]
         self.ram_size = RAM_SIZE[device_version]
         self.page_size = PAGE_SIZE[device_version]
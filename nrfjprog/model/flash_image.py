@@ -0,0 +1,100 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+An image to program: the segments of a hex file and their data.
+
+"""
+
+
+class FlashImage(object):
+    """
+    Offers the part of IntelHex's interface nrfjprog uses (segments() and tobinarray()), over data that may be a memory-mapped cache file.
+
+    """
+    def __init__(self, segments, cached=False):
+        """
+        :param List    segments: (start address, data) of each segment, ordered by address. data is a bytes-like object.
+        :param Boolean cached:   If the data was loaded from the image cache instead of parsed from a hex file.
+        """
+        self._segments = [(start_addr, memoryview(data)) for start_addr, data in segments]
+        self.cached = cached
+
+    @classmethod
+    def from_intel_hex(cls, hex_file):
+        """
+        Copy the segments out of a parsed IntelHex object.
+
+        """
+        segments = []
+        for start_addr, end_addr in hex_file.segments():
+            segments.append((start_addr, bytearray(hex_file.tobinarray(start=start_addr, size=end_addr - start_addr))))
+        return cls(segments)
+
+    def segments(self):
+        """
+        :return List: (start address, end address) of each segment.
+        """
+        return [(start_addr, start_addr + len(data)) for start_addr, data in self._segments]
+
+    def segment_data(self):
+        """
+        :return List: (start address, memoryview of the data) of each segment.
+        """
+        return list(self._segments)
+
+    def tobinarray(self, start, size):
+        """
+        The data from start to start + size. A memoryview into the image if the range lies within one segment, otherwise a copy with the gaps filled with 0xFF.
+
+        """
+        for start_addr, data in self._segments:
+            if start_addr <= start and start + size <= start_addr + len(data):
+                return data[start - start_addr : start - start_addr + size]
+
+        array = bytearray(b'\xff' * size)
+        for start_addr, data in self._segments:
+            overlap_start = max(start, start_addr)
+            overlap_end = min(start + size, start_addr + len(data))
+            if overlap_start < overlap_end:
+                array[overlap_start - start : overlap_end - start] = data[overlap_start - start_addr : overlap_end - start_addr]
+        return memoryview(array)
+
+    def excluding(self, start, end):
+        """
+        The image without the data from start to end. The data is shared, not copied.
+
+        :return FlashImage: The remaining segments.
+        """
+        segments = []
+        for start_addr, data in self._segments:
+            if start_addr < start:
+                segments.append((start_addr, data[: min(len(data), start - start_addr)]))
+            if start_addr + len(data) > end:
+                segments.append((max(start_addr, end), data[max(0, end - start_addr) :]))
+        return FlashImage(segments, self.cached)
@@ -0,0 +1,166 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Programs FLASH through a small loader running from the device's RAM instead of driving the NVMC word by word over SWD.
+
+The loader has two RAM buffers, each with a control block of four words: STATE, DESTINATION, SIZE and SOURCE. The host fills one
+buffer and sets its STATE to FULL while the loader writes the other buffer to FLASH. The loader sets STATE back to EMPTY when the
+buffer has been written, so USB transfers and FLASH writes overlap. Pages must be erased before they are written.
+
+RAM layout from NRF5xDevice.ram_start:
+    0x000 The loader (Thumb code that also runs on the Cortex-M0 of nRF51 devices).
+    0x040 The control blocks of buffer 0 and buffer 1.
+    0x100 Buffer 0, then buffer 1.
+    The stack is at the end of RAM.
+"""
+
+import struct
+import time
+
+
+NVMC_READY = 0x4001E400
+
+CONTROL_OFFSET = 0x40
+CONTROL_SIZE = 0x10 # The loader switches buffers by toggling bit 4 of the control block address.
+BUFFERS_OFFSET = 0x100
+BUFFER_SIZE = 0x1000
+STACK_SIZE = 0x100 # Only used if a fault is taken, the loader runs with interrupts disabled.
+
+EMPTY = 0
+FULL = 1
+
+TIMEOUT_SECONDS = 5.0
+
+LOADER_CODE = [
+    0xB672, #       cpsid i              ; The application's interrupt handlers must not run.
+    0x4C0D, #       ldr  r4, [pc, #52]   ; r4 = NVMC READY
+    0x4F0D, #       ldr  r7, [pc, #52]   ; r7 = control block of buffer 0
+    0x2541, #       movs r5, #0x41
+    0x00AD, #       lsls r5, r5, #2      ; r5 = CONFIG - READY (0x104)
+    0x6838, # wait: ldr  r0, [r7, #0]    ; STATE
+    0x2801, #       cmp  r0, #1          ; FULL?
+    0xD1FC, #       bne  wait
+    0x6879, #       ldr  r1, [r7, #4]    ; DESTINATION
+    0x68BA, #       ldr  r2, [r7, #8]    ; SIZE
+    0x68FB, #       ldr  r3, [r7, #12]   ; SOURCE
+    0x2001, #       movs r0, #1
+    0x5160, #       str  r0, [r4, r5]    ; CONFIG = WEN
+    0x681E, # copy: ldr  r6, [r3, #0]
+    0x600E, #       str  r6, [r1, #0]
+    0x6820, # busy: ldr  r0, [r4, #0]    ; READY
+    0x2800, #       cmp  r0, #0
+    0xD0FC, #       beq  busy
+    0x3104, #       adds r1, #4
+    0x3304, #       adds r3, #4
+    0x3A04, #       subs r2, #4
+    0xD8F6, #       bhi  copy
+    0x2000, #       movs r0, #0
+    0x5160, #       str  r0, [r4, r5]    ; CONFIG = REN
+    0x6038, #       str  r0, [r7, #0]    ; STATE = EMPTY
+    0x2010, #       movs r0, #16
+    0x4047, #       eors r7, r0          ; The other buffer.
+    0xE7E8, #       b    wait
+]                                        # The address of NVMC READY and of the first control block follow.
+
+
+class FlashLoader(object):
+    """
+    Writes data to erased FLASH through the loader. Use as: loader.start(); loader.write(addr, data)...; loader.finish().
+
+    """
+    def __init__(self, api, device, buffer_size=BUFFER_SIZE):
+        """
+        :param API         api:         A connected pynrfjprog API instance.
+        :param NRF5xDevice device:      The target device.
+        :param int         buffer_size: Bytes in each of the two buffers. A multiple of 4.
+        """
+        assert (device.ram_size >= BUFFERS_OFFSET + 2 * buffer_size + STACK_SIZE), 'The device does not have enough RAM for the flash loader.'
+
+        self.api = api
+        self.code_addr = device.ram_start
+        self.control_addrs = [device.ram_start + CONTROL_OFFSET, device.ram_start + CONTROL_OFFSET + CONTROL_SIZE]
+        self.buffer_addrs = [device.ram_start + BUFFERS_OFFSET, device.ram_start + BUFFERS_OFFSET + buffer_size]
+        self.buffer_size = buffer_size
+        self.stack_addr = device.ram_end
+        self.index = 0
+        self.timeout = TIMEOUT_SECONDS
+
+    def start(self):
+        """
+        Reset and halt the CPU, copy the loader to RAM and run it. Overwrites the start and the end of RAM.
+
+        """
+        self.api.sys_reset() # Stops the peripherals and DMA the application started.
+        self.api.halt()
+
+        code = struct.pack('<{}H'.format(len(LOADER_CODE)), *LOADER_CODE) + struct.pack('<II', NVMC_READY, self.control_addrs[0])
+        self.api.write(self.code_addr, bytearray(code), False)
+        self.api.write(self.control_addrs[0], bytearray(2 * CONTROL_SIZE), False)
+
+        self.api.run(self.code_addr, self.stack_addr)
+        self.index = 0
+
+    def write(self, addr, data):
+        """
+        Write data to erased FLASH (or UICR) at addr. Unaligned ends are padded with 0xFF, which leaves FLASH unchanged.
+
+        """
+        view = memoryview(data)
+        head = addr % 4
+        start_addr = addr - head
+        padded_size = head + len(view) + (-(head + len(view)) % 4)
+
+        for offset in range(0, padded_size, self.buffer_size):
+            chunk = bytearray(b'\xff' * min(self.buffer_size, padded_size - offset)) # Only one buffer's worth of data is copied at a time.
+            data_start = max(offset - head, 0)
+            data_end = min(offset + len(chunk) - head, len(view))
+            chunk[data_start + head - offset : data_end + head - offset] = view[data_start : data_end]
+
+            self._wait_until_empty(self.index)
+            self.api.write(self.buffer_addrs[self.index], chunk, False)
+            self.api.write(self.control_addrs[self.index] + 4, bytearray(struct.pack('<III', start_addr + offset, len(chunk), self.buffer_addrs[self.index])), False)
+            self.api.write_u32(self.control_addrs[self.index], FULL, False)
+
+            self.index ^= 1
+
+    def finish(self):
+        """
+        Wait until the loader has written both buffers, then halt the CPU.
+
+        """
+        self._wait_until_empty(0)
+        self._wait_until_empty(1)
+        self.api.halt()
+
+    # Helpers.
+
+    def _wait_until_empty(self, index):
+        deadline = time.time() + self.timeout
+        while self.api.read_u32(self.control_addrs[index]) != EMPTY:
+            assert (time.time() < deadline), 'The flash loader stopped responding.'
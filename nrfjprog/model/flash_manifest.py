@@ -0,0 +1,154 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Manifests of the flash pages the program command last wrote, one per debugger, so the next program can skip the unchanged pages without
+reading them back.
+
+A manifest holds the CRC32 of every page of the last image programmed through the debugger and the FICR DEVICEID of the device it
+went to. It is only trusted while the device reads back the same DEVICEID and computes the same CRC32 of each of those pages: a replaced
+device, or one whose pages were changed since by another tool or by its own code, gets its manifest thrown away.
+"""
+
+import binascii
+
+from nrfjprog.model import device as device_model
+from nrfjprog.model import flash_pages
+from nrfjprog.model import probe_cache
+
+
+CACHE_NAME = 'manifests'
+DEVICE_ID_SIZE = 8
+
+
+class Manifest(object):
+    """
+    The digest of each page of the last image programmed, and the fingerprint of the device it was programmed to.
+
+    """
+    def __init__(self, device_id, page_size, pages=None):
+        """
+        :param String device_id: The device's FICR DEVICEID in hex.
+        :param int    page_size: The device's flash page size.
+        :param Dict   pages:     The digest of each page, by page address.
+        """
+        self.device_id = device_id
+        self.page_size = page_size
+        self.pages = pages or {}
+
+    @classmethod
+    def load(cls, snr):
+        """
+        :param int snr: Serial number of the debugger.
+        :return Manifest: The manifest last stored for snr, or None.
+        """
+        values = probe_cache.ProbeCache(CACHE_NAME).get(snr)
+        if values is None:
+            return None
+        try:
+            pages = dict((int(page_addr), digest) for page_addr, digest in values['pages'].items())
+            return cls(values['device_id'], values['page_size'], pages)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return None
+
+    def store(self, snr):
+        probe_cache.ProbeCache(CACHE_NAME).put(snr, {'device_id': self.device_id, 'page_size': self.page_size,
+                                                     'pages': dict((str(page_addr), digest) for page_addr, digest in self.pages.items())})
+
+    def matches(self, read, device, compute_crcs):
+        """
+        Compare the device's DEVICEID and the CRC32 of each of the manifest's pages on the device with the manifest's.
+
+        :param Function    read:         read(addr, size) returning the bytes at addr.
+        :param NRF5xDevice device:       The connected device.
+        :param Function    compute_crcs: compute_crcs(regions) returning the CRC32 of each (address, size) region, computed on the device.
+        :return Boolean: If the manifest describes the connected device.
+        """
+        if self.page_size != device.page_size or self.device_id != read_device_id(read):
+            return False
+        page_addrs = sorted(self.pages)
+        if not page_addrs:
+            return True
+        return compute_crcs([(page_addr, self.page_size) for page_addr in page_addrs]) == [self.pages[page_addr] for page_addr in page_addrs]
+
+    def page_changed(self, page):
+        """
+        :param FlashPage page: A page of the new image.
+        :return Boolean: If page differs from what the manifest says is on the device.
+        """
+        return self.pages.get(page.addr) != page.digest()
+
+    @classmethod
+    def for_image(cls, hex_file, device_id, page_size, skip_ranges=()):
+        """
+        Describe the device after hex_file was programmed to it.
+
+        :param IntelHex hex_file:    The image programmed.
+        :param String   device_id:   The device's FICR DEVICEID in hex.
+        :param int      page_size:   The device's flash page size.
+        :param List     skip_ranges: (start address, end address) of the ranges whose contents are not known, the pages they touch are left out.
+        """
+        manifest = cls(device_id, page_size)
+        for page in flash_pages.iter_image_pages(hex_file, page_size):
+            if any(start_addr < page.addr + page_size and page.addr < end_addr for start_addr, end_addr in skip_ranges):
+                continue
+            manifest.pages[page.addr] = page.digest()
+        return manifest
+
+
+def read_device_id(read):
+    """
+    :param Function read: read(addr, size) returning the bytes at addr.
+    :return String: The device's FICR DEVICEID in hex.
+    """
+    return _hex(read(device_model.FICR_DEVICEID, DEVICE_ID_SIZE))
+
+
+def forget(snr, start_addr=None, end_addr=None):
+    """
+    Drop the pages from start_addr to end_addr from the manifest of snr, or the whole manifest if no range is given.
+
+    """
+    if start_addr is None:
+        probe_cache.ProbeCache(CACHE_NAME).invalidate(snr)
+        return
+
+    manifest = Manifest.load(snr)
+    if manifest is None:
+        return
+    page_addrs = [page_addr for page_addr in manifest.pages if start_addr < page_addr + manifest.page_size and page_addr < end_addr]
+    if page_addrs:
+        for page_addr in page_addrs:
+            del manifest.pages[page_addr]
+        manifest.store(snr)
+
+
+# Helpers.
+
+def _hex(data):
+    return binascii.hexlify(bytes(bytearray(data))).decode('ascii')
@@ -0,0 +1,110 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Maps the segments of a hex file onto the flash pages of an nRF5x device.
+
+"""
+
+import zlib
+
+
+class FlashPage(object):
+    """
+    The contents a hex file places in a single flash page. Bytes the hex file does not cover are left erased (0xFF).
+
+    """
+    def __init__(self, addr, page_size):
+        """
+        Initialize an erased page.
+
+        :param int addr:      Start address of the page.
+        :param int page_size: Size of the page in bytes.
+        """
+        self.addr = addr
+        self.data = bytearray(b'\xff' * page_size)
+        self.ranges = []
+
+    def add(self, addr, data):
+        """
+        Place data at addr. The data must fit within the page.
+
+        """
+        offset = addr - self.addr
+        self.data[offset : offset + len(data)] = bytearray(data)
+        self.ranges.append((addr, addr + len(data)))
+
+    def digest(self):
+        return page_digest(self.data)
+
+
+def page_digest(data):
+    """
+    CRC32 of a full page of data.
+
+    """
+    return zlib.crc32(bytes(data)) & 0xFFFFFFFF
+
+
+def image_pages(hex_file, page_size):
+    """
+    Split the segments of hex_file into the flash pages they touch.
+
+    :param IntelHex hex_file:  The image to split.
+    :param int      page_size: The flash page size of the target device.
+    :return List: The FlashPage objects touched by hex_file, ordered by address.
+    """
+    return list(iter_image_pages(hex_file, page_size))
+
+
+def iter_image_pages(hex_file, page_size):
+    """
+    Like image_pages(), but yield one page at a time so only one page of the image is copied at once.
+
+    The segments of hex_file must be ordered by address, as IntelHex and FlashImage return them.
+    """
+    page = None
+
+    for segment in hex_file.segments():
+        start_addr, end_addr = segment
+
+        addr = start_addr
+        while addr < end_addr:
+            page_addr = addr - addr % page_size
+            chunk_end_addr = min(end_addr, page_addr + page_size)
+
+            if page is None or page.addr != page_addr:
+                if page is not None:
+                    yield page
+                page = FlashPage(page_addr, page_size)
+            page.add(addr, hex_file.tobinarray(start=addr, size=chunk_end_addr - addr))
+
+            addr = chunk_end_addr
+
+    if page is not None:
+        yield page
@@ -0,0 +1,93 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Gang programming: program and verify the same image on several JLink debuggers at once.
+
+Each debugger is driven from its own worker process since a pynrfjprog API instance must not be shared between threads.
+"""
+
+import collections
+import copy
+import multiprocessing
+import time
+
+from nrfjprog.model.perform_command_jlink import JLink
+
+
+ProbeResult = collections.namedtuple('ProbeResult', ['snr', 'passed', 'seconds', 'error'])
+
+
+def program(args, snrs):
+    """
+    Program and verify args.file on every debugger in snrs in parallel.
+
+    :param Object args: Arguments the program command was called with.
+    :param List   snrs: Serial numbers of the debuggers to program.
+    :return List: A ProbeResult for each debugger, ordered by serial number.
+    """
+    jobs = []
+    for snr in sorted(snrs):
+        probe_args = copy.copy(args)
+        probe_args.snr = snr
+        probe_args.gang_snrs = None
+        probe_args.allprobes = False
+        probe_args.quiet = True
+        probe_args.verify = True
+        jobs.append(probe_args)
+
+    pool = multiprocessing.Pool(processes=len(jobs))
+    try:
+        return pool.map(_program_probe, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def print_results(results, total_seconds):
+    """
+    Print a pass/fail table with the time each debugger took.
+
+    """
+    print('{:<12} {:<6} {:>8}'.format('SNR', 'RESULT', 'TIME (s)'))
+    for result in results:
+        print('{:<12} {:<6} {:>8.2f} {}'.format(result.snr, 'PASS' if result.passed else 'FAIL', result.seconds, result.error).rstrip())
+    print('{} of {} passed in {:.2f} s.'.format(sum(1 for result in results if result.passed), len(results), total_seconds))
+
+
+def _program_probe(args):
+    """
+    Worker process entry point. Never raises so one failing debugger does not stop the others.
+
+    """
+    start_time = time.time()
+    try:
+        JLink().program(args)
+    except Exception as error:
+        return ProbeResult(args.snr, False, time.time() - start_time, str(error) or type(error).__name__)
+    return ProbeResult(args.snr, True, time.time() - start_time, '')
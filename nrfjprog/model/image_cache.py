@@ -0,0 +1,197 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A cache of parsed hex files, keyed by the SHA-1 of the file's contents.
+
+Each entry is one binary file in ~/.nrfjprog/images (or $NRFJPROG_CACHE_DIR/images): a segment table followed by the data of every
+segment, each starting at a 4 KB aligned offset. Entries are memory-mapped when loaded, so a cached image costs one hash of the hex
+file and no text parsing. The least recently used entries are removed when the cache grows beyond its size limit.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+
+from nrfjprog.model import probe_cache
+from nrfjprog.model import timings
+from nrfjprog.model.flash_image import FlashImage
+
+
+MAGIC = b'NRFJIMG1'
+HEADER = struct.Struct('<8sI')
+SEGMENT = struct.Struct('<III') # Start address, size, offset of the data in the file.
+ALIGNMENT = 0x1000
+
+DEFAULT_SIZE_LIMIT = 256 * 1024 * 1024
+HASH_BLOCK_SIZE = 0x10000
+
+
+def cache_dir():
+    return os.path.join(probe_cache.cache_dir(), 'images')
+
+
+def load(path, use_cache=True, size_limit=DEFAULT_SIZE_LIMIT):
+    """
+    Load the hex file at path, from the cache if it has been parsed before.
+
+    :param String  path:       The hex file.
+    :param Boolean use_cache:  If False the file is always parsed and the cache is neither read nor written.
+    :param int     size_limit: Bytes the cache may use before the least recently used entries are removed.
+    :return FlashImage: The image.
+    """
+    with timings.phase('load image'):
+        return _load(path, use_cache, size_limit)
+
+
+# Helpers.
+
+def _load(path, use_cache, size_limit):
+    if not use_cache:
+        return _parse(path)
+
+    entry_path = os.path.join(cache_dir(), _digest(path) + '.img')
+
+    image = _load_entry(entry_path)
+    if image is not None:
+        _touch(entry_path)
+        return image
+
+    image = _parse(path)
+    _store_entry(entry_path, image)
+    _evict(size_limit)
+    return image
+
+
+def _digest(path):
+    """
+    The SHA-1 of the file's contents, read a block at a time so the hex text is never held in memory whole.
+
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _parse(path):
+    from intelhex import IntelHex
+    return FlashImage.from_intel_hex(IntelHex(path))
+
+
+def _load_entry(entry_path):
+    try:
+        with open(entry_path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (IOError, OSError, ValueError):
+        return None
+
+    try:
+        view = memoryview(data)
+    except TypeError: # Python 2 can not take a memoryview of an mmap.
+        view = memoryview(data[:])
+
+    if len(view) < HEADER.size:
+        return None
+    magic, count = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or len(view) < HEADER.size + count * SEGMENT.size:
+        return None
+
+    segments = []
+    for index in range(count):
+        start_addr, size, offset = SEGMENT.unpack_from(view, HEADER.size + index * SEGMENT.size)
+        if offset + size > len(view):
+            return None
+        segments.append((start_addr, view[offset : offset + size]))
+    return FlashImage(segments, cached=True)
+
+
+def _store_entry(entry_path, image):
+    """
+    Write the entry to a temporary file and rename it, so a concurrent nrfjprog process never maps a partial entry.
+
+    """
+    segments = image.segment_data()
+
+    table = []
+    offset = _align(HEADER.size + len(segments) * SEGMENT.size)
+    for start_addr, data in segments:
+        table.append((start_addr, len(data), offset))
+        offset = _align(offset + len(data))
+
+    tmp_path = '{}.{}.tmp'.format(entry_path, os.getpid())
+    try:
+        if not os.path.isdir(cache_dir()):
+            os.makedirs(cache_dir())
+
+        with open(tmp_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, len(segments)))
+            for entry in table:
+                file.write(SEGMENT.pack(*entry))
+            for (start_addr, data), (_, size, data_offset) in zip(segments, table):
+                file.write(b'\xff' * (data_offset - file.tell()))
+                file.write(data)
+
+        probe_cache.replace_file(tmp_path, entry_path)
+    except (IOError, OSError):
+        pass # The cache only saves time.
+
+
+def _touch(entry_path):
+    try:
+        os.utime(entry_path, None)
+    except OSError:
+        pass
+
+
+def _evict(size_limit):
+    """
+    Remove the least recently used entries until the cache is within size_limit.
+
+    """
+    try:
+        paths = [os.path.join(cache_dir(), name) for name in os.listdir(cache_dir()) if name.endswith('.img')]
+        entries = sorted((os.path.getmtime(path), os.path.getsize(path), path) for path in paths)
+    except OSError:
+        return
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total_size <= size_limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total_size -= size
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
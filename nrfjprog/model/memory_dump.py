@@ -0,0 +1,156 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Streams regions of device memory to a file in chunks, as text, raw binary or Intel HEX.
+
+Memory use stays the same whatever the size of the region: each chunk is written out through a buffered file before the next one
+is read.
+"""
+
+import binascii
+
+
+DEFAULT_CHUNK_SIZE = 0x4000
+FORMATS = ['text', 'bin', 'hex']
+
+
+class TextWriter(object):
+    """
+    The original readtofile format: a title per region followed by one ADDRESS: WORD line per word.
+
+    """
+    def __init__(self, file):
+        self.file = file
+
+    def begin_region(self, title, addr):
+        self.file.write('----------{}----------\n\n'.format(title).encode('ascii'))
+
+    def write(self, addr, data):
+        lines = ['{}: {}\n'.format(hex(addr + index), list(data[index : index + 4])) for index in range(0, len(data), 4)]
+        self.file.write(''.join(lines).encode('ascii'))
+
+    def end_region(self):
+        self.file.write(b'\n\n')
+
+    def close(self):
+        pass
+
+
+class BinaryWriter(object):
+    """
+    The raw contents of a single region.
+
+    """
+    def __init__(self, file):
+        self.file = file
+
+    def begin_region(self, title, addr):
+        pass
+
+    def write(self, addr, data):
+        self.file.write(bytes(data))
+
+    def end_region(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class IntelHexWriter(object):
+    """
+    Intel HEX records with 16 data bytes each. An extended linear address record is written whenever the upper 16 bits of the address change.
+
+    """
+    RECORD_SIZE = 16
+
+    DATA_RECORD = 0x00
+    END_OF_FILE_RECORD = 0x01
+    EXTENDED_LINEAR_ADDRESS_RECORD = 0x04
+
+    def __init__(self, file):
+        self.file = file
+        self.upper_addr = None
+
+    def begin_region(self, title, addr):
+        pass
+
+    def write(self, addr, data):
+        records = []
+        for index in range(0, len(data), self.RECORD_SIZE):
+            record_addr = addr + index
+            record_data = data[index : index + self.RECORD_SIZE]
+
+            if (record_addr >> 16) != self.upper_addr:
+                self.upper_addr = record_addr >> 16
+                records.append(self._record(self.EXTENDED_LINEAR_ADDRESS_RECORD, 0, bytearray([self.upper_addr >> 8, self.upper_addr & 0xFF])))
+
+            records.append(self._record(self.DATA_RECORD, record_addr & 0xFFFF, record_data))
+        self.file.write(''.join(records).encode('ascii'))
+
+    def end_region(self):
+        pass
+
+    def close(self):
+        self.file.write(self._record(self.END_OF_FILE_RECORD, 0, bytearray()).encode('ascii'))
+
+    def _record(self, record_type, addr, data):
+        record = bytearray([len(data), addr >> 8, addr & 0xFF, record_type]) + data
+        record.append(-sum(record) & 0xFF)
+        return ':' + binascii.hexlify(bytes(record)).decode('ascii').upper() + '\n'
+
+
+WRITERS = {'text': TextWriter, 'bin': BinaryWriter, 'hex': IntelHexWriter}
+
+
+def dump(read, regions, path, output_format='text', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Read regions of memory chunk by chunk and write them to path.
+
+    :param Function read:          read(addr, size) returning the bytes at addr as a sequence of ints or a bytes-like object.
+    :param List     regions:       (title, start address, size) of each region to dump.
+    :param String   path:          The file to write.
+    :param String   output_format: One of FORMATS.
+    :param int      chunk_size:    Number of bytes read from the device at a time. A positive multiple of 4.
+    """
+    assert (chunk_size > 0 and chunk_size % 4 == 0), 'The chunk size must be a positive multiple of 4.'
+    assert (output_format != 'bin' or len(regions) == 1), 'The bin format can only hold one region. Select one of --readcode, --readuicr and --readram.'
+
+    with open(path, 'wb', 1 << 16) as file:
+        writer = WRITERS[output_format](file)
+
+        for title, start_addr, size in regions:
+            writer.begin_region(title, start_addr)
+
+            for addr in range(start_addr, start_addr + size, chunk_size):
+                writer.write(addr, bytearray(read(addr, min(chunk_size, start_addr + size - addr))))
+
+            writer.end_region()
+
+        writer.close()
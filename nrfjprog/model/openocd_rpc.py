@@ -0,0 +1,158 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A client for OpenOCD's TCL RPC server, so an OpenOCD process the user keeps running stays connected to the debugger across nrfjprog commands.
+
+Each command is sent as UTF-8 text terminated by 0x1a, and OpenOCD replies with the command's result terminated by 0x1a. If no
+OpenOCD server is listening, one is started for the connection and stopped when the connection is closed.
+"""
+
+import os
+import socket
+import subprocess
+import time
+
+from nrfjprog.model import timings
+
+
+DEFAULT_HOST = 'localhost'
+DEFAULT_PORT = 6666
+TERMINATOR = b'\x1a'
+
+SERVER_COMMAND = ['openocd', '-f', 'interface/cmsis-dap.cfg', '-f', 'target/{target}.cfg', '-c', 'tcl_port {port}']
+SERVER_START_TIMEOUT = 10.0
+
+
+class OpenOCDError(Exception):
+    pass
+
+
+class TclRpcClient(object):
+    """
+    A connection to an OpenOCD TCL RPC server.
+
+    """
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.server = None # The OpenOCD process connect() started, if it started one.
+        self._socket = None
+        self._buffer = b''
+
+    def connect(self):
+        self._socket = socket.create_connection((self.host, self.port))
+
+    def close(self):
+        """
+        Close the connection, and stop the OpenOCD server if it was started for it.
+
+        """
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+        if self.server is not None:
+            self.server.terminate()
+            self.server.wait()
+            self.server = None
+
+    def command(self, command):
+        """
+        Run command in OpenOCD.
+
+        :param String command: The TCL command.
+        :return String: The result of the command.
+        """
+        with timings.phase(command.split(' ', 1)[0]):
+            return self._command(command)
+
+    def read_memory(self, addr, length):
+        """
+        :return bytearray: length bytes of the target's memory from addr.
+        """
+        if length == 0:
+            return bytearray()
+        with timings.phase('read') as phase:
+            phase.bytes += length
+            return bytearray(int(value, 0) for value in self._command('read_memory {} 8 {}'.format(addr, length)).split())
+
+    # Helpers.
+
+    def _command(self, command):
+        if self._socket is None:
+            self.connect()
+
+        self._socket.sendall('format "%d %s" [catch {{{}}} _nrfjprog_result] $_nrfjprog_result'.format(command).encode('utf-8') + TERMINATOR)
+        status, _, result = self._receive().decode('utf-8').partition(' ')
+
+        if status != '0':
+            raise OpenOCDError('OpenOCD command "{}" failed: {}'.format(command, result))
+        return result
+
+    def _receive(self):
+        while TERMINATOR not in self._buffer:
+            data = self._socket.recv(4096)
+            if not data:
+                self.close()
+                raise OpenOCDError('OpenOCD closed the connection.')
+            self._buffer += data
+
+        response, _, self._buffer = self._buffer.partition(TERMINATOR)
+        return response
+
+
+def connect(host=DEFAULT_HOST, port=DEFAULT_PORT, start_server=True, target='nrf52'):
+    """
+    Connect to the OpenOCD server on host:port, starting one first if none is running on this PC.
+
+    :param String target: The OpenOCD target config (i.e. 'nrf51') of a server that is started.
+    :return TclRpcClient: The connected client. Closing it stops a server that was started.
+    """
+    client = TclRpcClient(host, port)
+    try:
+        client.connect()
+        return client
+    except socket.error:
+        if not start_server:
+            raise
+
+    with open(os.devnull, 'w') as devnull:
+        client.server = subprocess.Popen([arg.format(target=target, port=port) for arg in SERVER_COMMAND], stdin=None, stdout=devnull, stderr=devnull,
+                                         shell=False)
+
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while True:
+        try:
+            client.connect()
+            return client
+        except socket.error:
+            if time.time() > deadline:
+                client.close()
+                raise OpenOCDError('Could not connect to OpenOCD on {}:{}.'.format(host, port))
+            time.sleep(0.1)
@@ -36,14 +36,33 @@ class PerformCommand(object):
     Base class.
 
     """
-    def byte_lists_equal(self, data, read_data):
+    MAX_REPORTED_MISMATCHES = 10
+
+    def check_verify_report(self, args, report):
+        """
+        Write report to the file given with --verifyreport, print where the data read back did not match, and fail if it did not.
+
+        :param Object       args:   Arguments the command was called with.
+        :param VerifyReport report: The result of comparing the data read back with the data written.
         """
+        if getattr(args, 'verifyreport', None):
+            report.write_json(args.verifyreport)
 
+        for start_addr, end_addr in report.mismatches[:self.MAX_REPORTED_MISMATCHES]:
+            self.log(args, 'Mismatch at {}-{} ({} bytes).'.format(hex(start_addr), hex(end_addr), end_addr - start_addr))
+
+        assert (report.passed), 'Verify failed. Data readback from memory does not match data written. ' + report.summary()
+
+    def check_options_supported(self, args, options, debugger):
         """
-        for i in xrange(len(data)):
-            if data[i] != read_data[i]:
-                return False
-        return True
+        Fail before touching the device if any of options was given, instead of silently ignoring it.
+
+        :param Object args:     Arguments the command was called with.
+        :param List   options:  Names of the options the backend does not support, as attributes of args.
+        :param String debugger: The kind of debugger, for the message.
+        """
+        for option in options:
+            assert (not getattr(args, option, None)), '--{} is not supported with {}.'.format(option, debugger)
 
     def is_flash_addr(self, addr, device):
         """
@@ -60,6 +79,23 @@ class PerformCommand(object):
         else:
             print(msg)
 
+    def readtofile_regions(self, args, device):
+        """
+        The regions of memory the readtofile command should store, in the order they are written to FILE.
+
+        :param Object      args:   Arguments the readtofile command was called with.
+        :param NRF5xDevice device: The target device.
+        :return List: (title, start address, size) of each region.
+        """
+        regions = []
+        if args.readcode or not (args.readuicr or args.readram):
+            regions.append(('Code FLASH', device.flash_start, device.flash_size))
+        if args.readuicr:
+            regions.append(('UICR', device.uicr_start, device.page_size))
+        if args.readram:
+            regions.append(('RAM', device.ram_start, device.ram_size))
+        return regions
+
     def output_data(self, addr, byte_array, file=None):
         """
         Read data from memory and output it to the console or file with the following format: ADDRESS: WORD\n
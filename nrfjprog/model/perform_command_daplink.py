@@ -27,16 +27,20 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import enum
-from intelhex import IntelHex
-import os
-from pyOCD.board import MbedBoard
-from pyOCD.target import cortex_m
+import struct
 
 from nrfjprog import nrfjprog_version
 from nrfjprog.model import device
+from nrfjprog.model import image_cache
+from nrfjprog.model import memory_dump
+from nrfjprog.model import timings
+from nrfjprog.model import verify
 from nrfjprog.model.perform_command import PerformCommand
 
 
+TARGET_PHASES = {'readBlockMemoryUnaligned8': 'read', 'write32': 'write', 'writeBlockMemoryUnaligned8': 'write', 'reset': 'reset'}
+
+
 @enum.unique
 class Memory_Access_Mode(enum.IntEnum):
     READ_ENABLE  = 0
@@ -48,12 +52,14 @@ class DapLink(PerformCommand):
     """
 
     """
+    UNSUPPORTED_PROGRAM_OPTIONS = ['dryrun', 'differential', 'incremental', 'keep', 'skipsoftdevice', 'flashloader', 'crcverify',
+                                   'verifyreport'] # pyOCD's flash builder plans, writes and verifies itself.
+    UNSUPPORTED_VERIFY_OPTIONS = ['crcverify', 'skipsoftdevice'] # FILE is read back as a whole.
+
     def erase(self, args):
         board = self._setup()
         board.flash.init()
 
-        NVMC_ERASEUICR_ADDR = 0x4001E514
-
         if args.erasepage:
             board.flash.erasePage(args.erasepage)
         elif args.eraseuicr:
@@ -66,6 +72,7 @@ class DapLink(PerformCommand):
         board.target.halt()
 
     def ids(self, args):
+        from pyOCD.board import MbedBoard
         MbedBoard.listConnectedBoards()
 
     def memrd(self, args):
@@ -76,7 +83,7 @@ class DapLink(PerformCommand):
     def memwr(self, args):
         board = self._setup()
 
-        nRF5_device = device.NRF5xDevice('NRF52_FP1') # TODO: This should not be hard-coded.
+        nRF5_device = self._device(board, args)
 
         if self.is_flash_addr(args.addr, nRF5_device):
             self._config_NVMC(board.target, Memory_Access_Mode.WRITE_ENABLE)
@@ -103,50 +110,60 @@ class DapLink(PerformCommand):
         board.target.reset()
 
     def program(self, args):
+        self.check_options_supported(args, self.UNSUPPORTED_PROGRAM_OPTIONS, 'a DAPLink debugger')
+
         board = self._setup()
         board.flash.init()
 
-        tmp_bin_file = 'tmp.bin'
+        nRF5_device = self._device(board, args)
 
-        if args.sectorsanduicrerase:
+        if args.sectorsanduicrerase or args.erase == 'sectorsanduicr':
             self._erase_uicr(board.target) # TODO: May not be needed if pyOCD does this. Double check before removing.
 
-        hex_file = IntelHex(args.file)
-        hex_file.tobinfile(tmp_bin_file)
-        board.flash.flashBinary(tmp_bin_file, chip_erase=args.eraseall, fast_verify=args.verify)
+        hex_file = image_cache.load(args.file, not args.noimagecache)
+
+        flash_builder = board.flash.getFlashBuilder()
+        flash_bytes = 0
+        uicr_segments = []
+        for start_addr, end_addr in hex_file.segments():
+            data = hex_file.tobinarray(start=start_addr, size=end_addr - start_addr)
+            if start_addr < nRF5_device.flash_end:
+                flash_builder.addData(start_addr, list(data))
+                flash_bytes += len(data)
+            else:
+                uicr_segments.append((start_addr, data))
+
+        with timings.phase('flash builder') as phase:
+            flash_builder.program(chip_erase=self._chip_erase(args), fast_verify=args.verify)
+            phase.bytes += flash_bytes
+
+        if uicr_segments:
+            self._config_NVMC(board.target, Memory_Access_Mode.WRITE_ENABLE)
+            for start_addr, data in uicr_segments:
+                board.target.writeBlockMemoryUnaligned8(start_addr, list(data))
+            self._config_NVMC(board.target, Memory_Access_Mode.READ_ENABLE)
 
         if args.debugreset or args.pinreset or args.systemreset:
             board.target.reset()
 
-        os.remove(tmp_bin_file)
-
     def rbp(self, args):
         print('Not implemented in nrfjprog when using pyOCD.')
 
     def readregs(self, args):
         board = self._setup()
 
+        from pyOCD.target import cortex_m
+
         for reg in cortex_m.CORE_REGISTER:
             if cortex_m.CORE_REGISTER[reg] in range(0, 16):
                 print(board.target.readCoreRegister(reg))
 
     def readtofile(self, args):
         board = self._setup()
-        nRF5_device = device.NRF5xDevice('NRF52_FP1') # TODO: This should not be hard-coded.
+        nRF5_device = self._device(board, args)
 
         try:
-            with open(args.file, 'w') as file:
-                if args.readcode or not (args.readuicr or args.readram):
-                    file.write('----------Code FLASH----------\n\n')
-                    self.output_data(nRF5_device.flash_start, board.target.readBlockMemoryAligned32(nRF5_device.flash_start, nRF5_device.flash_size), file)
-                    file.write('\n\n')
-                if args.readuicr:
-                    file.write('----------UICR----------\n\n')
-                    self.output_data(nRF5_device.uicr_start, board.target.readBlockMemoryAligned32(nRF5_device.uicr_start, nRF5_device.page_size), file)
-                    file.write('\n\n')
-                if args.readram:
-                    file.write('----------RAM----------\n\n')
-                    self.output_data(nRF5_device.ram_start, board.target.readBlockMemoryAligned32(nRF5_device.ram_start, nRF5_device.ram_size), file)
+            memory_dump.dump(board.target.readBlockMemoryUnaligned8, self.readtofile_regions(args, nRF5_device), args.file, args.format, args.chunksize)
         except IOError as error:
             pass # TODO: do something...
 
@@ -166,9 +183,13 @@ class DapLink(PerformCommand):
         board.target.resume()
 
     def verify(self, args):
+        self.check_options_supported(args, self.UNSUPPORTED_VERIFY_OPTIONS, 'a DAPLink debugger')
+
         board = self._setup()
+        nRF5_device = self._device(board, args)
+        report = verify.VerifyReport(nRF5_device.page_size)
 
-        hex_file = IntelHex(args.file)
+        hex_file = image_cache.load(args.file, not args.noimagecache)
         for segment in hex_file.segments():
             start_addr, end_addr = segment
             size = end_addr - start_addr
@@ -176,13 +197,26 @@ class DapLink(PerformCommand):
             data = hex_file.tobinarray(start=start_addr, size=size)
             read_data = board.target.readBlockMemoryUnaligned8(start_addr, size)
 
-            assert (self.byte_lists_equal(data, read_data)), 'Verify failed. Data readback from memory does not match data written.'
+            report.add(start_addr, data, read_data)
+
+        self.check_verify_report(args, report)
 
     def version(self, args):
         print('nRFjprog version: {}'.format(nrfjprog_version.NRFJPROG_VERSION))
 
     # Helpers.
 
+    def _chip_erase(self, args):
+        """
+        The flash builder's chip_erase for the erase mode in args. None lets pyOCD estimate which of a chip erase and sector erases is quicker.
+
+        """
+        if args.eraseall or args.erase == 'all':
+            return True
+        if args.erase == 'auto':
+            return None
+        return False
+
     def _config_NVMC(self, target, access_mode):
         """
         Configure the NVMC to read, write, or erase FLASH.
@@ -191,11 +225,32 @@ class DapLink(PerformCommand):
         NVMC_CONFIG_ADDR = 0x4001E504
         target.write32(NVMC_CONFIG_ADDR, access_mode)
 
+    def _device(self, board, args):
+        """
+        The connected device: --deviceversion if given, else the first device version of the family pyOCD detected with the FLASH size in the FICR.
+
+        """
+        if args.deviceversion:
+            return device.NRF5xDevice(args.deviceversion)
+
+        family = board.getTargetType().upper()
+        code_page_size, code_size = struct.unpack('<II', bytes(bytearray(board.target.readBlockMemoryUnaligned8(device.FICR_CODEPAGESIZE, 8))))
+        for device_version in sorted(device.FLASH_SIZE):
+            if device_version.startswith(family) and device.FLASH_SIZE[device_version] == code_page_size * code_size:
+                return device.NRF5xDevice(device_version)
+        assert(False), 'Unknown {} device with {} bytes of FLASH.'.format(family, code_page_size * code_size)
+
     def _erase_uicr(self, target):
+        NVMC_ERASEUICR_ADDR = 0x4001E514
+
         self._config_NVMC(target, Memory_Access_Mode.ERASE_ENABLE)
         target.write32(NVMC_ERASEUICR_ADDR, 1)
         self._config_NVMC(target, Memory_Access_Mode.READ_ENABLE)
 
     def _setup(self):
-        board = MbedBoard.chooseBoard()
+        from pyOCD.board import MbedBoard # pyOCD is only imported by the commands that connect, so i.e. version starts quickly.
+
+        with timings.phase('connect'):
+            board = MbedBoard.chooseBoard()
+        board.target = timings.instrument(board.target, TARGET_PHASES)
         return board
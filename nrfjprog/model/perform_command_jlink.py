@@ -26,11 +26,28 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import sys
+import time
+
 from pynrfjprog import API
 
 from nrfjprog import nrfjprog_version
+from nrfjprog.model import batch
+from nrfjprog.model import clockspeed
 from nrfjprog.model import device
+from nrfjprog.model import image_cache
+from nrfjprog.model import memory_dump
+from nrfjprog.model import probe_cache
+from nrfjprog.model import rtt
+from nrfjprog.model import timings
 from nrfjprog.model.perform_command import PerformCommand
+from nrfjprog.session import Session
+
+
+API_PHASES = {'open': 'connect', 'connect_to_emu_with_snr': 'connect', 'connect_to_emu_without_snr': 'connect', 'read_connected_emu_snr': 'connect',
+              'read_device_version': 'detect', 'read': 'read', 'read_u32': 'read', 'write': 'write', 'write_u32': 'write',
+              'erase_all': 'erase', 'erase_page': 'erase', 'erase_uicr': 'erase', 'recover': 'erase',
+              'disconnect_from_emu': 'disconnect', 'close': 'disconnect'}
 
 
 class SetupCommand(object):
@@ -40,6 +57,9 @@ class SetupCommand(object):
     """
 
     DEFAULT_JLINK_SPEED_KHZ = 5000
+    DEVICE_CACHE_TTL = 24 * 60 * 60 # Seconds the detected family and device version of a debugger's target are trusted.
+    TRANSFER_ERRORS = ['JLINKARM_DLL_ERROR', 'JLINKARM_DLL_READ_ERROR', 'JLINKARM_DLL_TIME_OUT_ERROR'] # Errors --clockspeed auto backs off on.
+    VALIDATION_SIZE = 0x100 # Bytes of the FICR read to validate a clock speed.
 
     def __init__(self, args, do_not_initialize_api=False):
         """
@@ -51,16 +71,43 @@ class SetupCommand(object):
         self.args = args
         self.api = None
         self.device = None
+        self.device_family = None
         self.device_version = None
+        self.blank_pages = set() # FLASH pages known to be erased, since they were erased or read back blank. Cleared whenever the device runs.
+        self.snr = self.args.snr # Serial number of the debugger used, read from it on connecting if not given. The caches are keyed by it.
+
+        if not do_not_initialize_api and self.snr is None:
+            self.snr = self._connected_emu_snr()
+
+        if getattr(self.args, 'clockspeed', None) == clockspeed.AUTO: # ids and version have no --clockspeed.
+            cached_clockspeed = clockspeed.cached(self.snr)
+            self.clockspeed = cached_clockspeed or clockspeed.SAFE_SPEED_KHZ
+        else:
+            self.clockspeed = getattr(self.args, 'clockspeed', None) or self.DEFAULT_JLINK_SPEED_KHZ
 
         if not do_not_initialize_api:
-            if self._setup('NRF52'):
+            device_cache = probe_cache.ProbeCache('devices', ttl=self.DEVICE_CACHE_TTL)
+            cached_device = device_cache.get(self.snr)
+
+            if cached_device and not self._setup(cached_device['family'], cached_device['device_version']):
+                device_cache.invalidate(self.snr) # The target was replaced by a device of the other family.
+                cached_device = None
+
+            if cached_device:
+                pass
+            elif self._setup('NRF52'):
                 pass
             elif self._setup('NRF51'):
                 pass
             else:
                 assert(False), 'Unknown device family.'
 
+            if cached_device != {'family': self.device_family, 'device_version': self.device_version}:
+                device_cache.put(self.snr, {'family': self.device_family, 'device_version': self.device_version})
+
+            if self.args.clockspeed == clockspeed.AUTO and not cached_clockspeed:
+                self._negotiate_clockspeed()
+
     def cleanup(self):
         """
         Disconnect from the emulator (debugger) and close the pynrfjprog api instance.
@@ -70,7 +117,9 @@ class SetupCommand(object):
         self.api.close()
         self.api = None
         self.device = None
+        self.device_family = None
         self.device_version = None
+        self.blank_pages.clear()
 
     def connect_to_emu(self, api):
         """
@@ -84,30 +133,99 @@ class SetupCommand(object):
 
     def _connect_to_emu(self):
         """
-        Connect to the emulator (debugger) with the specific serial number and/or clock speed if either was specified in the command-line arguments.
+        Connect to the emulator (debugger) with the specific serial number if it was specified in the command-line arguments, at self.clockspeed.
 
         """
-        if self.args.snr and self.args.clockspeed:
-            self.api.connect_to_emu_with_snr(self.args.snr, self.args.clockspeed)
-        elif self.args.snr:
-            self.api.connect_to_emu_with_snr(self.args.snr, self.DEFAULT_JLINK_SPEED_KHZ)
-        elif self.args.clockspeed:
-            self.api.connect_to_emu_without_snr(self.args.clockspeed)
+        if self.snr:
+            self.api.connect_to_emu_with_snr(self.snr, self.clockspeed)
         else:
-            self.api.connect_to_emu_without_snr(self.DEFAULT_JLINK_SPEED_KHZ)
+            self.api.connect_to_emu_without_snr(self.clockspeed)
+            self.snr = self.api.read_connected_emu_snr()
+
+    def _connected_emu_snr(self):
+        """
+        Connect without a serial number to find out which debugger is used, so it can be looked up in the caches before connecting for real.
+
+        :return int: The serial number of the debugger.
+        """
+        api = API.API('NRF52') # Device family type arbitrary since we are not connecting to a device.
+        api.open()
+        try:
+            api.connect_to_emu_without_snr(clockspeed.SAFE_SPEED_KHZ)
+            snr = api.read_connected_emu_snr()
+            api.disconnect_from_emu()
+            return snr
+        finally:
+            api.close()
+
+    def _reconnect(self, speed):
+        self.clockspeed = speed
+        self.api.disconnect_from_emu()
+        self._connect_to_emu()
+
+    def _negotiate_clockspeed(self):
+        """
+        Find the fastest clock speed the FICR reads back correctly at, stay connected at it and remember it for this debugger.
+
+        """
+        read = lambda: self.api.api.read(self.device.ficr_start, self.VALIDATION_SIZE) # Past the BackoffAPI, a failing speed must not be retried.
+        self.clockspeed = clockspeed.negotiate(self._reconnect, read, (API.APIError,), self.clockspeed)
+        clockspeed.store(self.snr, self.clockspeed)
 
-    def _setup(self, device_family_guess):
+    def _back_off_clockspeed(self):
+        """
+        Reconnect at the next slower clock speed after a transfer error.
+
+        :return Boolean: False if already at the slowest speed.
+        """
+        speed = clockspeed.slower(self.clockspeed)
+        if speed is None:
+            return False
+
+        if not self.args.quiet:
+            print('Transfer error at {} kHz, retrying at {} kHz.'.format(self.clockspeed, speed))
+        self._reconnect(speed)
+        clockspeed.store(self.snr, speed)
+        return True
+
+    def _is_transfer_error(self, error):
+        return isinstance(error, API.APIError) and error.err_code in [getattr(API.NrfjprogdllErr, name) for name in self.TRANSFER_ERRORS
+                                                                          if hasattr(API.NrfjprogdllErr, name)]
+
+    def _device_family_matches(self, device_family):
+        """
+        A cheaper check of the device family than read_device_version(): FICR INFO.PART only reads as 0x52xxx on nRF52 devices.
+
+        """
+        try:
+            part = self.api.read_u32(device.FICR_INFO_PART)
+        except API.APIError as error:
+            if error.err_code == API.NrfjprogdllErr.WRONG_FAMILY_FOR_DEVICE:
+                return False
+            raise
+        return (part >> 12 == 0x52) == (device_family == 'NRF52')
+
+    def _setup(self, device_family_guess, cached_device_version=None):
         """
         Connect to target device and check if device_family_guess is correct. If correct, initialize api and device_version and return True. Else, cleanup and return False.
 
-        :param  String device_family_guess: The device family type to try.
+        :param  String device_family_guess:   The device family type to try.
+        :param  String cached_device_version: The device version the cache has for this debugger. It is used instead of read_device_version() if the device family matches.
         :return Boolean: If device_family_guess was correct and we initialized everything successfully.
         """
-        self.api = API.API(device_family_guess)
+        self.api = timings.instrument(API.API(device_family_guess), API_PHASES)
+        if self.args.clockspeed == clockspeed.AUTO:
+            self.api = clockspeed.BackoffAPI(self.api, self._back_off_clockspeed, self._is_transfer_error)
         self.api.open()
         self._connect_to_emu()
-
-        if not self.args.deviceversion:
+        self.device_family = device_family_guess
+
+        if cached_device_version:
+            if not self._device_family_matches(device_family_guess):
+                self.cleanup()
+                return False
+            self.device_version = self.args.deviceversion or cached_device_version
+        elif not self.args.deviceversion:
             try:
                 self.device_version = self.api.read_device_version()
             except API.APIError as error:
@@ -127,54 +245,106 @@ class JLink(PerformCommand):
     """
 
     """
+    def __init__(self, nrf=None):
+        """
+        :param SetupCommand nrf: An already connected SetupCommand to run every command with (i.e. by the session server). By default each command connects and disconnects on its own.
+        """
+        self.nrf = nrf
+
+    def batch(self, args):
+        """
+        Run every step of the script over one connection. All steps are parsed before the device is touched, the batch stops at the first step that fails.
+
+        """
+        from nrfjprog.__main__ import Nrfjprog
+
+        cli = Nrfjprog()
+        steps = []
+        for argv in batch.read_steps(args.script):
+            step_args = cli.parse_args(argv)
+            assert (step_args.command not in batch.UNSUPPORTED_COMMANDS), 'The {} command can not be run in a batch.'.format(step_args.command)
+            assert (not step_args.daplink and not step_args.openocd and getattr(step_args, 'gang_snrs', None) is None), 'Batch steps run on the batch\'s JLink connection.'
+            for option in ('snr', 'clockspeed', 'deviceversion'):
+                assert (getattr(step_args, option, None) in (None, getattr(args, option))), 'Give --{} to the batch command instead of to its steps.'.format(option)
+                if hasattr(step_args, option):
+                    setattr(step_args, option, getattr(args, option))
+            step_args.quiet = step_args.quiet or args.quiet
+            steps.append((argv, step_args))
+
+        first_step = 1
+        if steps and steps[0][1].command == 'recover': # A protected device can not be detected, so it is recovered before the batch connects.
+            self._run_step(JLink(), cli, 1, *steps[0])
+            first_step = 2
+
+        if first_step > len(steps):
+            return
+
+        nrf = self._setup(args)
+        try:
+            perform_command = JLink(nrf)
+            for number, (argv, step_args) in enumerate(steps[first_step - 1:], first_step):
+                self._run_step(perform_command, cli, number, argv, step_args)
+        finally:
+            self._cleanup(nrf)
+
+    @staticmethod
+    def _run_step(perform_command, cli, number, argv, step_args):
+        perform_command.log(step_args, cli.help_messages[step_args.command])
+        try:
+            getattr(perform_command, step_args.command)(step_args)
+        except Exception as error:
+            assert(False), 'Step {} ({}) failed: {}'.format(number, ' '.join(argv), error)
+
+    def daemon(self, args):
+        from nrfjprog.model import session_server
+
+        assert (session_server.is_supported()), 'The session server requires Unix domain sockets.'
+
+        if args.stop:
+            session_server.stop_server(args.socket)
+            return
+
+        server = session_server.SessionServer(args.socket, args.idletimeout)
+        server.start()
+        self.log(args, 'Listening on {}.'.format(server.socket_path))
+        server.serve_forever()
+
     def erase(self, args):
-        nrf = SetupCommand(args)
+        nrf = self._setup(args)
 
-        if args.erasepage:
-            nrf.api.erase_page(args.erasepage)
-        elif args.eraseuicr:
-            nrf.api.erase_uicr()
-        else:
-            nrf.api.erase_all()
+        Session(nrf=nrf).erase(args.erasepage, args.eraseuicr)
 
-        nrf.cleanup()
+        self._cleanup(nrf)
 
     def halt(self, args):
-        nrf = SetupCommand(args)
+        nrf = self._setup(args)
 
-        nrf.api.halt()
+        Session(nrf=nrf).halt()
 
-        nrf.cleanup()
+        self._cleanup(nrf)
 
     def ids(self, args):
-        nrf = SetupCommand(args, do_not_initialize_api=True)
-
-        api = API.API('NRF52') # Device family type arbitrary since we are not connecting to a device. Use NRF52 by default.
-        api.open()
-
-        ids = api.enum_emu_snr()
+        ids = Session.ids()
         if ids:
-            print(sorted(ids))
-
-        api.close()
+            print(ids)
 
     def memrd(self, args):
-        nrf = SetupCommand(args)
+        nrf = self._setup(args)
 
-        data = nrf.api.read(args.addr, args.length)
-        self.output_data(args.addr, data)
+        data = Session(nrf=nrf).memrd(args.addr, args.length)
+        self.output_data(args.addr, list(bytearray(data)))
 
-        nrf.cleanup()
+        self._cleanup(nrf)
 
     def memwr(self, args):
-        nrf = SetupCommand(args)
+        nrf = self._setup(args)
 
-        nrf.api.write_u32(args.addr, args.val, self.is_flash_addr(args.addr, nrf.device))
+        Session(nrf=nrf).memwr(args.addr, args.val)
 
-        nrf.cleanup()
+        self._cleanup(nrf)
 
     def pinresetenable(self, args):
-        nrf = SetupCommand(args)
+        nrf = self._setup(args)
 
         assert(nrf.device_version[:5] != 'NRF51'), "Enabling pin reset is not a valid command for nRF51 devices."
 
@@ -185,124 +355,116 @@ class JLink(PerformCommand):
         nrf.api.write_u32(uicr_pselreset0_addr, uicr_pselreset_21_connect, True)
         nrf.api.write_u32(uicr_pselreset1_addr, uicr_pselreset_21_connect, True)
         nrf.api.sys_reset()
+        nrf.blank_pages.clear()
 
-        nrf.cleanup()
+        self._cleanup(nrf)
 
     def program(self, args):
-        from intelhex import IntelHex
-        nrf = SetupCommand(args)
-
-        if args.eraseall:
-            nrf.api.erase_all()
-        if args.sectorsanduicrerase:
-            nrf.api.erase_uicr()
-
-        hex_file = IntelHex(args.file)
-        for segment in hex_file.segments():
-            start_addr, end_addr = segment
-            size = end_addr - start_addr
-
-            if args.sectorserase or args.sectorsanduicrerase:
-                start_page = int(start_addr / nrf.device.page_size)
-                end_page = int(end_addr / nrf.device.page_size)
-                for page in range(start_page, end_page + 1):
-                    nrf.api.erase_page(page * nrf.device.page_size)
-
-            data = hex_file.tobinarray(start=start_addr, size=(size))
-            nrf.api.write(start_addr, data.tolist(), True)
-
-            if args.verify:
-                read_data = nrf.api.read(start_addr, len(data))
-                assert (self.byte_lists_equal(data, read_data)), 'Verify failed. Data readback from memory does not match data written.'
-
-        self._reset(nrf, args)
+        if args.gang_snrs is not None:
+            self._program_gang(args)
+            return
 
-        nrf.cleanup()
+        nrf = self._setup(args)
+
+        result = Session(nrf=nrf).program(args.file, erase=self._erase_mode(args), differential=args.differential, incremental=args.incremental, skip_softdevice=args.skipsoftdevice, flashloader=args.flashloader,
+                                          verify=args.verify, crcverify=args.crcverify, reset=self._reset_kind(args), dryrun=args.dryrun,
+                                          use_image_cache=not args.noimagecache, keep=args.keep)
+        self._cleanup(nrf)
+
+        if result.skipped_softdevice is not None:
+            start_addr, end_addr = result.skipped_softdevice.region()
+            self.log(args, 'Skipped the MBR and SoftDevice (FWID {}) from {} to {}, the device already has it.'.format(hex(result.skipped_softdevice.fwid), hex(start_addr), hex(end_addr)))
+        if result.used_manifest:
+            self.log(args, '{} of {} pages differ from the FILE programmed last, the device was not read back.'.format(result.changed_pages, result.pages))
+        elif result.pages is not None:
+            self.log(args, '{} of {} pages differ from FILE.'.format(result.changed_pages, result.pages))
+        if result.skipped_erases:
+            self.log(args, 'Skipped erasing {} pages that were already blank.'.format(result.skipped_erases))
+        if args.dryrun:
+            for line in result.plan.describe():
+                print(line)
+        if result.report is not None:
+            self.check_verify_report(args, result.report)
 
     def rbp(self, args):
-        nrf = SetupCommand(args)
+        nrf = self._setup(args)
 
-        if args.rbplevel == 'CR0':
-            nrf.api.readback_protect(API.ReadbackProtection.REGION_0)
-        else:
-            nrf.api.readback_protect(API.ReadbackProtection.ALL)
+        Session(nrf=nrf).readback_protect(args.rbplevel)
 
-        nrf.cleanup()
+        self._cleanup(nrf)
 
     def readregs(self, args):
-        nrf = SetupCommand(args)
+        nrf = self._setup(args)
 
-        for reg in API.CpuRegister:
-            print('{}: {}'.format(reg.name, hex(nrf.api.read_cpu_register(reg))))
+        for name, value in Session(nrf=nrf).readregs().items():
+            print('{}: {}'.format(name, hex(value)))
 
-        nrf.cleanup()
+        self._cleanup(nrf)
 
     def readtofile(self, args):
-        nrf = SetupCommand(args)
+        nrf = self._setup(args)
 
         try:
-            with open(args.file, 'w') as file:
-                if args.readcode or not (args.readuicr or args.readram):
-                    file.write('----------Code FLASH----------\n\n')
-                    self.output_data(nrf.device.flash_start, nrf.api.read(nrf.device.flash_start, nrf.device.flash_size), file)
-                    file.write('\n\n')
-                if args.readuicr:
-                    file.write('----------UICR----------\n\n')
-                    self.output_data(nrf.device.uicr_start, nrf.api.read(nrf.device.uicr_start, nrf.device.page_size), file)
-                    file.write('\n\n')
-                if args.readram:
-                    file.write('----------RAM----------\n\n')
-                    self.output_data(nrf.device.ram_start, nrf.api.read(nrf.device.ram_start, nrf.device.ram_size), file)
+            memory_dump.dump(nrf.api.read, self.readtofile_regions(args, nrf.device), args.file, args.format, args.chunksize)
         except IOError as error:
             print("{}.".format(error))
 
-        nrf.cleanup()
+        self._cleanup(nrf)
 
     def recover(self, args):
+        if self.nrf is not None:
+            Session(nrf=self.nrf).recover() # Recover over the open connection, i.e. in a batch.
+            return
+
         nrf = SetupCommand(args, do_not_initialize_api=True)
 
-        api = API.API(args.family)
+        api = timings.instrument(API.API(args.family), API_PHASES)
         api.open()
 
         nrf.connect_to_emu(api)
-        nrf.api.recover()
+        Session(nrf=nrf).recover()
 
-        nrf.cleanup()
+        self._cleanup(nrf)
 
     def reset(self, args):
-        nrf = SetupCommand(args)
+        nrf = self._setup(args)
 
-        self._reset(nrf, args, default_sys_reset=True)
+        Session(nrf=nrf).reset(self._reset_kind(args) or 'system')
 
-        nrf.cleanup()
+        self._cleanup(nrf)
 
-    def run(self, args):
-        nrf = SetupCommand(args)
+    def rtt(self, args):
+        nrf = self._setup(args)
 
-        if args.pc != None and args.sp != None:
-            nrf.api.run(args.pc, args.sp)
-        elif args.pc != None or args.sp != None:
-            assert(False), 'Both the PC and the SP must be specified.'
-        else:
-            nrf.api.go()
+        channels = args.channel or [0]
+        file = open(args.outfile, 'wb') if args.outfile else getattr(sys.stdout, 'buffer', sys.stdout) # Python 2 writes bytes to sys.stdout.
+        writer = rtt.LineWriter(file, channels)
+        try:
+            rtt.stream(Session(nrf=nrf).rtt(), writer, channels, args.duration)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            writer.close()
+            if args.outfile:
+                file.close()
+            self._cleanup(nrf)
 
-        nrf.cleanup()
+    def run(self, args):
+        nrf = self._setup(args)
 
-    def verify(self, args):
-        from intelhex import IntelHex
-        nrf = SetupCommand(args)
+        Session(nrf=nrf).run(args.pc, args.sp)
 
-        hex_file = IntelHex(args.file)
-        for segment in hex_file.segments():
-            start_addr, end_addr = segment
-            size = end_addr - start_addr
+        self._cleanup(nrf)
 
-            data = hex_file.tobinarray(start=start_addr, size=size)
-            read_data = nrf.api.read(start_addr, size)
+    def verify(self, args):
+        nrf = self._setup(args)
 
-            assert (self.byte_lists_equal(data, read_data)), 'Verify failed. Data readback from memory does not match data written.'
+        report = Session(nrf=nrf).verify(args.file, args.crcverify, not args.noimagecache, args.skipsoftdevice)
 
-        nrf.cleanup()
+        self._cleanup(nrf)
+        for start_addr, end_addr in report.skipped:
+            self.log(args, 'Skipped verifying the MBR and SoftDevice from {} to {}, the device has the same SoftDevice.'.format(hex(start_addr), hex(end_addr)))
+        self.check_verify_report(args, report)
 
     def version(self, args):
         nrf = SetupCommand(args, do_not_initialize_api=True)
@@ -318,18 +480,57 @@ class JLink(PerformCommand):
 
     # Helper functions.
 
-    def _reset(self, nrf, args, default_sys_reset=False):
+    def _setup(self, args):
         """
-        Reset and run the device.
+        Connect to the target device, or reuse the connection this instance was created with.
 
         """
-        if args.debugreset:
-            nrf.api.debug_reset()
-        elif args.pinreset:
-            nrf.api.pin_reset()
-        elif args.systemreset or default_sys_reset:
-            nrf.api.sys_reset()
-        else:
-            return
+        if self.nrf is None:
+            return SetupCommand(args)
 
-        nrf.api.go()
+        self.nrf.args = args
+        return self.nrf
+
+    def _cleanup(self, nrf):
+        if nrf is not self.nrf:
+            nrf.cleanup()
+
+    def _program_gang(self, args):
+        """
+        Program and verify FILE on several debuggers at once, each from its own process, and print a pass/fail table.
+
+        """
+        from nrfjprog.model import gang
+
+        snrs = args.gang_snrs or Session.ids()
+        assert (snrs), 'No debuggers connected to the PC.'
+
+        if not args.noimagecache:
+            image_cache.load(args.file) # Parse FILE once here instead of in every worker process.
+
+        start_time = time.time()
+        results = gang.program(args, snrs)
+        gang.print_results(results, time.time() - start_time)
+
+        failed = [result.snr for result in results if not result.passed]
+        assert (not failed), 'Programming failed on {} of {} debuggers.'.format(len(failed), len(results))
+
+    def _erase_mode(self, args):
+        if args.erase:
+            return args.erase
+        if args.eraseall:
+            return 'all'
+        if args.sectorsanduicrerase:
+            return 'sectorsanduicr'
+        if args.sectorserase:
+            return 'sectors'
+        return None
+
+    def _reset_kind(self, args):
+        if args.debugreset:
+            return 'debug'
+        if args.pinreset:
+            return 'pin'
+        if args.systemreset:
+            return 'system'
+        return None
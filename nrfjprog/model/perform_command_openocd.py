@@ -26,73 +26,118 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import subprocess
+import os
 
 from nrfjprog import nrfjprog_version
 from nrfjprog.model import device
+from nrfjprog.model import openocd_rpc
 from nrfjprog.model.perform_command import PerformCommand
 
 
 class OpenOCD(PerformCommand):
     """
-    Note: Missing some functions and program not working all the time.
+    Runs each command in an OpenOCD server over its TCL RPC port. A server that is already listening is used and kept running, so
+    commands skip OpenOCD's startup and target examination. Otherwise one is started for the command and stopped afterwards.
 
-    Probably will need --family arugment to determine which target/nrf5x.cfg script to use - until this is shared in openOCD.
+    Note: Missing some functions.
+
+    The target config is the family of --deviceversion, nRF52 if it is not given.
     """
-    def _create_shell_command(self, command):
-        return ['sudo', 'openocd', '-f', 'interface/cmsis-dap.cfg', '-f', 'target/nrf52.cfg', '-c', 'init', '-c', command, '-c', 'exit']
+    UNSUPPORTED_PROGRAM_OPTIONS = ['dryrun', 'differential', 'incremental', 'keep', 'skipsoftdevice', 'flashloader', 'crcverify',
+                                   'verifyreport'] # OpenOCD's program command plans, verifies and resets in its own way.
+    UICR_BANK = 1 # The flash bank number of the UICR in OpenOCD's nRF5 target configs.
+    DEFAULT_DEVICE_VERSION = 'NRF52_FP1'
+
+    def __init__(self, rpc=None):
+        """
+        :param TclRpcClient rpc: A connected client to use instead of connecting to (or starting) the OpenOCD server on the default port. It is left open.
+        """
+        self.rpc = rpc
+        self._owns_rpc = rpc is None
 
     def erase(self, args):
-        command = 'nrf52 mass_erase'
-        shell_command = self._create_shell_command(command)
-        subprocess.check_call(shell_command, stdin=None, stdout=None, stderr=None, shell=False)
+        self._command(args, '{} mass_erase'.format(self._target(args)))
+        self._cleanup()
 
     def halt(self, args):
-        command = 'halt'
-        shell_command = self._create_shell_command(command)
-        subprocess.check_call(shell_command, stdin=None, stdout=None, stderr=None, shell=False)
+        self._command(args, 'halt')
+        self._cleanup()
 
     def ids(self, args):
-        command = 'targets'
-        shell_command = self._create_shell_command(command)
-        subprocess.check_call(shell_command, stdin=None, stdout=None, stderr=None, shell=False)
+        print(self._command(args, 'targets'))
+        self._cleanup()
 
     def memrd(self, args):
-        command = 'mdw ' + str(args.addr) + ' ' + str(args.length)
-        shell_command = self._create_shell_command(command)
-        subprocess.check_call(shell_command, stdin=None, stdout=None, stderr=None, shell=False)
+        data = self._rpc(args).read_memory(args.addr, args.length)
+        self.output_data(args.addr, list(data))
+        self._cleanup()
 
     def memwr(self, args):
-        """
-        Not working.
+        nRF5_device = device.NRF5xDevice(self._device_version(args))
 
-        """
-        command = 'mww ' + str(args.addr) + ' ' + str(args.val) + ' ' + str(1)
-        shell_command = self._create_shell_command(command)
-        subprocess.check_call(shell_command, stdin=None, stdout=None, stderr=None, shell=False)
+        if self.is_flash_addr(args.addr, nRF5_device):
+            self._command(args, 'flash fillw {} {} 1'.format(args.addr, args.val))
+        else:
+            self._command(args, 'mww {} {}'.format(args.addr, args.val))
+        self._cleanup()
 
     def program(self, args):
-        command = 'program ' + args.file + ' verify reset'
-        shell_command = self._create_shell_command(command)
-        subprocess.check_call(shell_command, stdin=None, stdout=None, stderr=None, shell=False)
+        self.check_options_supported(args, self.UNSUPPORTED_PROGRAM_OPTIONS, 'OpenOCD')
+
+        if args.eraseall or args.erase == 'all':
+            self._command(args, '{} mass_erase'.format(self._target(args)))
+        elif args.sectorsanduicrerase or args.erase == 'sectorsanduicr':
+            self._command(args, 'flash erase_sector {} 0 last'.format(self.UICR_BANK))
+
+        # program erases the sectors it writes, so --sectorserase and --erase sectors or auto need nothing more.
+        self._command(args, 'program {{{}}} verify reset'.format(os.path.abspath(args.file))) # The server may run in another directory.
+        self._cleanup()
 
     def readregs(self, args):
-        command = 'reg'
-        shell_command = self._create_shell_command(command)
-        subprocess.check_call(shell_command, stdin=None, stdout=None, stderr=None, shell=False)
+        print(self._command(args, 'reg'))
+        self._cleanup()
 
     def reset(self, args):
-        command = 'reset'
-        shell_command = self._create_shell_command(command)
-        subprocess.check_call(shell_command, stdin=None, stdout=None, stderr=None, shell=False)
+        self._command(args, 'reset')
+        self._cleanup()
 
     def run(self, args):
-        command = 'resume ' + str(args.pc)
-        shell_command = self._create_shell_command(command)
-        subprocess.check_call(shell_command, stdin=None, stdout=None, stderr=None, shell=False)
+        if args.pc is not None:
+            self._command(args, 'resume {}'.format(args.pc))
+        else:
+            self._command(args, 'resume')
+        self._cleanup()
 
     def version(self, args):
         print('nRFjprog version: {}'.format(nrfjprog_version.NRFJPROG_VERSION))
-        command = 'version'
-        shell_command = self._create_shell_command(command)
-        subprocess.check_call(shell_command, stdin=None, stdout=None, stderr=None, shell=False)
+        print(self._command(args, 'version'))
+        self._cleanup()
+
+    # Helpers.
+
+    def _device_version(self, args):
+        return getattr(args, 'deviceversion', None) or self.DEFAULT_DEVICE_VERSION
+
+    def _target(self, args):
+        """
+        The name of OpenOCD's target config and flash driver commands for the device, i.e. 'nrf52'.
+
+        """
+        return self._device_version(args)[:5].lower()
+
+    def _rpc(self, args):
+        if self.rpc is None:
+            self.rpc = openocd_rpc.connect(target=self._target(args))
+        return self.rpc
+
+    def _command(self, args, command):
+        return self._rpc(args).command(command)
+
+    def _cleanup(self):
+        """
+        Disconnect from the OpenOCD server if this instance connected, which stops the server if it was started for the command.
+
+        """
+        if self._owns_rpc and self.rpc is not None:
+            self.rpc.close()
+            self.rpc = None
@@ -0,0 +1,171 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Small on-disk caches of facts learned about the debuggers connected to this PC, keyed by debugger serial number.
+
+Caches are JSON files in ~/.nrfjprog (or $NRFJPROG_CACHE_DIR). They only ever save time: a missing, corrupt or unwritable cache file
+is treated as empty. Updates hold a lock file for the whole read-modify-write, so processes updating the same cache at once (i.e. gang
+programming) do not lose each other's entries.
+"""
+
+import contextlib
+import errno
+import json
+import os
+import time
+
+
+CACHE_DIR_ENV = 'NRFJPROG_CACHE_DIR'
+LOCK_TIMEOUT = 10.0 # Seconds after which a lock file is taken to be left behind by a process that died.
+LOCK_POLL_INTERVAL = 0.005
+
+
+def cache_dir():
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser('~'), '.nrfjprog')
+
+
+class ProbeCache(object):
+    """
+    A named cache with one entry per debugger serial number.
+
+    """
+    def __init__(self, name, ttl=None):
+        """
+        :param String name: File name of the cache, without extension.
+        :param int    ttl:  Seconds an entry stays valid. Entries never expire if None.
+        """
+        self.path = os.path.join(cache_dir(), name + '.json')
+        self.ttl = ttl
+
+    def get(self, snr):
+        """
+        Look up the entry for snr.
+
+        :param int snr: Serial number of the debugger.
+        :return Dict: The values stored for snr, or None if there are none or they have expired.
+        """
+        if snr is None:
+            return None
+
+        entry = self._load().get(str(snr))
+        if entry is None or (self.ttl is not None and time.time() - entry.get('time', 0) > self.ttl):
+            return None
+        return entry['values']
+
+    def put(self, snr, values):
+        if snr is None:
+            return
+
+        with self._locked():
+            entries = self._load()
+            entries[str(snr)] = {'time': time.time(), 'values': values}
+            self._store(entries)
+
+    def invalidate(self, snr):
+        with self._locked():
+            entries = self._load()
+            if entries.pop(str(snr), None) is not None:
+                self._store(entries)
+
+    # Helpers.
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """
+        Hold the cache's lock file. The update goes ahead unlocked if the lock file can not be created at all.
+
+        """
+        lock_path = self.path + '.lock'
+        lock_file = None
+        deadline = time.time() + LOCK_TIMEOUT
+        try:
+            if not os.path.isdir(os.path.dirname(self.path)):
+                os.makedirs(os.path.dirname(self.path))
+            while lock_file is None:
+                try:
+                    lock_file = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                except OSError as error:
+                    if error.errno != errno.EEXIST:
+                        raise
+                    if time.time() > deadline:
+                        _remove(lock_path) # Stale.
+                        deadline = time.time() + LOCK_TIMEOUT
+                    time.sleep(LOCK_POLL_INTERVAL)
+        except (IOError, OSError):
+            pass
+
+        try:
+            yield
+        finally:
+            if lock_file is not None:
+                os.close(lock_file)
+                _remove(lock_path)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as file:
+                entries = json.load(file)
+        except (IOError, OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _store(self, entries):
+        """
+        Write the cache to a temporary file first and rename it so concurrent nrfjprog processes never read a partial file.
+
+        """
+        tmp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        try:
+            if not os.path.isdir(os.path.dirname(self.path)):
+                os.makedirs(os.path.dirname(self.path))
+            with open(tmp_path, 'w') as file:
+                json.dump(entries, file)
+            replace_file(tmp_path, self.path)
+        except (IOError, OSError):
+            pass
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def replace_file(src, dst):
+    """
+    Rename src to dst, replacing dst if it exists.
+
+    """
+    try:
+        os.replace(src, dst)
+    except AttributeError: # Python 2.
+        if os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
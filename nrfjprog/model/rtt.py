@@ -0,0 +1,233 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Streams the output a running firmware writes to its SEGGER RTT up-buffers.
+
+The firmware keeps a control block in RAM: an ID string, the number of up (target to host) and down buffers and a descriptor per buffer
+with the buffer's address, size and write and read offsets. The host finds the block by searching RAM for the ID, then repeatedly reads the
+up-buffer descriptors in one block read, reads what lies between each read and write offset and writes the read offset back so the
+firmware can reuse the space. The address of the block is cached per debugger and forgotten whenever a new build is programmed.
+"""
+
+import struct
+import time
+
+from nrfjprog.model import buffers
+from nrfjprog.model import probe_cache
+
+
+ID = b'SEGGER RTT' + b'\x00' * 6
+HEADER = struct.Struct('<16sii') # ID, number of up-buffers, number of down-buffers.
+BUFFER = struct.Struct('<IIIIII') # Name, buffer address, size, write offset, read offset, flags.
+RD_OFF_OFFSET = 16 # Of the read offset in a buffer descriptor.
+MAX_BUFFERS = 32
+
+CACHE_NAME = 'rtt'
+POLL_INTERVAL = 0.01 # Seconds to wait between polls that found no data.
+
+
+class ControlBlock(object):
+    """
+    An RTT control block in the device's RAM.
+
+    """
+    def __init__(self, api, addr, device):
+        """
+        :param API         api:    The connected pynrfjprog API instance.
+        :param int         addr:   Address of the control block.
+        :param NRF5xDevice device: The connected device.
+        """
+        self.api = api
+        self.addr = addr
+        self.device = device
+        self.up_buffers = _parse_header(buffers.read(api, addr, HEADER.size))[0]
+
+    def poll(self, channels):
+        """
+        Read what the firmware wrote to the up-buffers of channels since the last poll, and mark it read.
+
+        :param List channels: The up-buffers to read.
+        :return Dict: The bytes read from each channel.
+        """
+        first, last = min(channels), max(channels)
+        assert (0 <= first and last < self.up_buffers), 'The firmware has {} RTT up-buffers.'.format(self.up_buffers)
+
+        descriptors_addr = self.addr + HEADER.size + first * BUFFER.size
+        descriptors = buffers.read(self.api, descriptors_addr, (last - first + 1) * BUFFER.size) # One read for every descriptor polled.
+
+        data = {}
+        for channel in channels:
+            descriptor_addr = descriptors_addr + (channel - first) * BUFFER.size
+            _, buffer_addr, size, write_offset, read_offset, _ = BUFFER.unpack_from(descriptors, descriptor_addr - descriptors_addr)
+            data[channel] = self._read_buffer(descriptor_addr, buffer_addr, size, write_offset, read_offset)
+        return data
+
+    def _read_buffer(self, descriptor_addr, buffer_addr, size, write_offset, read_offset):
+        if write_offset == read_offset or not self._is_ram_range(buffer_addr, size) or write_offset >= size or read_offset >= size:
+            return b'' # Empty, or not set up by the firmware yet.
+
+        if read_offset < write_offset:
+            data = buffers.read(self.api, buffer_addr + read_offset, write_offset - read_offset)
+        else: # The data wraps around the end of the buffer.
+            data = buffers.read(self.api, buffer_addr + read_offset, size - read_offset)
+            if write_offset:
+                data += buffers.read(self.api, buffer_addr, write_offset)
+
+        self.api.write_u32(descriptor_addr + RD_OFF_OFFSET, write_offset, False)
+        return bytes(data)
+
+    def _is_ram_range(self, addr, size):
+        return self.device.ram_start <= addr and addr + size <= self.device.ram_end
+
+
+class LineWriter(object):
+    """
+    Writes the output of several channels to one file a line at a time, each line prefixed with its channel. The output of a single
+    channel is written as it arrives.
+
+    """
+    def __init__(self, file, channels):
+        self.file = file
+        self.prefixed = len(channels) > 1
+        self._partial_lines = dict((channel, b'') for channel in channels)
+
+    def write(self, channel, data):
+        if not self.prefixed:
+            self.file.write(data)
+            return
+
+        lines = (self._partial_lines[channel] + data).split(b'\n')
+        self._partial_lines[channel] = lines.pop()
+        for line in lines:
+            self.file.write(self._prefix(channel) + line + b'\n')
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        """
+        Write the lines that did not end yet.
+
+        """
+        for channel in sorted(self._partial_lines):
+            if self._partial_lines[channel]:
+                self.file.write(self._prefix(channel) + self._partial_lines[channel] + b'\n')
+                self._partial_lines[channel] = b''
+        self.flush()
+
+    def _prefix(self, channel):
+        return '[{}] '.format(channel).encode('ascii')
+
+
+def find(api, device, snr=None):
+    """
+    Find the control block: at the address cached for snr if the block is still there, otherwise by searching RAM.
+
+    :param API         api:    The connected pynrfjprog API instance.
+    :param NRF5xDevice device: The connected device.
+    :param int         snr:    Serial number of the debugger.
+    :return int: The address of the control block.
+    """
+    cache = probe_cache.ProbeCache(CACHE_NAME)
+    cached = cache.get(snr)
+    if cached and device.ram_start <= cached['addr'] <= device.ram_end - HEADER.size and _is_control_block(buffers.read(api, cached['addr'], HEADER.size)):
+        return cached['addr']
+
+    addr = search(api, device.ram_start, device.ram_size)
+    assert (addr is not None), 'No SEGGER RTT control block in RAM. Is the firmware running and built with RTT?'
+    cache.put(snr, {'addr': addr})
+    return addr
+
+
+def search(api, start_addr, size, chunk_size=buffers.CHUNK_SIZE):
+    """
+    Search memory from start_addr for a control block, a chunk at a time. Chunks overlap so a block across two chunks is found.
+
+    :return int: The address of the first control block, or None.
+    """
+    addr = start_addr
+    while addr < start_addr + size - HEADER.size + 1:
+        data = bytes(buffers.read(api, addr, min(chunk_size, start_addr + size - addr)))
+
+        index = data.find(ID)
+        while index != -1 and index + HEADER.size <= len(data):
+            if _is_control_block(data[index : index + HEADER.size]):
+                return addr + index
+            index = data.find(ID, index + 1)
+
+        addr += max(len(data) - HEADER.size + 1, 1)
+    return None
+
+
+def forget(snr):
+    """
+    Forget where the control block of the firmware on snr's device is, i.e. because another build was programmed.
+
+    """
+    probe_cache.ProbeCache(CACHE_NAME).invalidate(snr)
+
+
+def stream(control_block, writer, channels, duration=None):
+    """
+    Poll channels and write their output to writer until duration seconds have passed, or forever if duration is None. Polls follow each
+    other without a pause while there is output, so a busy firmware is read as fast as the debugger allows.
+
+    :param ControlBlock control_block: The firmware's control block.
+    :param LineWriter   writer:        Where the output goes.
+    :param List         channels:      The up-buffers to stream.
+    :param float        duration:      Seconds to stream for.
+    """
+    end_time = None if duration is None else time.time() + duration
+    while end_time is None or time.time() < end_time:
+        data = control_block.poll(channels)
+        for channel in channels:
+            if data[channel]:
+                writer.write(channel, data[channel])
+
+        if any(data.values()):
+            writer.flush()
+        else:
+            time.sleep(POLL_INTERVAL)
+
+
+# Helpers.
+
+def _parse_header(data):
+    """
+    :return Tuple: (number of up-buffers, number of down-buffers).
+    """
+    _, up_buffers, down_buffers = HEADER.unpack_from(bytes(data))
+    return up_buffers, down_buffers
+
+
+def _is_control_block(header):
+    if bytes(header[: len(ID)]) != ID:
+        return False
+    up_buffers, down_buffers = _parse_header(header)
+    return 0 < up_buffers <= MAX_BUFFERS and 0 <= down_buffers <= MAX_BUFFERS
@@ -0,0 +1,304 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A long-lived session server that keeps the pynrfjprog API connected to each debugger between commands.
+
+The server listens on a local Unix socket. When it is running the CLI forwards its JLink commands to it instead of opening, connecting
+to and detecting the family of the target device itself. Each request and response is one line of JSON:
+
+    request:  {"argv": ["program", "-f", "app.hex", "-s", "682123456"], "cwd": "/home/user/app"} or {"stop": true}
+    response: {"output": "...", "error": null}
+
+Commands run in the client's working directory, so relative paths in their arguments mean the same as they would without the server.
+"""
+
+import getpass
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+import traceback
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from nrfjprog.model import timings
+
+
+SOCKET_PATH_ENV = 'NRFJPROG_SESSION_SOCKET'
+DEFAULT_IDLE_TIMEOUT = 300
+
+# Commands that open their own API instance instead of using a connected session.
+UNSESSIONED_COMMANDS = ['ids', 'recover', 'version']
+
+
+def default_socket_path():
+    """
+    The socket path clients and server agree on: $NRFJPROG_SESSION_SOCKET, or a per-user file in the temporary directory.
+
+    """
+    if os.environ.get(SOCKET_PATH_ENV):
+        return os.environ[SOCKET_PATH_ENV]
+    return os.path.join(tempfile.gettempdir(), 'nrfjprog-session-{}.sock'.format(getpass.getuser()))
+
+
+def is_supported():
+    return hasattr(socket, 'AF_UNIX')
+
+
+class Session(object):
+    """
+    A connected SetupCommand and when it was last used.
+
+    """
+    def __init__(self, nrf):
+        self.nrf = nrf
+        self.last_used = time.time()
+
+
+class SessionServer(object):
+    """
+    Serves CLI commands over a Unix socket, keeping one connected session per debugger serial number.
+
+    """
+    def __init__(self, socket_path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        """
+        :param String socket_path:  Path of the Unix socket to listen on.
+        :param int    idle_timeout: Seconds a session may go unused before it is disconnected.
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.idle_timeout = idle_timeout
+        self.sessions = {}
+        self.running = False
+        self.sock = None
+
+    def start(self):
+        """
+        Bind the socket. A stale socket file left by a server that is no longer running is replaced.
+
+        """
+        if os.path.exists(self.socket_path):
+            assert (not server_running(self.socket_path)), 'A session server is already listening on {}.'.format(self.socket_path)
+            os.remove(self.socket_path)
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.socket_path)
+        self.sock.listen(5)
+        self.sock.settimeout(1.0)
+        self.running = True
+
+    def serve_forever(self):
+        if self.sock is None:
+            self.start()
+
+        try:
+            while self.running:
+                try:
+                    connection, _ = self.sock.accept()
+                except socket.timeout:
+                    connection = None
+
+                if connection:
+                    self._handle_connection(connection)
+
+                self.evict_idle_sessions()
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Disconnect every session and remove the socket.
+
+        """
+        self.running = False
+        for key in list(self.sessions):
+            self._evict(key)
+
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def evict_idle_sessions(self):
+        now = time.time()
+        for key in list(self.sessions):
+            if now - self.sessions[key].last_used > self.idle_timeout:
+                self._evict(key)
+
+    def execute(self, argv, cwd=None):
+        """
+        Run one CLI command, capturing everything it prints.
+
+        :param List   argv: The command-line arguments, without the program name.
+        :param String cwd:  The client's working directory, to run the command in. The server's if None.
+        :return Tuple: The printed output and an error message (None on success).
+        """
+        from nrfjprog.__main__ import Nrfjprog
+        from nrfjprog.model.perform_command_jlink import JLink
+
+        output = StringIO()
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = output, output
+        key = None
+        args = None
+        server_cwd = os.getcwd()
+
+        try:
+            if cwd is not None:
+                os.chdir(cwd) # The server runs one command at a time, so changing the process's directory is safe.
+            cli = Nrfjprog()
+            args = cli.parse_args(argv)
+            timings.enable_from_args(args)
+
+            if args.command in UNSESSIONED_COMMANDS:
+                if args.command == 'recover':
+                    self._evict(self._session_key(args))
+                perform_command = JLink()
+            else:
+                key = self._session_key(args)
+                perform_command = JLink(self._session(key, args))
+
+            perform_command.log(args, cli.help_messages[args.command])
+            getattr(perform_command, args.command)(args)
+            error = None
+        except SystemExit as exit:
+            error = None if not exit.code else 'Invalid arguments.'
+        except Exception as exception:
+            error = str(exception) or traceback.format_exc()
+            if key in self.sessions:
+                self._evict(key) # The connection may be left in an unknown state.
+        finally:
+            timings.report(args.command if args is not None else None)
+            os.chdir(server_cwd)
+            sys.stdout, sys.stderr = stdout, stderr
+
+        return output.getvalue(), error
+
+    # Helpers.
+
+    def _handle_connection(self, connection):
+        try:
+            line = _receive_line(connection)
+            if not line:
+                return # A client checking if the server is running.
+
+            request = json.loads(line)
+            if request.get('stop'):
+                self.running = False
+                response = {'output': '', 'error': None}
+            else:
+                output, error = self.execute(request['argv'], request.get('cwd'))
+                response = {'output': output, 'error': error}
+
+            connection.sendall((json.dumps(response) + '\n').encode('utf-8'))
+        finally:
+            connection.close()
+
+    def _session_key(self, args):
+        return (args.snr, args.clockspeed, args.deviceversion)
+
+    def _session(self, key, args):
+        from nrfjprog.model.perform_command_jlink import SetupCommand
+
+        if key not in self.sessions:
+            self.sessions[key] = Session(SetupCommand(args))
+
+        session = self.sessions[key]
+        session.last_used = time.time()
+        return session.nrf
+
+    def _evict(self, key):
+        session = self.sessions.pop(key, None)
+        if session:
+            try:
+                session.nrf.cleanup()
+            except Exception:
+                pass # The debugger may already be gone.
+
+
+def server_running(socket_path=None):
+    """
+    Check if a session server accepts connections on socket_path.
+
+    """
+    socket_path = socket_path or default_socket_path()
+    if not is_supported() or not os.path.exists(socket_path):
+        return False
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except socket.error:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+def send_command(argv, socket_path=None, cwd=None):
+    """
+    Run a command on the session server.
+
+    :param List   argv: The command-line arguments, without the program name.
+    :param String cwd:  The directory relative paths in argv are relative to. The current working directory if None.
+    :return Tuple: The printed output and an error message (None on success).
+    """
+    response = _request({'argv': argv, 'cwd': cwd or os.getcwd()}, socket_path)
+    return response['output'], response['error']
+
+
+def stop_server(socket_path=None):
+    _request({'stop': True}, socket_path)
+
+
+def _request(request, socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        return json.loads(_receive_line(sock))
+    finally:
+        sock.close()
+
+
+def _receive_line(sock):
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b'\n'):
+            break
+    return b''.join(chunks).decode('utf-8')
@@ -0,0 +1,92 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Recognizes the SoftDevice in an image by its info structure, so programming can leave out a SoftDevice the device already has.
+
+The SoftDevice starts at 0x1000, after the Master Boot Record, and has its info structure 0x2000 into it. The structure holds its own size,
+a magic number, the address the SoftDevice ends at and the firmware ID (FWID) of the SoftDevice version.
+"""
+
+import struct
+
+
+INFO_STRUCT_ADDR = 0x3000
+MAGIC = 0x51B1E5DB
+INFO = struct.Struct('<B3xIIH') # Size of the structure, magic number, end address of the SoftDevice, firmware ID.
+
+
+class SoftDeviceInfo(object):
+    """
+    The info structure of a SoftDevice.
+
+    """
+    def __init__(self, data):
+        """
+        :param bytes data: The whole info structure.
+        """
+        self.data = bytes(data)
+        self.size, self.magic, self.end_addr, self.fwid = INFO.unpack_from(self.data)
+
+    def region(self):
+        """
+        :return Tuple: (start address, end address) of the Master Boot Record and the SoftDevice.
+        """
+        return 0, self.end_addr
+
+
+def image_info(image):
+    """
+    Find the SoftDevice in image.
+
+    :param FlashImage image: The image.
+    :return SoftDeviceInfo: The info structure of the SoftDevice in image, or None if image has none.
+    """
+    header = _image_bytes(image, INFO_STRUCT_ADDR, INFO.size)
+    if header is None:
+        return None
+
+    size, magic, end_addr, fwid = INFO.unpack(header)
+    if magic != MAGIC or size < INFO.size or end_addr <= INFO_STRUCT_ADDR:
+        return None
+
+    data = _image_bytes(image, INFO_STRUCT_ADDR, size)
+    return SoftDeviceInfo(data) if data is not None else None
+
+
+# Helpers.
+
+def _image_bytes(image, addr, size):
+    """
+    The size bytes at addr, or None if image does not hold all of them.
+
+    """
+    for start_addr, end_addr in image.segments():
+        if start_addr <= addr and addr + size <= end_addr:
+            return bytes(image.tobinarray(start=addr, size=size))
+    return None
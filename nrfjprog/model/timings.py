@@ -0,0 +1,229 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Records how long each phase of a command takes (connecting, detecting the device, loading the image, erasing, writing, reading back),
+with the bytes moved and the number of calls in each phase.
+
+Recording is off unless --timings, --timingsfile or $NRFJPROG_TIMINGS ($NRFJPROG_TIMINGS_FILE) is given. While it is off, phase()
+returns one shared no-op context manager and instrument() returns the object it is given, so the hot paths pay one function call.
+"""
+
+import json
+import os
+import time
+
+
+TIMINGS_ENV = 'NRFJPROG_TIMINGS'
+TIMINGS_FILE_ENV = 'NRFJPROG_TIMINGS_FILE'
+
+_recorder = None
+
+
+class Phase(object):
+    """
+    The totals of one phase.
+
+    """
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.bytes = 0
+        self.calls = 0
+
+    def to_dict(self):
+        return {'phase': self.name, 'seconds': self.seconds, 'bytes': self.bytes, 'calls': self.calls}
+
+
+class Recorder(object):
+    """
+    The phases of one command, in the order they were first entered.
+
+    """
+    def __init__(self, print_summary=True, json_path=None):
+        """
+        :param Boolean print_summary: If report() prints a table of the phases.
+        :param String  json_path:     A file report() appends a line of JSON to. None to not write one.
+        """
+        self.print_summary = print_summary
+        self.json_path = json_path
+        self.start_time = time.time()
+        self.phases = []
+        self._phases_by_name = {}
+
+    def phase(self, name):
+        if name not in self._phases_by_name:
+            self._phases_by_name[name] = Phase(name)
+            self.phases.append(self._phases_by_name[name])
+        return _TimedPhase(self._phases_by_name[name])
+
+    def summary(self):
+        """
+        :return List: Lines of a table of the phases.
+        """
+        lines = ['{:<16} {:>9} {:>11} {:>7}'.format('PHASE', 'SECONDS', 'BYTES', 'CALLS')]
+        for phase in self.phases:
+            lines.append('{:<16} {:>9.3f} {:>11} {:>7}'.format(phase.name, phase.seconds, phase.bytes, phase.calls))
+        lines.append('{:<16} {:>9.3f}'.format('total', time.time() - self.start_time))
+        return lines
+
+    def to_dict(self, command):
+        return {'time': self.start_time, 'command': command, 'total_seconds': time.time() - self.start_time, 'pid': os.getpid(),
+                'phases': [phase.to_dict() for phase in self.phases]}
+
+
+def enable(print_summary=True, json_path=None):
+    global _recorder
+    _recorder = Recorder(print_summary, json_path)
+    return _recorder
+
+
+def disable():
+    global _recorder
+    _recorder = None
+
+
+def enable_from_args(args):
+    """
+    Start recording if the command-line arguments or the environment ask for it.
+
+    :param Object args: Arguments the command was called with.
+    :return Boolean: If recording was enabled.
+    """
+    json_path = getattr(args, 'timingsfile', None) or os.environ.get(TIMINGS_FILE_ENV)
+    print_summary = bool(getattr(args, 'timings', False) or os.environ.get(TIMINGS_ENV))
+    if not (print_summary or json_path):
+        return False
+
+    enable(print_summary, json_path)
+    return True
+
+
+def recorder():
+    return _recorder
+
+
+def phase(name):
+    """
+    Time a block of code as part of phase name:  with timings.phase('erase') as phase: ...; phase.bytes += ...
+
+    """
+    if _recorder is None:
+        return _NULL_PHASE
+    return _recorder.phase(name)
+
+
+def instrument(obj, phases):
+    """
+    Time the calls to some of obj's methods while recording is enabled. Recording is checked on each call, so an object kept across
+    commands (i.e. by the session server) is timed for the commands that ask for it.
+
+    :param Object obj:    i.e. a pynrfjprog API instance.
+    :param Dict   phases: The phase of each method to time, by method name. Bytes are counted from the data returned by methods in the
+                          'read' phase and from the data (second argument) passed to methods in the 'write' phase.
+    :return Object: A proxy of obj.
+    """
+    return _InstrumentedObject(obj, phases)
+
+
+def report(command):
+    """
+    Print the summary and append the JSON line for command, then stop recording.
+
+    """
+    global _recorder
+    if _recorder is None:
+        return
+
+    recorder, _recorder = _recorder, None
+    if recorder.print_summary:
+        print('\n'.join(recorder.summary()))
+    if recorder.json_path:
+        try:
+            with open(recorder.json_path, 'a') as file:
+                file.write(json.dumps(recorder.to_dict(command)) + '\n')
+        except (IOError, OSError) as error:
+            print('Could not write timings: {}.'.format(error))
+
+
+# Helpers.
+
+class _TimedPhase(object):
+
+    def __init__(self, phase):
+        self.phase = phase
+        self.bytes = 0
+
+    def __enter__(self):
+        self.start_time = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.phase.seconds += time.time() - self.start_time
+        self.phase.bytes += self.bytes
+        self.phase.calls += 1
+        return False
+
+
+class _NullPhase(object):
+    bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def __setattr__(self, name, value):
+        pass # phase.bytes += n is a no-op while recording is disabled.
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _InstrumentedObject(object):
+
+    def __init__(self, obj, phases):
+        self._obj = obj
+        self._phases = phases
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        phase_name = self._phases.get(name)
+        if phase_name is None or _recorder is None:
+            return attr
+
+        def timed(*args, **kwargs):
+            with phase(phase_name) as timed_phase:
+                result = attr(*args, **kwargs)
+                if phase_name == 'read' and hasattr(result, '__len__'):
+                    timed_phase.bytes += len(result)
+                elif phase_name == 'write' and len(args) > 1 and hasattr(args[1], '__len__'):
+                    timed_phase.bytes += len(args[1])
+            return result
+        return timed
@@ -0,0 +1,191 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Compares data written to a device with the data read back from it.
+
+Whole buffers are compared at once, only the blocks that differ are searched for the exact mismatching bytes. NumPy is used for that
+search if it is installed.
+"""
+
+import json
+
+from nrfjprog.model import timings
+
+
+BLOCK_SIZE = 256
+
+
+def find_mismatches(data, read_data):
+    """
+    Find the byte ranges where data and read_data differ.
+
+    :param data:      The expected data. Any sequence of byte values or object supporting the buffer protocol.
+    :param read_data: The data read back from the device.
+    :return List: (start_offset, end_offset) of each run of differing bytes, in ascending order.
+    """
+    data = _byte_view(data)
+    read_data = _byte_view(read_data)
+
+    if data == read_data:
+        return []
+
+    size = min(len(data), len(read_data))
+    try:
+        ranges = _find_mismatches_numpy(data[:size], read_data[:size])
+    except ImportError:
+        ranges = _find_mismatches_blocks(data[:size], read_data[:size])
+
+    if len(data) != len(read_data):
+        _append_range(ranges, size, max(len(data), len(read_data)))
+    return ranges
+
+
+class VerifyReport(object):
+    """
+    The result of verifying one or more regions of memory, with the mismatching address ranges and the status of each flash page.
+
+    """
+    def __init__(self, page_size):
+        self.page_size = page_size
+        self.regions = []
+        self.mismatches = []
+        self.skipped = [] # (start, end) of the regions left out, i.e. a SoftDevice the device already has.
+
+    def add(self, addr, data, read_data):
+        """
+        Compare the data expected at addr with the data read back from the device.
+
+        """
+        with timings.phase('compare') as phase:
+            self.regions.append((addr, addr + len(data)))
+            self.mismatches.extend((addr + start, addr + end) for start, end in find_mismatches(data, read_data))
+            phase.bytes += len(data)
+
+    def add_verified(self, addr, size):
+        """
+        Record that size bytes at addr were verified by other means (i.e. by CRC) and matched.
+
+        """
+        self.regions.append((addr, addr + size))
+
+    @property
+    def passed(self):
+        return not self.mismatches
+
+    def mismatched_bytes(self):
+        return sum(end - start for start, end in self.mismatches)
+
+    def pages(self):
+        """
+        :return List: (page_addr, passed) for every page the verified regions touch, ordered by address.
+        """
+        failed_pages = set()
+        for start, end in self.mismatches:
+            failed_pages.update(range(start - start % self.page_size, end, self.page_size))
+
+        page_addrs = set()
+        for start, end in self.regions:
+            page_addrs.update(range(start - start % self.page_size, end, self.page_size))
+
+        return [(page_addr, page_addr not in failed_pages) for page_addr in sorted(page_addrs)]
+
+    def summary(self):
+        if self.passed:
+            return 'Verified {} bytes.'.format(sum(end - start for start, end in self.regions))
+
+        return '{} bytes differ in {} ranges and {} pages, the first at {}.'.format(self.mismatched_bytes(), len(self.mismatches),
+                                                                              sum(1 for page in self.pages() if not page[1]), hex(self.mismatches[0][0]))
+
+    def to_dict(self):
+        return {'passed': self.passed,
+                'mismatches': [{'start': start, 'end': end} for start, end in self.mismatches],
+                'skipped': [{'start': start, 'end': end} for start, end in self.skipped],
+                'pages': [{'addr': page_addr, 'passed': passed} for page_addr, passed in self.pages()]}
+
+    def write_json(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+
+# Helpers.
+
+def _byte_view(data):
+    """
+    data as an unsigned byte memoryview, or as bytes if it can not be viewed without a copy.
+
+    """
+    if isinstance(data, bytes):
+        return data
+    try:
+        view = memoryview(data) # i.e. a bytearray, an mmap'ed image or array.array('B') from IntelHex.tobinarray().
+    except TypeError:
+        return bytes(bytearray(data)) # A list of ints, as returned by pynrfjprog.
+    try:
+        return view.cast('B')
+    except AttributeError: # Python 2.
+        return view.tobytes()
+
+
+def _find_mismatches_numpy(data, read_data):
+    import numpy
+
+    differs = numpy.frombuffer(data, dtype=numpy.uint8) != numpy.frombuffer(read_data, dtype=numpy.uint8)
+    edges = numpy.flatnonzero(numpy.diff(numpy.concatenate(([0], differs.astype(numpy.int8), [0]))))
+    return [(int(start), int(end)) for start, end in zip(edges[::2], edges[1::2])]
+
+
+def _find_mismatches_blocks(data, read_data):
+    """
+    Compare BLOCK_SIZE blocks at a time and only search the blocks that differ byte by byte.
+
+    """
+    data = bytearray(data)
+    read_data = bytearray(read_data)
+
+    ranges = []
+    for block_start in range(0, len(data), BLOCK_SIZE):
+        block_end = min(block_start + BLOCK_SIZE, len(data))
+        if data[block_start : block_end] == read_data[block_start : block_end]:
+            continue
+
+        for i in range(block_start, block_end):
+            if data[i] != read_data[i]:
+                _append_range(ranges, i, i + 1)
+    return ranges
+
+
+def _append_range(ranges, start, end):
+    """
+    Append a range to the sorted ranges, joining it with the last range if they touch.
+
+    """
+    if ranges and ranges[-1][1] == start:
+        ranges[-1] = (ranges[-1][0], end)
+    else:
+        ranges.append((start, end))
@@ -0,0 +1,271 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Plans how to program an image: which pages to erase and which contiguous blocks to write.
+
+Every segment is mapped onto the device's flash pages first, so each page is erased at most once and always before any data is written
+to it. Adjacent writes are joined into one block. Regions the user wants to keep are read back before they are erased and written again.
+"""
+
+from nrfjprog.model import probe_cache
+
+
+ERASE_TIMINGS_CACHE_NAME = 'erasetimings'
+
+
+class CostModel(object):
+    """
+    Estimated seconds the NVMC and the debugger need per operation. The defaults are the maximum NVMC timings from the product
+    specifications and a typical SWD throughput, the erase timings are replaced by the ones last measured on the debugger's device.
+
+    """
+    ERASE_PAGE_SECONDS = {'NRF51': 0.0223, 'NRF52': 0.0897}
+    ERASE_ALL_SECONDS = {'NRF51': 0.0446, 'NRF52': 0.169}
+    WRITE_WORD_SECONDS = {'NRF51': 0.0000463, 'NRF52': 0.0000675}
+    TRANSFER_BYTE_SECONDS = 0.000005
+
+    def __init__(self, device, snr=None):
+        """
+        :param NRF5xDevice device: The device.
+        :param int         snr:    Serial number of the debugger, to use the erase timings measured on its device.
+        """
+        self.erase_page_seconds = self.ERASE_PAGE_SECONDS[device.family]
+        self.erase_all_seconds = self.ERASE_ALL_SECONDS[device.family]
+        self.write_byte_seconds = self.WRITE_WORD_SECONDS[device.family] / 4 + self.TRANSFER_BYTE_SECONDS
+        self.read_byte_seconds = self.TRANSFER_BYTE_SECONDS
+
+        measured = probe_cache.ProbeCache(ERASE_TIMINGS_CACHE_NAME).get(snr)
+        if measured and measured.get('family') == device.family:
+            self.erase_page_seconds = measured.get('erase_page_seconds', self.erase_page_seconds)
+            self.erase_all_seconds = measured.get('erase_all_seconds', self.erase_all_seconds)
+
+    def blank_check_pays_off(self, page_size):
+        """
+        :return Boolean: If reading a page to find out it is blank is quicker than erasing it.
+        """
+        return page_size * self.read_byte_seconds < self.erase_page_seconds
+
+
+class WritePlan(object):
+    """
+    An ordered plan: erase everything that needs erasing, then write every block.
+
+    """
+    def __init__(self, device):
+        """
+        :param NRF5xDevice device: The device the plan is for.
+        """
+        self.device = device
+        self.erase_all = False
+        self.erase_uicr = False
+        self._erase_pages = set()
+        self._writes = []
+        self._keep = []
+
+    @classmethod
+    def for_image(cls, image, device, erase_all=False, erase_sectors=False, erase_uicr=False, keep=()):
+        """
+        Plan programming every segment of image.
+
+        :param FlashImage  image:         The image to program.
+        :param NRF5xDevice device:        The target device.
+        :param Boolean     erase_all:     Erase all of FLASH and UICR first.
+        :param Boolean     erase_sectors: Erase the pages image touches first.
+        :param Boolean     erase_uicr:    Erase the UICR first, even if image does not touch it.
+        :param List        keep:          (start address, end address) of each region whose contents must survive the erases.
+        """
+        plan = cls(device)
+        plan.erase_all = erase_all
+        plan.erase_uicr = erase_uicr
+
+        for start_addr, end_addr in image.segments():
+            if erase_sectors:
+                plan.add_erase(start_addr, end_addr)
+            plan.add_write(start_addr, image.tobinarray(start=start_addr, size=end_addr - start_addr))
+        for start_addr, end_addr in keep:
+            plan.add_keep(start_addr, end_addr)
+        return plan
+
+    @classmethod
+    def cheaper_for_image(cls, image, device, keep=(), cost_model=None):
+        """
+        Plan programming image after one mass erase and after erasing only the pages image touches, and return the plan estimated
+        to take less time. Reading back and rewriting the kept regions counts towards each plan's cost.
+
+        """
+        plans = [cls.for_image(image, device, erase_sectors=True, keep=keep), cls.for_image(image, device, erase_all=True, keep=keep)]
+        return min(plans, key=lambda plan: sum(plan.estimate_seconds(cost_model))) # The page erase plan wins a tie, it erases less.
+
+    def add_erase(self, start_addr, end_addr):
+        """
+        Erase every page from start_addr up to end_addr. Erasing any part of the UICR erases all of it.
+
+        """
+        page_size = self.device.page_size
+        for page_addr in range(start_addr - start_addr % page_size, end_addr, page_size):
+            if self.device.uicr_start <= page_addr < self.device.uicr_end:
+                self.erase_uicr = True
+            else:
+                self._erase_pages.add(page_addr)
+
+    def add_write(self, addr, data):
+        self._writes.append((addr, data))
+
+    def add_keep(self, start_addr, end_addr):
+        """
+        Keep the contents from start_addr up to end_addr: whatever part of it the plan erases is read before erasing and written again.
+
+        """
+        for addr, data in self._writes:
+            assert (addr + len(data) <= start_addr or end_addr <= addr), 'The image writes to the kept region {}-{}.'.format(hex(start_addr), hex(end_addr))
+        self._keep.append((start_addr, end_addr))
+
+    def erased_ranges(self):
+        """
+        :return List: (start address, end address) of each range the plan erases.
+        """
+        if self.erase_all:
+            return [(self.device.flash_start, self.device.flash_end), (self.device.uicr_start, self.device.uicr_end)]
+
+        ranges = self._page_runs()
+        if self.erase_uicr:
+            ranges.append((self.device.uicr_start, self.device.uicr_end))
+        return ranges
+
+    def kept_ranges(self):
+        """
+        :return List: (start address, end address) of the parts of the kept regions the plan erases, that must be read back first.
+        """
+        ranges = []
+        for keep_start, keep_end in sorted(self._keep):
+            for erase_start, erase_end in self.erased_ranges():
+                if max(keep_start, erase_start) < min(keep_end, erase_end):
+                    ranges.append((max(keep_start, erase_start), min(keep_end, erase_end)))
+        return ranges
+
+    def skip_erase(self, page_addr):
+        """
+        Do not erase the page at page_addr after all, i.e. because it is already blank.
+
+        """
+        self._erase_pages.discard(page_addr)
+
+    def erase_pages(self):
+        """
+        :return List: Start address of each page to erase, ordered by address.
+        """
+        return sorted(self._erase_pages)
+
+    def writes(self):
+        """
+        :return List: (address, data) of each block to write, ordered by address. Writes that touch or overlap are joined, later writes win.
+        """
+        blocks = []
+        for addr, data in sorted(self._writes, key=lambda write: write[0]):
+            if blocks and addr <= blocks[-1][0] + len(blocks[-1][1]):
+                block_addr, block_data = blocks[-1]
+                if not isinstance(block_data, bytearray):
+                    block_data = bytearray(block_data)
+                block_data[addr - block_addr : addr - block_addr + len(data)] = data
+                blocks[-1] = (block_addr, block_data)
+            else:
+                blocks.append((addr, data))
+        return blocks
+
+    def write_size(self):
+        return sum(len(data) for _, data in self.writes())
+
+    def estimate_seconds(self, cost_model=None):
+        """
+        :param CostModel cost_model: The timings to use. The defaults for the device's family if None.
+        :return Tuple: Estimated seconds spent erasing and writing.
+        """
+        cost_model = cost_model or CostModel(self.device)
+
+        erase_seconds = len(self._erase_pages) * cost_model.erase_page_seconds
+        if self.erase_all:
+            erase_seconds += cost_model.erase_all_seconds
+        if self.erase_uicr:
+            erase_seconds += cost_model.erase_page_seconds
+
+        kept_size = sum(end_addr - start_addr for start_addr, end_addr in self.kept_ranges())
+        return erase_seconds, self.write_size() * cost_model.write_byte_seconds + kept_size * (cost_model.read_byte_seconds + cost_model.write_byte_seconds)
+
+    def describe(self, cost_model=None):
+        """
+        :return List: Lines describing the plan and its estimated cost.
+        """
+        lines = []
+        if self.erase_all:
+            lines.append('Erase all FLASH and UICR.')
+        if self.erase_uicr:
+            lines.append('Erase UICR.')
+        for start_addr, end_addr in self._page_runs():
+            lines.append('Erase {} pages from {} to {}.'.format((end_addr - start_addr) // self.device.page_size, hex(start_addr), hex(end_addr)))
+        for start_addr, end_addr in self.kept_ranges():
+            lines.append('Keep {} bytes from {} to {}: read them before erasing and write them back.'.format(end_addr - start_addr, hex(start_addr), hex(end_addr)))
+        for addr, data in self.writes():
+            lines.append('Write {} bytes from {} to {}.'.format(len(data), hex(addr), hex(addr + len(data))))
+
+        erase_seconds, write_seconds = self.estimate_seconds(cost_model)
+        lines.append('Estimated time: {:.2f} s erasing and {:.2f} s writing.'.format(erase_seconds, write_seconds))
+        return lines
+
+    def _page_runs(self):
+        return page_runs(self.erase_pages(), self.device.page_size)
+
+
+def record_erase_timings(snr, device, erase_page_seconds=None, erase_all_seconds=None):
+    """
+    Remember the erase timings measured on the device of the debugger snr, for CostModel.
+
+    """
+    cache = probe_cache.ProbeCache(ERASE_TIMINGS_CACHE_NAME)
+    timings = cache.get(snr) or {}
+    if timings.get('family') != device.family:
+        timings = {'family': device.family}
+
+    if erase_page_seconds is not None:
+        timings['erase_page_seconds'] = erase_page_seconds
+    if erase_all_seconds is not None:
+        timings['erase_all_seconds'] = erase_all_seconds
+    cache.put(snr, timings)
+
+
+def page_runs(page_addrs, page_size):
+    """
+    :return List: (start address, end address) of each run of adjacent pages in the sorted page_addrs.
+    """
+    runs = []
+    for page_addr in page_addrs:
+        if runs and runs[-1][1] == page_addr:
+            runs[-1] = (runs[-1][0], page_addr + page_size)
+        else:
+            runs.append((page_addr, page_addr + page_size))
+    return runs
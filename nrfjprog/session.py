@@ -0,0 +1,517 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+A connection to one JLink debugger and its target device, for Python programs that use nrfjprog as a library.
+
+The connection is kept for the lifetime of the Session and every method returns its result instead of printing it. The CLI's JLink
+commands are implemented on top of this class.
+
+    with nrfjprog.Session(snr=682123456) as session:
+        session.program('app.hex', erase='sectors', verify=True, reset='system')
+        device_id = session.memrd(0x10000060, 8)
+"""
+
+import argparse
+import collections
+import time
+
+from nrfjprog.model import buffers
+from nrfjprog.model import crc_verify
+from nrfjprog.model import flash_loader
+from nrfjprog.model import flash_manifest
+from nrfjprog.model import flash_pages
+from nrfjprog.model import image_cache
+from nrfjprog.model import rtt as rtt_model
+from nrfjprog.model import softdevice
+from nrfjprog.model import verify as verify_model
+from nrfjprog.model import write_plan
+
+
+ERASE_MODES = ['all', 'sectors', 'sectorsanduicr', 'auto']
+RESET_KINDS = ['system', 'debug', 'pin']
+
+
+class ProgramResult(object):
+    """
+    What Session.program() did.
+
+    """
+    def __init__(self, plan, report=None, pages=None, changed_pages=None):
+        """
+        :param WritePlan    plan:          The erases and writes done (or that would have been done, for a dry run).
+        :param VerifyReport report:        The result of verifying the written data, None if it was not verified.
+        :param int          pages:         Flash pages the image touches, for differential or incremental programming. Otherwise None.
+        :param int          changed_pages: Of those pages, the ones that differed from the device and were programmed.
+        """
+        self.plan = plan
+        self.report = report
+        self.pages = pages
+        self.changed_pages = changed_pages
+        self.used_manifest = False # If the pages were compared with the manifest of the last program instead of read back.
+        self.skipped_softdevice = None # The SoftDeviceInfo of the SoftDevice left out because the device already had it.
+        self.skipped_erases = 0 # Pages the plan erased that were left alone because they were already blank.
+
+
+class Session(object):
+    """
+    A connected JLink debugger. Use it as a context manager, or call close() when done.
+
+    """
+    def __init__(self, snr=None, clockspeed=None, deviceversion=None, nrf=None):
+        """
+        :param int          snr:           Serial number of the debugger. The only connected debugger is used if None.
+        :param              clockspeed:    SWD clock speed in kHz or 'auto', see --clockspeed.
+        :param String       deviceversion: The version of the target device (i.e. 'NRF52_FP1'), to skip detecting it.
+        :param SetupCommand nrf:           An already connected SetupCommand to use instead of connecting. close() leaves it connected.
+        """
+        self._owns_connection = nrf is None
+        if nrf is None:
+            from nrfjprog.model.perform_command_jlink import SetupCommand # pynrfjprog is only imported once a Session is made.
+            nrf = SetupCommand(argparse.Namespace(snr=snr, clockspeed=clockspeed, deviceversion=deviceversion, quiet=True))
+        self.nrf = nrf
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._owns_connection and self.nrf.api is not None:
+            self.nrf.cleanup()
+
+    @property
+    def api(self):
+        """
+        The pynrfjprog API instance, for anything this class does not offer. Call forget_blank_pages() after writing FLASH with it.
+
+        """
+        return self.nrf.api
+
+    def forget_blank_pages(self):
+        """
+        Stop trusting the pages this session found or made blank, so the next program erases them again.
+
+        """
+        self.nrf.blank_pages.clear()
+
+    @property
+    def device(self):
+        return self.nrf.device
+
+    @property
+    def device_version(self):
+        return self.nrf.device_version
+
+    @staticmethod
+    def ids():
+        """
+        :return List: The serial numbers of the JLink debuggers connected to the PC, sorted.
+        """
+        api = _api_module().API('NRF52') # Device family type arbitrary since we are not connecting to a device.
+        api.open()
+        try:
+            return sorted(api.enum_emu_snr() or [])
+        finally:
+            api.close()
+
+    def memrd(self, addr, length=4):
+        """
+        :return bytes: length bytes of memory from addr.
+        """
+        return bytes(buffers.read(self.api, addr, length))
+
+    def memwr(self, addr, value):
+        """
+        Write the 32 bit word value to addr, through the NVMC if addr is in FLASH or the UICR.
+
+        """
+        self.api.write_u32(addr, value, self._is_flash_addr(addr))
+        self._written(addr, 4)
+        if self._is_flash_addr(addr):
+            flash_manifest.forget(self.nrf.snr, addr, addr + 4)
+
+    def readregs(self):
+        """
+        :return OrderedDict: The value of each CPU register by name (i.e. 'R0', 'PC').
+        """
+        return collections.OrderedDict((register.name, self.api.read_cpu_register(register)) for register in _api_module().CpuRegister)
+
+    def halt(self):
+        self.api.halt()
+
+    def run(self, pc=None, sp=None):
+        """
+        Start the CPU at pc with the stack pointer sp, or let it continue from where it is if neither is given.
+
+        """
+        self.forget_blank_pages() # The code may write FLASH.
+        if pc is not None and sp is not None:
+            self.api.run(pc, sp)
+        elif pc is not None or sp is not None:
+            assert(False), 'Both the PC and the SP must be specified.'
+        else:
+            self.api.go()
+
+    def reset(self, kind='system'):
+        """
+        Reset the device and let it run.
+
+        :param String kind: One of RESET_KINDS.
+        """
+        assert (kind in RESET_KINDS), 'Unknown reset {}.'.format(kind)
+
+        if kind == 'debug':
+            self.api.debug_reset()
+        elif kind == 'pin':
+            self.api.pin_reset()
+        else:
+            self.api.sys_reset()
+        self.api.go()
+        self.forget_blank_pages() # The code may write FLASH.
+
+    def erase(self, page=None, uicr=False):
+        """
+        Erase the page starting at page, or the UICR, or (by default) all of FLASH and the UICR.
+
+        """
+        if page is not None:
+            self.api.erase_page(page)
+            self.nrf.blank_pages.add(page)
+            flash_manifest.forget(self.nrf.snr, page, page + self.device.page_size)
+        elif uicr:
+            self.api.erase_uicr()
+            flash_manifest.forget(self.nrf.snr, self.device.uicr_start, self.device.uicr_end)
+        else:
+            self.api.erase_all()
+            self._all_pages_blank()
+            flash_manifest.forget(self.nrf.snr)
+
+    def recover(self):
+        self.api.recover()
+        if self.device is not None: # recover connects without detecting the device, unless it runs over an open connection.
+            self._all_pages_blank()
+        flash_manifest.forget(self.nrf.snr)
+
+    def readback_protect(self, level):
+        """
+        :param String level: 'CR0' to protect region 0, or 'ALL'.
+        """
+        protection = _api_module().ReadbackProtection
+        self.api.readback_protect(protection.REGION_0 if level == 'CR0' else protection.ALL)
+
+    def program(self, file, erase=None, differential=False, flashloader=False, verify=False, crcverify=False, reset=None, dryrun=False,
+                use_image_cache=True, keep=(), incremental=False, skip_softdevice=False):
+        """
+        Program a hex file.
+
+        :param String  file:            The hex file.
+        :param String  erase:           One of ERASE_MODES, or None to write without erasing. 'auto' does whichever of 'all' and 'sectors' is estimated to be quicker.
+        :param Boolean differential:    Only erase and write the pages whose contents differ from the file. Replaces erase.
+        :param Boolean incremental:     Like differential, but compare the file with the manifest of the last program through this debugger
+                                        instead of reading the device. Falls back to differential if there is no manifest for the device.
+        :param Boolean flashloader:     Write through a loader running from the device's RAM.
+        :param Boolean verify:          Verify the written data.
+        :param Boolean crcverify:       Verify with CRCs computed on the device instead of reading everything back.
+        :param String  reset:           One of RESET_KINDS to reset the device afterwards (unless the verify failed), or None.
+        :param Boolean dryrun:          Only plan the erases and writes.
+        :param Boolean use_image_cache: If the parsed hex file may be taken from and stored in the image cache.
+        :param List    keep:            (start address, end address) of each region to preserve: the parts an erase covers are read first and written back.
+        :param Boolean skip_softdevice: Leave out the MBR and SoftDevice if the device's SoftDevice info structure matches the file's. Not with erase 'all'.
+        :return ProgramResult: What was done. A failed verify is reported in its report, it does not raise.
+        """
+        assert (erase is None or erase in ERASE_MODES), 'Unknown erase mode {}.'.format(erase)
+
+        hex_file = image_cache.load(file, use_image_cache)
+        installed_softdevice = None
+        if skip_softdevice and erase != 'all':
+            hex_file, installed_softdevice = self._without_installed_softdevice(hex_file)
+            if installed_softdevice is not None and erase == 'auto':
+                erase = 'sectors' # A mass erase would remove the SoftDevice.
+
+        checked_pages = set() # Pages whose contents the plan was made from, they are not read again to find the blank ones.
+        if incremental:
+            result = self._plan_incremental(hex_file, checked_pages)
+            for start_addr, end_addr in keep:
+                result.plan.add_keep(start_addr, end_addr)
+        elif differential:
+            result = self._plan_differential(hex_file, checked_pages)
+            for start_addr, end_addr in keep:
+                result.plan.add_keep(start_addr, end_addr)
+        elif erase == 'auto':
+            cost_model = write_plan.CostModel(self.device, self.nrf.snr)
+            result = ProgramResult(write_plan.WritePlan.cheaper_for_image(hex_file, self.device, keep, cost_model))
+        else:
+            result = ProgramResult(write_plan.WritePlan.for_image(hex_file, self.device, erase_all=erase == 'all',
+                                                                  erase_sectors=erase in ('sectors', 'sectorsanduicr'),
+                                                                  erase_uicr=erase == 'sectorsanduicr', keep=keep))
+        result.skipped_softdevice = installed_softdevice
+        if dryrun:
+            return result
+
+        result.skipped_erases = self._skip_blank_pages(result.plan, checked_pages)
+        rtt_model.forget(self.nrf.snr) # The new build may place its RTT control block elsewhere.
+        self._read_kept_ranges(result.plan)
+        writes = self._execute_plan(result.plan, flashloader)
+        if verify:
+            result.report = self._verify_blocks(writes, crcverify)
+        self._record_manifest(hex_file, result, erase is not None or differential or incremental)
+        if reset and (result.report is None or result.report.passed):
+            self.reset(reset)
+        return result
+
+    def verify(self, file, crcverify=False, use_image_cache=True, skip_softdevice=False):
+        """
+        Compare the device's memory with a hex file.
+
+        :param Boolean skip_softdevice: Leave out the MBR and SoftDevice if the device's SoftDevice info structure matches the file's.
+        :return VerifyReport: The result.
+        """
+        hex_file = image_cache.load(file, use_image_cache)
+        installed_softdevice = None
+        if skip_softdevice:
+            hex_file, installed_softdevice = self._without_installed_softdevice(hex_file)
+
+        blocks = [(start_addr, hex_file.tobinarray(start=start_addr, size=end_addr - start_addr)) for start_addr, end_addr in hex_file.segments()]
+        report = self._verify_blocks(blocks, crcverify)
+        if installed_softdevice is not None:
+            report.skipped.append(installed_softdevice.region())
+        return report
+
+    def rtt(self):
+        """
+        Find the SEGGER RTT control block of the running firmware.
+
+        :return ControlBlock: The control block, to poll the firmware's up-buffers with.
+        """
+        return rtt_model.ControlBlock(self.api, rtt_model.find(self.api, self.device, self.nrf.snr), self.device)
+
+    # Helpers.
+
+    def _without_installed_softdevice(self, hex_file):
+        """
+        Take the MBR and SoftDevice out of hex_file if the device has the same SoftDevice, judged by the words of its info structure alone.
+
+        :return Tuple: (the image to program, the SoftDeviceInfo of the SoftDevice left out or None if nothing was left out).
+        """
+        info = softdevice.image_info(hex_file)
+        if info is None or info.end_addr % self.device.page_size: # The SoftDevice must not share its last page with the application.
+            return hex_file, None
+        if self.memrd(softdevice.INFO_STRUCT_ADDR, len(info.data)) != info.data:
+            return hex_file, None
+        return hex_file.excluding(*info.region()), info
+
+    def _skip_blank_pages(self, plan, checked_pages=()):
+        """
+        Take the pages that are already blank out of plan's erases: the ones this session knows are blank and, if reading a page is
+        quicker than erasing it, the ones read back as all 0xFF.
+
+        :param Set checked_pages: Pages whose contents are already known, they are not read back.
+        :return int: The number of erases skipped.
+        """
+        blank_pages = self.nrf.blank_pages
+        unknown_pages = [page_addr for page_addr in plan.erase_pages() if page_addr not in blank_pages and page_addr not in checked_pages]
+
+        if unknown_pages and write_plan.CostModel(self.device).blank_check_pays_off(self.device.page_size):
+            blank_page = b'\xff' * self.device.page_size
+            for start_addr, end_addr in write_plan.page_runs(unknown_pages, self.device.page_size):
+                for chunk_addr in range(start_addr, end_addr, buffers.CHUNK_SIZE): # Adjacent pages are read together.
+                    data = buffers.read(self.api, chunk_addr, min(buffers.CHUNK_SIZE, end_addr - chunk_addr))
+                    for offset in range(0, len(data), self.device.page_size):
+                        if data[offset : offset + self.device.page_size] == blank_page:
+                            blank_pages.add(chunk_addr + offset)
+
+        skipped_pages = [page_addr for page_addr in plan.erase_pages() if page_addr in blank_pages]
+        for page_addr in skipped_pages:
+            plan.skip_erase(page_addr)
+        return len(skipped_pages)
+
+    def _read_kept_ranges(self, plan):
+        """
+        Read the parts of the kept regions plan erases and add them to plan's writes, so they are written back after the erases.
+
+        """
+        for start_addr, end_addr in plan.kept_ranges():
+            for chunk_addr in range(start_addr, end_addr, buffers.CHUNK_SIZE):
+                plan.add_write(chunk_addr, buffers.read(self.api, chunk_addr, min(buffers.CHUNK_SIZE, end_addr - chunk_addr)))
+
+    def _all_pages_blank(self):
+        self.nrf.blank_pages.update(range(self.device.flash_start, self.device.flash_end, self.device.page_size))
+
+    def _written(self, addr, size):
+        """
+        Forget that the pages from addr to addr + size are blank.
+
+        """
+        page_size = self.device.page_size
+        self.nrf.blank_pages.difference_update(range(addr - addr % page_size, addr + size, page_size))
+
+    def _is_flash_addr(self, addr):
+        return self.device.flash_start <= addr < self.device.flash_end or self.device.uicr_start <= addr < self.device.uicr_end
+
+    def _plan_differential(self, hex_file, checked_pages):
+        """
+        Compare the digest of each page hex_file touches with the digest of the same page on the device, and only plan to erase and write the pages that differ.
+
+        :param Set checked_pages: The pages read are added to it, and the blank ones to the session's blank pages.
+        """
+        blank_page = b'\xff' * self.device.page_size
+
+        def page_changed(page):
+            data = buffers.read(self.api, page.addr, self.device.page_size)
+            checked_pages.add(page.addr)
+            if data == blank_page:
+                self.nrf.blank_pages.add(page.addr)
+            return flash_pages.page_digest(data) != page.digest()
+
+        return self._plan_changed_pages(hex_file, page_changed)
+
+    def _plan_incremental(self, hex_file, checked_pages):
+        """
+        Like _plan_differential(), but compare with the manifest of the last program if the device still matches its fingerprint.
+        The pages are then not read at all: the manifest tells the blank ones, the ones it does not know are erased.
+
+        """
+        manifest = flash_manifest.Manifest.load(self.nrf.snr)
+        matches = manifest is not None and manifest.matches(self.memrd, self.device, crc_verify.CrcRunner(self.api, self.device).compute)
+        self.forget_blank_pages() # The device is reset and runs after computing the CRCs.
+        if not matches:
+            flash_manifest.forget(self.nrf.snr)
+            return self._plan_differential(hex_file, checked_pages)
+
+        blank_digest = flash_pages.page_digest(b'\xff' * self.device.page_size)
+
+        def page_changed(page):
+            checked_pages.add(page.addr)
+            if manifest.pages.get(page.addr) == blank_digest:
+                self.nrf.blank_pages.add(page.addr)
+            return manifest.page_changed(page)
+
+        result = self._plan_changed_pages(hex_file, page_changed)
+        result.used_manifest = True
+        return result
+
+    def _plan_changed_pages(self, hex_file, page_changed):
+        """
+        Plan to erase and write only the pages of hex_file for which page_changed(page) is True.
+
+        """
+        pages = flash_pages.image_pages(hex_file, self.device.page_size)
+        changed_pages = [page for page in pages if page_changed(page)]
+
+        plan = write_plan.WritePlan(self.device)
+        for page in changed_pages:
+            plan.add_erase(page.addr, page.addr + self.device.page_size)
+            for start_addr, end_addr in page.ranges:
+                plan.add_write(start_addr, page.data[start_addr - page.addr : end_addr - page.addr])
+        return ProgramResult(plan, pages=len(pages), changed_pages=len(changed_pages))
+
+    def _record_manifest(self, hex_file, result, pages_known):
+        """
+        Remember what the program left in each page hex_file touches, for the next incremental program.
+
+        :param Boolean pages_known: If every page was erased before it was written (or found to be unchanged), so it only holds hex_file's data.
+        """
+        snr = self.nrf.snr
+        if snr is None or (result.report is not None and not result.report.passed):
+            flash_manifest.forget(snr)
+            return
+        if not pages_known:
+            for start_addr, end_addr in hex_file.segments():
+                flash_manifest.forget(snr, start_addr, end_addr)
+            return
+
+        device_id = flash_manifest.read_device_id(self.memrd)
+        flash_manifest.Manifest.for_image(hex_file, device_id, self.device.page_size, result.plan.kept_ranges()).store(snr)
+
+    def _execute_plan(self, plan, use_flash_loader):
+        """
+        Do every erase in plan, then every write. The time the erases take is remembered to plan 'auto' erases with.
+
+        :return List: (address, data) of the blocks written.
+        """
+        erase_all_seconds = None
+        erase_page_seconds = None
+
+        if plan.erase_all:
+            start_time = time.time()
+            self.api.erase_all()
+            erase_all_seconds = time.time() - start_time
+            self._all_pages_blank()
+        if plan.erase_uicr:
+            self.api.erase_uicr()
+
+        erase_pages = plan.erase_pages()
+        start_time = time.time()
+        for page_addr in erase_pages:
+            self.api.erase_page(page_addr)
+            self.nrf.blank_pages.add(page_addr)
+        if erase_pages:
+            erase_page_seconds = (time.time() - start_time) / len(erase_pages)
+
+        if erase_all_seconds is not None or erase_page_seconds is not None:
+            write_plan.record_erase_timings(self.nrf.snr, self.device, erase_page_seconds, erase_all_seconds)
+
+        writes = plan.writes()
+        if use_flash_loader:
+            loader = flash_loader.FlashLoader(self.api, self.device)
+            loader.start()
+            for addr, data in writes:
+                loader.write(addr, data)
+            loader.finish()
+        else:
+            for addr, data in writes:
+                buffers.write(self.api, addr, data, True)
+
+        for addr, data in writes:
+            self._written(addr, len(data))
+        return writes
+
+    def _verify_blocks(self, blocks, use_crc):
+        """
+        Compare blocks with the device's memory, with CRCs computed on the device or by reading everything back.
+
+        :param List blocks: (address, expected data) of each block.
+        :return VerifyReport: The result.
+        """
+        report = verify_model.VerifyReport(self.device.page_size)
+
+        if use_crc:
+            crc_verify.verify(self.api, self.device, blocks, report)
+            self.forget_blank_pages() # The device is reset and runs afterwards.
+        else:
+            for addr, data in blocks:
+                for chunk_addr, chunk in buffers.chunks(addr, data):
+                    report.add(chunk_addr, chunk, buffers.read(self.api, chunk_addr, len(chunk)))
+        return report
+
+
+def _api_module():
+    from nrfjprog.model import perform_command_jlink
+    return perform_command_jlink.API
@@ -32,8 +32,13 @@ This module is located outside the nrfjprog package and allows PyInstaller to pr
 Users can also call the nrfjprog command-line-tool from Python by running $ python nrfjprog_cli.py --help
 """
 
+import sys
+
 from nrfjprog.__main__ import main
 
 
 if __name__ == '__main__':
+    if getattr(sys, 'frozen', False): # Gang programming starts worker processes, which re-run the frozen .exe on Windows.
+        import multiprocessing
+        multiprocessing.freeze_support()
     main()
@@ -0,0 +1,263 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Benchmarks the JLink commands against simulated probes, so the effect of a change on nrfjprog's speed can be measured without hardware.
+
+Every operation is run on each hex file in tests/resources and the fastest of several runs is reported with its throughput, the API
+calls it made and the Python overhead: the wall time not spent waiting for the simulated device or running code on its simulated CPU.
+
+$ python tests/benchmark.py --latency 0.0002 --bandwidth 1000000 --json results.json
+
+--memory instead reports the peak RSS and the peak of memory allocated by Python while programming each hex file. Every measurement
+runs in a fresh interpreter, with the hex file already in the image cache as it is for repeated programming.
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nrfjprog.__main__ import Nrfjprog
+from nrfjprog.model.perform_command_jlink import JLink
+
+import simulated_api
+
+
+RESOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources')
+DEVICE_VERSIONS = {'pca10028': 'NRF51_XLR3', 'pca10040': 'NRF52_FP1'} # The development kit each example hex file was built for.
+SNR = 1234
+
+OPERATIONS = [('program', ['program', '-f', '{hex}', '--sectorserase']),
+              ('program --verify', ['program', '-f', '{hex}', '--sectorserase', '--verify']),
+              ('program --flashloader', ['program', '-f', '{hex}', '--sectorserase', '--flashloader']),
+              ('program --differential', ['program', '-f', '{hex}', '--differential']),
+              ('verify', ['verify', '-f', '{hex}']),
+              ('readtofile text', ['readtofile', '-f', '{out}', '--readcode']),
+              ('readtofile bin', ['readtofile', '-f', '{out}', '--readcode', '--format', 'bin']),
+              ('memrd 4 KB', ['memrd', '-a', '0x0', '-l', '0x1000'])]
+
+MEMORY_OPERATIONS = [('program --verify', ['program', '-f', '{hex}', '--sectorserase', '--verify']),
+                     ('program --flashloader', ['program', '-f', '{hex}', '--sectorserase', '--flashloader']),
+                     ('verify', ['verify', '-f', '{hex}'])]
+
+
+class Result(object):
+
+    def __init__(self, hex_name, operation, wall_seconds, probe):
+        self.hex_name = hex_name
+        self.operation = operation
+        self.wall_seconds = wall_seconds
+        self.device_seconds = probe.device_seconds
+        self.simulator_seconds = probe.simulator_seconds
+        self.bytes_moved = probe.bytes_read + probe.bytes_written
+        self.calls = sum(probe.calls.values())
+
+    @property
+    def overhead_seconds(self):
+        return max(self.wall_seconds - self.device_seconds - self.simulator_seconds, 0.0)
+
+    @property
+    def throughput(self):
+        return self.bytes_moved / self.wall_seconds if self.wall_seconds else 0.0
+
+    def to_dict(self):
+        return {'hex': self.hex_name, 'operation': self.operation, 'wall_seconds': self.wall_seconds, 'device_seconds': self.device_seconds,
+                'overhead_seconds': self.overhead_seconds, 'bytes_moved': self.bytes_moved, 'bytes_per_second': self.throughput, 'calls': self.calls}
+
+
+def run_benchmarks(repeats=3, latency=0.0, bandwidth=None, erase_seconds=0.0, hex_files=None):
+    """
+    :param int   repeats:       Runs of each operation, the fastest is reported.
+    :param float latency:       Seconds every API call takes on the simulated probe.
+    :param int   bandwidth:     Bytes per second the simulated probe reads and writes. No limit if None.
+    :param float erase_seconds: Seconds every erase takes on the simulated probe.
+    :param List  hex_files:     The hex files to program. All of tests/resources/*.hex if None.
+    :return List: A Result per hex file and operation.
+    """
+    results = []
+    for hex_path in hex_files or sorted(glob.glob(os.path.join(RESOURCES, '*.hex'))):
+        device_version = next((version for board, version in DEVICE_VERSIONS.items() if board in hex_path), 'NRF52_FP1')
+
+        simulated_api.install()
+        try:
+            probe = simulated_api.add_probe(SNR, device_version, latency, bandwidth, erase_seconds)
+            out_path = os.path.join(os.environ['NRFJPROG_CACHE_DIR'], 'readtofile.out')
+
+            for operation, argv in OPERATIONS:
+                argv = [arg.format(hex=hex_path, out=out_path) for arg in argv] + ['--snr', str(SNR), '-q']
+                best = None
+                for _ in range(repeats):
+                    probe.reset_counters()
+                    wall_seconds = _run_command(argv)
+                    if best is None or wall_seconds < best.wall_seconds:
+                        best = Result(os.path.basename(hex_path), operation, wall_seconds, probe)
+                results.append(best)
+        finally:
+            simulated_api.uninstall()
+    return results
+
+
+class MemoryResult(object):
+
+    def __init__(self, hex_name, operation, image_bytes, peak_allocated_bytes, peak_rss_kb, rss_growth_kb):
+        self.hex_name = hex_name
+        self.operation = operation
+        self.image_bytes = image_bytes
+        self.peak_allocated_bytes = peak_allocated_bytes # The most memory Python had allocated during the command, from tracemalloc.
+        self.peak_rss_kb = peak_rss_kb
+        self.rss_growth_kb = rss_growth_kb # How much the command raised the process's peak RSS.
+
+    def to_dict(self):
+        return {'hex': self.hex_name, 'operation': self.operation, 'image_bytes': self.image_bytes, 'peak_allocated_bytes': self.peak_allocated_bytes,
+                'peak_rss_kb': self.peak_rss_kb, 'rss_growth_kb': self.rss_growth_kb}
+
+
+def run_memory_benchmarks(hex_files=None, operations=None):
+    """
+    :param List hex_files:  The hex files to program. All of tests/resources/*.hex if None.
+    :param List operations: (name, argv) of the commands to measure. MEMORY_OPERATIONS if None.
+    :return List: A MemoryResult per hex file and operation.
+    """
+    results = []
+    for hex_path in hex_files or sorted(glob.glob(os.path.join(RESOURCES, '*.hex'))):
+        for operation, argv in operations or MEMORY_OPERATIONS:
+            output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--memorychild', json.dumps([hex_path, argv])])
+            measurement = json.loads(output.decode('utf-8').splitlines()[-1])
+            results.append(MemoryResult(os.path.basename(hex_path), operation, **measurement))
+    return results
+
+
+def print_memory_results(results):
+    print('{:<44} {:<24} {:>10} {:>14} {:>13} {:>15}'.format('HEX', 'OPERATION', 'IMAGE (KB)', 'PEAK ALLOC (KB)', 'PEAK RSS (KB)', 'RSS GROWTH (KB)'))
+    for result in results:
+        print('{:<44} {:<24} {:>10} {:>14} {:>13} {:>15}'.format(result.hex_name, result.operation, result.image_bytes // 1024,
+                                                              result.peak_allocated_bytes // 1024, result.peak_rss_kb, result.rss_growth_kb))
+
+
+def print_results(results):
+    print('{:<44} {:<24} {:>9} {:>9} {:>11} {:>7}'.format('HEX', 'OPERATION', 'WALL (s)', 'PY (s)', 'KB/s', 'CALLS'))
+    for result in results:
+        print('{:<44} {:<24} {:>9.3f} {:>9.3f} {:>11.1f} {:>7}'.format(result.hex_name, result.operation, result.wall_seconds, result.overhead_seconds,
+                                                                    result.throughput / 1024, result.calls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark nrfjprog against simulated probes.')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs of each operation, the fastest is reported.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds every API call takes.')
+    parser.add_argument('--bandwidth', type=int, help='Bytes per second the probe reads and writes. No limit by default.')
+    parser.add_argument('--erasetime', type=float, default=0.0, help='Seconds every erase takes.')
+    parser.add_argument('--json', help='Also write the results to this file as JSON.')
+    parser.add_argument('--memory', action='store_true', help='Measure peak memory use instead of time.')
+    parser.add_argument('--memorychild', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.memorychild:
+        _measure_memory(*json.loads(args.memorychild))
+        return
+
+    if args.memory:
+        results = run_memory_benchmarks()
+        print_memory_results(results)
+    else:
+        results = run_benchmarks(args.repeats, args.latency, args.bandwidth, args.erasetime)
+        print_results(results)
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump([result.to_dict() for result in results], file, indent=2)
+
+
+# Helpers.
+
+def _measure_memory(hex_path, argv):
+    """
+    Run one command in this (fresh) interpreter and print its memory use as JSON.
+
+    """
+    import resource
+    import tracemalloc
+
+    from nrfjprog.model import image_cache
+
+    device_version = next((version for board, version in DEVICE_VERSIONS.items() if board in hex_path), 'NRF52_FP1')
+    argv = [arg.format(hex=hex_path) for arg in argv] + ['--snr', str(SNR), '-q']
+
+    simulated_api.install()
+    try:
+        probe = simulated_api.add_probe(SNR, device_version)
+        # Parse the hex file into the cache from another interpreter, so parsing it does not count towards this one's peak RSS.
+        subprocess.check_call([sys.executable, '-c', 'from nrfjprog.model import image_cache; image_cache.load({!r})'.format(hex_path)],
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        image = image_cache.load(hex_path)
+        image_bytes = sum(end_addr - start_addr for start_addr, end_addr in image.segments())
+        if argv[0] == 'verify':
+            for start_addr, data in image.segment_data():
+                probe.write(start_addr, data)
+        del image
+
+        rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        tracemalloc.start()
+        _run_command(argv)
+        peak_allocated_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    finally:
+        simulated_api.uninstall()
+
+    print(json.dumps({'image_bytes': image_bytes, 'peak_allocated_bytes': peak_allocated_bytes, 'peak_rss_kb': peak_rss_kb,
+                      'rss_growth_kb': peak_rss_kb - rss_before_kb}))
+
+
+def _run_command(argv):
+    args = Nrfjprog().parse_args(argv)
+
+    stdout = sys.stdout
+    sys.stdout = StringIO()
+    try:
+        start_time = time.time()
+        getattr(JLink(), args.command)(args)
+        return time.time() - start_time
+    finally:
+        sys.stdout = stdout
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,641 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+An in-memory stand-in for the pynrfjprog API module.
+
+Tests replace nrfjprog.model.perform_command_jlink.API with this module so the JLink commands can be run without a debugger. Each
+simulated probe keeps its own flash image and counts the operations that were performed on it.
+"""
+
+import enum
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+
+@enum.unique
+class NrfjprogdllErr(enum.IntEnum):
+    SUCCESS = 0
+    INVALID_OPERATION = -2
+    INVALID_PARAMETER = -3
+    WRONG_FAMILY_FOR_DEVICE = -5
+    EMULATOR_NOT_CONNECTED = -10
+    NOT_AVAILABLE_BECAUSE_PROTECTION = -90
+    NO_EMULATOR_CONNECTED = -101
+    JLINKARM_DLL_READ_ERROR = -104
+
+
+@enum.unique
+class ReadbackProtection(enum.IntEnum):
+    NONE = 0
+    REGION_0 = 1
+    ALL = 2
+    BOTH = 3
+
+
+@enum.unique
+class CpuRegister(enum.IntEnum):
+    R0 = 0
+    R1 = 1
+    R2 = 2
+    R3 = 3
+    R4 = 4
+    R5 = 5
+    R6 = 6
+    R7 = 7
+    R8 = 8
+    R9 = 9
+    R10 = 10
+    R11 = 11
+    R12 = 12
+    R13 = 13
+    R14 = 14
+    R15 = 15
+    XPSR = 16
+    MSP = 17
+    PSP = 18
+
+
+class APIError(Exception):
+    """
+    Mirrors pynrfjprog's exception class.
+
+    """
+    def __init__(self, err_code=None, err_msg=''):
+        self.err_code = err_code
+        self.err_msg = err_msg
+        Exception.__init__(self, 'An error was reported by the simulated probe: {} {}'.format(err_code, err_msg).rstrip())
+
+
+FLASH_SIZE = {'NRF52_FP1': 0x80000, 'NRF51_XLR3': 0x40000}
+PAGE_SIZE = {'NRF52_FP1': 0x1000, 'NRF51_XLR3': 0x400}
+RAM_SIZE = {'NRF52_FP1': 0x10000, 'NRF51_XLR3': 0x4000}
+
+FICR_START = 0x10000000
+UICR_START = 0x10001000
+RAM_START = 0x20000000
+NVMC_READY = 0x4001E400
+NVMC_CONFIG = 0x4001E504
+
+PROBES = {}
+
+
+class SimulatedProbe(object):
+    """
+    A debugger connected to a single nRF5x target.
+
+    """
+    def __init__(self, snr, device_version='NRF52_FP1', latency=0.0, bandwidth=None, erase_seconds=0.0):
+        self.snr = snr
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.erase_seconds = erase_seconds
+        self.device_version = device_version
+        self.family = device_version[:5]
+        self.page_size = PAGE_SIZE[device_version]
+
+        self.flash = bytearray(b'\xff' * FLASH_SIZE[device_version])
+        self.uicr = bytearray(b'\xff' * self.page_size)
+        self.ficr = bytearray(b'\xff' * self.page_size)
+        self.ram = bytearray(RAM_SIZE[device_version])
+        self.nvmc_config = 0
+        self.cpu = SimulatedCpu(self)
+        self.clockspeed_khz = None
+        self.max_clockspeed_khz = None # Transfers above this speed fail, no limit if None.
+        self.corrupts_reads = False # If True transfers above max_clockspeed_khz return corrupted data instead of failing.
+        self.protected = False # If True the target only accepts recover().
+
+        self._set_ficr_word(0x10, self.page_size) # CODEPAGESIZE
+        self._set_ficr_word(0x14, len(self.flash) // self.page_size) # CODESIZE
+        self._set_ficr_word(0x60, 0x1000000 + snr) # DEVICEID[0]
+        self._set_ficr_word(0x64, 0x2000000 + snr) # DEVICEID[1]
+        if self.family == 'NRF52':
+            self._set_ficr_word(0x100, 0x52832) # INFO.PART
+
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.page_erases = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.calls = {}
+        self.device_seconds = 0.0
+        self.simulator_seconds = 0.0 # Wall time spent running code on the simulated CPU, which is not nrfjprog's overhead.
+
+    def wait(self, seconds):
+        """
+        Take seconds of simulated device time, sleeping so the time also passes on the wall clock.
+
+        """
+        if seconds:
+            self.device_seconds += seconds
+            time.sleep(seconds)
+
+    def _transfer(self, length):
+        if self.bandwidth:
+            self.wait(float(length) / self.bandwidth)
+
+    def _set_ficr_word(self, offset, value):
+        self.ficr[offset : offset + 4] = bytearray([(value >> shift) & 0xFF for shift in (0, 8, 16, 24)])
+
+    def _region(self, addr, length):
+        if 0 <= addr and addr + length <= len(self.flash):
+            return self.flash, addr
+        if FICR_START <= addr and addr + length <= FICR_START + len(self.ficr):
+            return self.ficr, addr - FICR_START
+        if RAM_START <= addr and addr + length <= RAM_START + len(self.ram):
+            return self.ram, addr - RAM_START
+        if UICR_START <= addr and addr + length <= UICR_START + len(self.uicr):
+            return self.uicr, addr - UICR_START
+        raise APIError(NrfjprogdllErr.INVALID_PARAMETER, 'Address {} is not simulated.'.format(hex(addr)))
+
+    def read(self, addr, length):
+        memory, offset = self._region(addr, length)
+        self._transfer(length)
+        self.bytes_read += length
+        return memory[offset : offset + length]
+
+    def write(self, addr, data):
+        memory, offset = self._region(addr, len(data))
+        self._transfer(len(data))
+        if memory is self.ram:
+            memory[offset : offset + len(data)] = bytearray(data)
+        else:
+            for i, byte in enumerate(bytearray(data)):
+                memory[offset + i] &= byte # NOR flash can only clear bits, an erase is needed to set them again.
+        self.bytes_written += len(data)
+
+    def erase_page(self, addr):
+        memory, offset = self._region(addr, self.page_size)
+        memory[offset : offset + self.page_size] = b'\xff' * self.page_size
+        self.page_erases += 1
+        self.wait(self.erase_seconds)
+
+    def cpu_read32(self, addr):
+        if addr == NVMC_READY:
+            return 1
+        if addr == NVMC_CONFIG:
+            return self.nvmc_config
+        memory, offset = self._region(addr, 4)
+        return struct.unpack_from('<I', memory, offset)[0]
+
+    def cpu_read8(self, addr):
+        memory, offset = self._region(addr, 1)
+        return memory[offset]
+
+    def cpu_write32(self, addr, value):
+        if addr == NVMC_CONFIG:
+            self.nvmc_config = value
+            return
+
+        memory, offset = self._region(addr, 4)
+        if memory is self.ram:
+            struct.pack_into('<I', memory, offset, value)
+        elif self.nvmc_config == 1:
+            struct.pack_into('<I', memory, offset, struct.unpack_from('<I', memory, offset)[0] & value)
+        else:
+            raise APIError(NrfjprogdllErr.INVALID_OPERATION, 'FLASH written at {} while the NVMC is not write enabled.'.format(hex(addr)))
+
+    def erase_all(self):
+        self.flash[:] = b'\xff' * len(self.flash)
+        self.uicr[:] = b'\xff' * len(self.uicr)
+        self.wait(self.erase_seconds)
+
+
+class SimulatedCpu(object):
+    """
+    Runs the Thumb code nrfjprog places in RAM (the flash loader and the CRC routine). Only the instructions that code uses are decoded. Code runs
+    whenever an API call is made on the probe, until it is idle: it takes the same branch back twice with the same registers and without
+    storing anything in between.
+
+    """
+    MAX_STEPS = 1000000
+
+    def __init__(self, probe):
+        self.probe = probe
+        self.running = False
+        self.pc = None
+        self.fault = None
+        self.steps = 0
+
+    def start(self, pc, sp):
+        self.r = [0] * 8
+        self.sp = sp
+        self.pc = pc
+        self.n = self.z = self.c = self.v = False
+        self.interrupts_enabled = True
+        self.stores = 0
+        self.fault = None
+        self.running = True
+
+    def halt(self):
+        self.running = False
+
+    def resume(self):
+        self.running = self.pc is not None and self.fault is None
+
+    def reset(self):
+        self.running = False
+        self.pc = None
+
+    def run_until_idle(self):
+        if not self.running:
+            return
+
+        start_time = time.time()
+        try:
+            self._run_until_idle()
+        finally:
+            self.probe.simulator_seconds += time.time() - start_time
+
+    def _run_until_idle(self):
+        last_loop = None
+        for _ in range(self.MAX_STEPS):
+            try:
+                loop = self.step()
+            except APIError as error:
+                self.fault = 'Fault at {}: {}'.format(hex(self.pc), error.err_msg)
+                self.running = False
+                return
+
+            if loop is not None:
+                if loop == last_loop:
+                    return
+                last_loop = loop
+        self.fault = 'Did not become idle.'
+        self.running = False
+
+    def step(self):
+        """
+        Execute one instruction.
+
+        :return Tuple: (branch address, stores so far, registers) if a branch back was taken, else None.
+        """
+        memory, offset = self.probe._region(self.pc, 2)
+        opcode = memory[offset] | memory[offset + 1] << 8
+        pc = self.pc
+        self.pc += 2
+        self.steps += 1
+        r = self.r
+
+        if opcode >> 11 == 0x14: # ADR Rd, label
+            r[opcode >> 8 & 7] = ((pc + 4) & ~3) + (opcode & 0xFF) * 4
+        elif opcode >> 11 == 0x09: # LDR Rt, [PC, #imm8]
+            r[opcode >> 8 & 7] = self.probe.cpu_read32(((pc + 4) & ~3) + (opcode & 0xFF) * 4)
+        elif opcode >> 11 == 0x04: # MOVS Rd, #imm8
+            r[opcode >> 8 & 7] = opcode & 0xFF
+            self._set_nz(opcode & 0xFF)
+        elif opcode >> 11 == 0x00: # LSLS Rd, Rm, #imm5
+            result = r[opcode >> 3 & 7] << (opcode >> 6 & 0x1F)
+            r[opcode & 7] = result & 0xFFFFFFFF
+            self._set_nz(r[opcode & 7])
+        elif opcode >> 11 == 0x01: # LSRS Rd, Rm, #imm5
+            shift = opcode >> 6 & 0x1F or 32
+            value = r[opcode >> 3 & 7]
+            self.c = bool(value >> (shift - 1) & 1)
+            r[opcode & 7] = value >> shift
+            self._set_nz(r[opcode & 7])
+        elif opcode >> 11 == 0x0D: # LDR Rt, [Rn, #imm5]
+            r[opcode & 7] = self.probe.cpu_read32(r[opcode >> 3 & 7] + (opcode >> 6 & 0x1F) * 4)
+        elif opcode >> 11 == 0x0F: # LDRB Rt, [Rn, #imm5]
+            r[opcode & 7] = self.probe.cpu_read8(r[opcode >> 3 & 7] + (opcode >> 6 & 0x1F))
+        elif opcode >> 9 == 0x2C: # LDR Rt, [Rn, Rm]
+            r[opcode & 7] = self.probe.cpu_read32(r[opcode >> 3 & 7] + r[opcode >> 6 & 7])
+        elif opcode >> 11 == 0x0C: # STR Rt, [Rn, #imm5]
+            self._store(r[opcode >> 3 & 7] + (opcode >> 6 & 0x1F) * 4, r[opcode & 7])
+        elif opcode >> 9 == 0x28: # STR Rt, [Rn, Rm]
+            self._store(r[opcode >> 3 & 7] + r[opcode >> 6 & 7], r[opcode & 7])
+        elif opcode >> 11 == 0x05: # CMP Rn, #imm8
+            self._subtract(r[opcode >> 8 & 7], opcode & 0xFF)
+        elif opcode >> 11 == 0x06: # ADDS Rdn, #imm8
+            r[opcode >> 8 & 7] = self._add(r[opcode >> 8 & 7], opcode & 0xFF)
+        elif opcode >> 9 == 0x0E: # ADDS Rd, Rn, #imm3
+            r[opcode & 7] = self._add(r[opcode >> 3 & 7], opcode >> 6 & 7)
+        elif opcode >> 11 == 0x07: # SUBS Rdn, #imm8
+            r[opcode >> 8 & 7] = self._subtract(r[opcode >> 8 & 7], opcode & 0xFF)
+        elif opcode >> 6 == 0x101: # EORS Rdn, Rm
+            r[opcode & 7] ^= r[opcode >> 3 & 7]
+            self._set_nz(r[opcode & 7])
+        elif opcode >> 6 == 0x10F: # MVNS Rd, Rm
+            r[opcode & 7] = ~r[opcode >> 3 & 7] & 0xFFFFFFFF
+            self._set_nz(r[opcode & 7])
+        elif opcode >> 12 == 0xD: # B<cond> label
+            if self._condition(opcode >> 8 & 0xF):
+                return self._branch(pc, _signed(opcode & 0xFF, 8))
+        elif opcode >> 11 == 0x1C: # B label
+            return self._branch(pc, _signed(opcode & 0x7FF, 11))
+        elif opcode == 0xBF00: # NOP
+            pass
+        elif opcode == 0xB672: # CPSID i
+            self.interrupts_enabled = False
+        else:
+            raise APIError(NrfjprogdllErr.INVALID_OPERATION, 'Undefined instruction {}.'.format(hex(opcode)))
+        return None
+
+    def _store(self, addr, value):
+        self.probe.cpu_write32(addr, value)
+        self.stores += 1
+
+    def _add(self, a, b):
+        result = a + b
+        self._set_nz(result & 0xFFFFFFFF)
+        self.c = result > 0xFFFFFFFF
+        self.v = not (a ^ b) & 0x80000000 and bool((a ^ result) & 0x80000000)
+        return result & 0xFFFFFFFF
+
+    def _subtract(self, a, b):
+        result = (a - b) & 0xFFFFFFFF
+        self._set_nz(result)
+        self.c = a >= b
+        self.v = bool((a ^ b) & (a ^ result) & 0x80000000)
+        return result
+
+    def _set_nz(self, value):
+        self.n = bool(value & 0x80000000)
+        self.z = value == 0
+
+    def _condition(self, cond):
+        conditions = {0x0: self.z, 0x1: not self.z, 0x2: self.c, 0x3: not self.c, 0x4: self.n, 0x5: not self.n,
+                      0x8: self.c and not self.z, 0x9: not self.c or self.z, 0xA: self.n == self.v, 0xB: self.n != self.v}
+        if cond not in conditions:
+            raise APIError(NrfjprogdllErr.INVALID_OPERATION, 'Unsupported condition {}.'.format(cond))
+        return conditions[cond]
+
+    def _branch(self, pc, offset):
+        self.pc = pc + 4 + offset * 2
+        return (pc, self.stores, tuple(self.r)) if offset < 0 else None
+
+
+class SimulatedRtt(object):
+    """
+    Firmware that logs through SEGGER RTT: a control block in the probe's RAM and a producer thread writing to its up-buffers. The
+    producer waits while a buffer is full, like firmware in blocking mode.
+
+    """
+    ID = b'SEGGER RTT' + b'\x00' * 6
+    DESCRIPTOR = struct.Struct('<IIIIII') # Name, buffer address, size, write offset, read offset, flags.
+
+    def __init__(self, probe, addr=RAM_START + 0x1234, channels=1, buffer_size=0x40):
+        self.probe = probe
+        self.addr = addr
+        self.buffer_size = buffer_size
+        self.buffer_addrs = [addr + 0x100 + channel * buffer_size for channel in range(channels)]
+        self._thread = None
+
+        self._ram_write(addr, self.ID + struct.pack('<ii', channels, 0))
+        for channel, buffer_addr in enumerate(self.buffer_addrs):
+            self._ram_write(self._descriptor_addr(channel), self.DESCRIPTOR.pack(0, buffer_addr, buffer_size, 0, 0, 0))
+
+    def start(self, messages):
+        """
+        Write each (channel, data) of messages in order from a thread of its own.
+
+        """
+        import threading
+        self._thread = threading.Thread(target=lambda: [self.write(channel, data) for channel, data in messages])
+        self._thread.daemon = True
+        self._thread.start()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def write(self, channel, data):
+        while data:
+            _, buffer_addr, size, write_offset, read_offset, _ = self.DESCRIPTOR.unpack(self._ram_read(self._descriptor_addr(channel), self.DESCRIPTOR.size))
+            free = (read_offset - write_offset - 1) % size
+            if not free:
+                time.sleep(0.0005)
+                continue
+
+            count = min(free, len(data), size - write_offset)
+            self._ram_write(buffer_addr + write_offset, data[:count])
+            self._ram_write(self._descriptor_addr(channel) + 12, struct.pack('<I', (write_offset + count) % size)) # Data first, then the offset.
+            data = data[count:]
+
+    def _descriptor_addr(self, channel):
+        return self.addr + len(self.ID) + 8 + channel * self.DESCRIPTOR.size
+
+    def _ram_read(self, addr, length):
+        return bytes(self.probe.ram[addr - RAM_START : addr - RAM_START + length])
+
+    def _ram_write(self, addr, data):
+        self.probe.ram[addr - RAM_START : addr - RAM_START + len(data)] = data
+
+
+def _signed(value, bits):
+    return value - (1 << bits) if value & (1 << (bits - 1)) else value
+
+
+def add_probe(snr, device_version='NRF52_FP1', latency=0.0, bandwidth=None, erase_seconds=0.0):
+    """
+    Connect a new simulated debugger/target pair and return it. Every API call on the probe takes at least latency seconds, reads and
+    writes move bandwidth bytes per second (no limit if None) and every erase takes erase_seconds.
+
+    """
+    probe = SimulatedProbe(snr, device_version, latency, bandwidth, erase_seconds)
+    PROBES[snr] = probe
+    return probe
+
+
+def remove_all_probes():
+    PROBES.clear()
+
+
+_replaced_api = []
+
+
+def run_command(argv):
+    """
+    Run an nrfjprog command line on the JLink backend, i.e. on the simulated probes once install() was called.
+
+    """
+    from nrfjprog.__main__ import Nrfjprog
+    from nrfjprog.model.perform_command_jlink import JLink
+    args = Nrfjprog().parse_args(argv)
+    getattr(JLink(), args.command)(args)
+
+
+def install():
+    """
+    Make the JLink backend use the simulated probes instead of pynrfjprog, and keep nrfjprog's on-disk caches in a temporary directory.
+
+    """
+    from nrfjprog.model import perform_command_jlink, probe_cache
+    _replaced_api.append((perform_command_jlink.API, os.environ.get(probe_cache.CACHE_DIR_ENV)))
+    perform_command_jlink.API = sys.modules[__name__]
+    os.environ[probe_cache.CACHE_DIR_ENV] = tempfile.mkdtemp()
+
+
+def uninstall():
+    from nrfjprog.model import perform_command_jlink, probe_cache
+    api, cache_dir = _replaced_api.pop()
+    perform_command_jlink.API = api
+
+    shutil.rmtree(os.environ[probe_cache.CACHE_DIR_ENV])
+    if cache_dir is None:
+        del os.environ[probe_cache.CACHE_DIR_ENV]
+    else:
+        os.environ[probe_cache.CACHE_DIR_ENV] = cache_dir
+    remove_all_probes()
+
+
+class API(object):
+    """
+    The subset of pynrfjprog.API.API used by nrfjprog.
+
+    """
+    def __init__(self, device_family):
+        self.device_family = device_family
+        self.probe = None
+        self.is_open = False
+
+    def _count(self, name):
+        self.probe.calls[name] = self.probe.calls.get(name, 0) + 1
+        self.probe.wait(self.probe.latency)
+        self.probe.cpu.run_until_idle()
+        if name != 'connect_to_emu' and self._above_max_clockspeed() and not self.probe.corrupts_reads:
+            raise APIError(NrfjprogdllErr.JLINKARM_DLL_READ_ERROR, 'Transfer failed at {} kHz.'.format(self.probe.clockspeed_khz))
+
+    def _check_not_protected(self):
+        if self.probe.protected:
+            raise APIError(NrfjprogdllErr.NOT_AVAILABLE_BECAUSE_PROTECTION, 'The device is readback protected.')
+
+    def _above_max_clockspeed(self):
+        return self.probe.max_clockspeed_khz is not None and self.probe.clockspeed_khz > self.probe.max_clockspeed_khz
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    def dll_version(self):
+        return (5, 12, 'g')
+
+    def enum_emu_snr(self):
+        return sorted(PROBES)
+
+    def connect_to_emu_with_snr(self, serial_number, jlink_speed_khz=2000):
+        if serial_number not in PROBES:
+            raise APIError(NrfjprogdllErr.NO_EMULATOR_CONNECTED)
+        self.probe = PROBES[serial_number]
+        self.probe.clockspeed_khz = jlink_speed_khz
+        self._count('connect_to_emu')
+
+    def connect_to_emu_without_snr(self, jlink_speed_khz=2000):
+        if not PROBES:
+            raise APIError(NrfjprogdllErr.NO_EMULATOR_CONNECTED)
+        self.connect_to_emu_with_snr(sorted(PROBES)[0], jlink_speed_khz)
+
+    def read_connected_emu_snr(self):
+        return self.probe.snr
+
+    def disconnect_from_emu(self):
+        self.probe = None
+
+    def read_device_version(self):
+        self._count('read_device_version')
+        self._check_not_protected()
+        if self.probe.family != self.device_family:
+            raise APIError(NrfjprogdllErr.WRONG_FAMILY_FOR_DEVICE)
+        return self.probe.device_version
+
+    def read(self, addr, data_len):
+        self._count('read')
+        self._check_not_protected()
+        data = list(self.probe.read(addr, data_len))
+        if self._above_max_clockspeed():
+            data[0] ^= 0x01
+        return data
+
+    def read_u32(self, addr):
+        self._count('read_u32')
+        self._check_not_protected()
+        data = self.probe.read(addr, 4)
+        return data[0] | data[1] << 8 | data[2] << 16 | data[3] << 24
+
+    def write(self, addr, data, control):
+        self._count('write')
+        self.probe.write(addr, data)
+
+    def write_u32(self, addr, data, control):
+        self._count('write_u32')
+        self.probe.write(addr, bytearray([(data >> shift) & 0xFF for shift in (0, 8, 16, 24)]))
+
+    def erase_page(self, addr):
+        self._count('erase_page')
+        if addr >= UICR_START:
+            raise APIError(NrfjprogdllErr.INVALID_PARAMETER, 'Use erase_uicr to erase the UICR.')
+        self.probe.erase_page(addr)
+
+    def erase_uicr(self):
+        self._count('erase_uicr')
+        self.probe.erase_page(UICR_START)
+
+    def erase_all(self):
+        self._count('erase_all')
+        self.probe.erase_all()
+
+    def recover(self):
+        self._count('recover')
+        self.probe.erase_all()
+        self.probe.protected = False
+
+    def readback_protect(self, level):
+        self._count('readback_protect')
+
+    def read_cpu_register(self, register):
+        return 0
+
+    def halt(self):
+        self._count('halt')
+        self.probe.cpu.halt()
+
+    def go(self):
+        self._count('go')
+        self.probe.cpu.resume()
+
+    def run(self, pc, sp):
+        self._count('run')
+        self.probe.cpu.start(pc, sp)
+
+    def sys_reset(self):
+        self._count('sys_reset')
+        self.probe.cpu.reset()
+
+    def debug_reset(self):
+        self._count('debug_reset')
+        self.probe.cpu.reset()
+
+    def pin_reset(self):
+        self._count('pin_reset')
+        self.probe.cpu.reset()
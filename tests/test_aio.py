@@ -0,0 +1,143 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the asyncio interface against simulated probes.
+
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from intelhex import IntelHex
+
+from nrfjprog import aio
+
+import simulated_api
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAio(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probes = [simulated_api.add_probe(1234, latency=0.005), simulated_api.add_probe(5678, latency=0.005)]
+
+        self.directory = tempfile.mkdtemp()
+        self.hex_file = os.path.join(self.directory, 'app.hex')
+        hex_file = IntelHex()
+        hex_file.frombytes(bytearray(range(256)) * 16, offset=0x1000)
+        hex_file.write_hex_file(self.hex_file)
+
+    def tearDown(self):
+        simulated_api.uninstall()
+        shutil.rmtree(self.directory)
+
+    def test_probes_are_programmed_concurrently(self):
+        async def program(snr):
+            async with aio.Probe(snr=snr) as probe:
+                result = await probe.program(self.hex_file, erase='sectors', verify=True)
+                self.assertTrue(result.report.passed)
+                await probe.reset()
+                return await probe.memrd(0x1000, 8)
+
+        async def program_all():
+            return await asyncio.gather(*[program(probe.snr) for probe in self.probes])
+
+        self.assertEqual(run(program_all()), [bytes(bytearray(range(8)))] * 2)
+        for probe in self.probes:
+            self.assertEqual(probe.calls['connect_to_emu'], 1) # Connected once for all three calls.
+            self.assertEqual(probe.calls['sys_reset'], 1)
+
+    def test_event_loop_is_not_blocked(self):
+        self.probes[0].latency = 0.05
+        ticks = []
+
+        async def tick():
+            for _ in range(5):
+                ticks.append(time.time())
+                await asyncio.sleep(0.01)
+
+        async def read_while_ticking():
+            async with aio.Probe(snr=1234) as probe:
+                await asyncio.gather(probe.memrd(0x0, 4), tick())
+
+        run(read_while_ticking())
+
+        self.assertEqual(len(ticks), 5)
+        self.assertLess(ticks[-1] - ticks[0], 0.1)
+
+    def test_queued_command_can_be_cancelled(self):
+        self.probes[0].latency = 0.02
+
+        async def write_and_cancel():
+            async with aio.Probe(snr=1234) as probe:
+                first = asyncio.ensure_future(probe.memwr(0x20000000, 1))
+                second = asyncio.ensure_future(probe.memwr(0x20000004, 2))
+                await asyncio.sleep(0.01)
+                second.cancel()
+                await first
+                with self.assertRaises(asyncio.CancelledError):
+                    await second
+
+        run(write_and_cancel())
+
+        self.assertEqual(self.probes[0].ram[0:8], bytearray([1, 0, 0, 0, 0, 0, 0, 0]))
+
+    def test_invalid_options_raise_before_queueing(self):
+        async def program_with_typo():
+            async with aio.Probe(snr=1234) as probe:
+                await probe.program(self.hex_file, sectorserase=True)
+
+        with self.assertRaises(ValueError):
+            run(program_with_typo())
+
+        self.assertNotIn('connect_to_emu', self.probes[0].calls)
+
+    def test_errors_are_raised_to_the_caller(self):
+        async def run_from_zero():
+            async with aio.Probe(snr=1234) as probe:
+                await probe.call('run', pc=0x0)
+
+        with self.assertRaises(AssertionError):
+            run(run_from_zero())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,129 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the batch command against a simulated probe.
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from nrfjprog.model import batch
+
+import simulated_api
+from simulated_api import run_command
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
+S132_HEX = os.path.join(os.path.dirname(__file__), 'resources', 'ble_app_hrs_s132_with_dfu_pca10040.hex')
+
+
+class TestParseSteps(unittest.TestCase):
+
+    def test_quoted_semicolons_do_not_split_steps(self):
+        steps = batch.parse_steps('program -f "a;b.hex"; verify -f \'c;d.hex\' -q;reset -r # Not split; here.\nmemrd -a 0x0 -n my\\;file')
+
+        self.assertEqual(steps, [['program', '-f', 'a;b.hex'], ['verify', '-f', 'c;d.hex', '-q'], ['reset', '-r'], ['memrd', '-a', '0x0', '-n', 'my;file']])
+
+    def test_steps_are_split_on_lines_and_semicolons(self):
+        steps = batch.parse_steps('recover; program -f "my app.hex" --sectorserase\n# Comment.\nverify -f a.hex # Check.\nreset -r;')
+
+        self.assertEqual(steps, [['recover'], ['program', '-f', 'my app.hex', '--sectorserase'], ['verify', '-f', 'a.hex'], ['reset', '-r']])
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+
+        self.directory = tempfile.mkdtemp()
+        self.script = os.path.join(self.directory, 'script.txt')
+
+    def tearDown(self):
+        simulated_api.uninstall()
+        shutil.rmtree(self.directory)
+
+    def run_script(self, text):
+        with open(self.script, 'w') as file:
+            file.write(text)
+        run_command(['batch', '--script', self.script, '--snr', '1234', '-q'])
+
+    def test_steps_share_one_connection(self):
+        self.run_script('recover --family NRF52\n'
+                        'program -f {0} --sectorserase\n'
+                        'verify -f {0}\n'
+                        'memwr -a 0x20000000 --val 0x12345678; reset -r\n'.format(S132_HEX))
+
+        self.assertEqual(self.probe.calls['connect_to_emu'], 2) # The leading recover connects on its own.
+        self.assertEqual(self.probe.calls['recover'], 1)
+        self.assertEqual(self.probe.ram[0:4], bytearray([0x78, 0x56, 0x34, 0x12]))
+        self.assertEqual(self.probe.calls['sys_reset'], 1)
+
+    def test_protected_device_is_recovered_before_it_is_detected(self):
+        self.probe.protected = True
+
+        self.run_script('recover --family NRF52\nmemwr -a 0x20000000 --val 0x12345678\nmemwr -a 0x20000004 --val 0x1\n')
+
+        self.assertEqual(self.probe.calls['connect_to_emu'], 2)
+        self.assertEqual(self.probe.calls['recover'], 1)
+        self.assertEqual(self.probe.ram[0:8], bytearray([0x78, 0x56, 0x34, 0x12, 0x01, 0x00, 0x00, 0x00]))
+
+    def test_invalid_step_fails_before_connecting(self):
+        stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            with self.assertRaises(SystemExit):
+                self.run_script('recover\nprogram --nosuchoption\n')
+        finally:
+            sys.stderr = stderr
+
+        self.assertNotIn('connect_to_emu', self.probe.calls)
+
+    def test_failed_step_stops_the_batch(self):
+        with self.assertRaises(AssertionError) as context:
+            self.run_script('run --pc 0x0\nmemwr -a 0x20000000 --val 1\n')
+
+        self.assertIn('Step 1 (run --pc 0x0) failed', str(context.exception))
+        self.assertNotIn('write_u32', self.probe.calls)
+
+    def test_steps_can_not_select_another_debugger(self):
+        with self.assertRaises(AssertionError):
+            self.run_script('halt --snr 5678\n')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
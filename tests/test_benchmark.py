@@ -0,0 +1,63 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test that the benchmark suite runs, accounts for the simulated device time and measures memory use.
+
+"""
+
+import os
+import unittest
+
+import benchmark
+
+
+S132_HEX = os.path.join(os.path.dirname(__file__), 'resources', 'ble_app_hrs_s132_with_dfu_pca10040.hex')
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_every_operation_is_reported(self):
+        results = benchmark.run_benchmarks(repeats=1, latency=0.0001, hex_files=[S132_HEX])
+
+        self.assertEqual([result.operation for result in results], [operation for operation, _ in benchmark.OPERATIONS])
+        for result in results:
+            self.assertGreater(result.calls, 0)
+            self.assertGreater(result.device_seconds, 0)
+            self.assertLessEqual(result.overhead_seconds, result.wall_seconds)
+
+    def test_programming_memory_does_not_grow_with_the_image(self):
+        result = benchmark.run_memory_benchmarks(hex_files=[S132_HEX], operations=benchmark.MEMORY_OPERATIONS[:1])[0]
+
+        self.assertEqual(result.operation, 'program --verify')
+        self.assertLess(result.peak_allocated_bytes, 2 * result.image_bytes) # Not a list of ints, or a copy, of the whole image.
+        self.assertGreater(result.peak_rss_kb, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,136 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test --clockspeed auto against a simulated probe that only transfers reliably up to a maximum clock speed.
+
+"""
+
+import argparse
+import sys
+import unittest
+
+from nrfjprog.model import clockspeed
+
+import simulated_api
+from simulated_api import run_command
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
+class TestClockspeedHelpers(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(clockspeed.parse('auto'), clockspeed.AUTO)
+        self.assertEqual(clockspeed.parse('4000'), 4000)
+        with self.assertRaises(argparse.ArgumentTypeError):
+            clockspeed.parse('fast')
+
+    def test_slower(self):
+        self.assertEqual(clockspeed.slower(5000), 4000)
+        self.assertEqual(clockspeed.slower(4500), 4000)
+        self.assertIsNone(clockspeed.slower(clockspeed.SAFE_SPEED_KHZ))
+
+
+class TestAutoClockspeed(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+
+    def tearDown(self):
+        simulated_api.uninstall()
+
+    def memwr(self, value, speed='auto'):
+        run_command(['memwr', '-a', '0x20000000', '--val', str(value), '--snr', '1234', '-c', speed, '-q'])
+
+    def test_fastest_reliable_speed_is_found_and_cached(self):
+        self.probe.max_clockspeed_khz = 4000
+        self.memwr(1)
+
+        self.assertEqual(self.probe.clockspeed_khz, 4000)
+        self.assertEqual(clockspeed.cached(1234), 4000)
+        self.assertEqual(self.probe.ram[0], 1)
+
+    def test_corrupted_reads_fail_validation(self):
+        self.probe.max_clockspeed_khz = 2000
+        self.probe.corrupts_reads = True
+        self.memwr(1)
+
+        self.assertEqual(clockspeed.cached(1234), 2000)
+
+    def test_cached_speed_is_used_without_negotiating(self):
+        self.memwr(1)
+        self.assertEqual(clockspeed.cached(1234), clockspeed.SPEEDS_KHZ[-1])
+
+        self.probe.reset_counters()
+        self.memwr(2)
+
+        self.assertEqual(self.probe.calls['connect_to_emu'], 1)
+        self.assertEqual(self.probe.clockspeed_khz, clockspeed.SPEEDS_KHZ[-1])
+
+    def test_transfer_errors_back_off_to_a_slower_speed(self):
+        self.memwr(1)
+        self.probe.max_clockspeed_khz = 2000 # i.e. a longer cable.
+
+        self.memwr(2)
+
+        self.assertEqual(self.probe.ram[0], 2)
+        self.assertEqual(self.probe.clockspeed_khz, 2000)
+        self.assertEqual(clockspeed.cached(1234), 2000)
+
+    def test_transfer_errors_at_the_slowest_speed_are_raised(self):
+        self.probe.max_clockspeed_khz = 500
+
+        with self.assertRaises(AssertionError): # Reading the device version fails.
+            self.memwr(1)
+
+    def test_fixed_speed_is_not_negotiated(self):
+        self.memwr(1, speed='2000')
+
+        self.assertEqual(self.probe.calls['connect_to_emu'], 1)
+        self.assertEqual(self.probe.clockspeed_khz, 2000)
+        self.assertIsNone(clockspeed.cached(1234))
+
+    def test_commands_without_clockspeed_option_still_run(self):
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            run_command(['ids'])
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+
+        self.assertIn('1234', output)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,147 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test verifying with CRCs computed by a simulated probe running the CRC routine.
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+from intelhex import IntelHex
+
+from nrfjprog.model import crc_verify
+from nrfjprog.model import device
+from nrfjprog.model import verify
+
+import simulated_api
+from simulated_api import run_command
+
+
+class TestCrcRoutine(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+        self.api = simulated_api.API('NRF52')
+        self.api.connect_to_emu_with_snr(1234)
+        self.device = device.NRF5xDevice('NRF52_FP1')
+
+    def tearDown(self):
+        simulated_api.uninstall()
+
+    def test_crcs_match_zlib(self):
+        self.probe.flash[0x0 : 0x1000] = bytearray(range(256)) * 16
+
+        runner = crc_verify.CrcRunner(self.api, self.device)
+        crcs = runner.compute([(0x0, 0x1000), (0x3, 0x11), (0x1000, 0), (0x2000, 0x100)])
+
+        self.assertIsNone(self.probe.cpu.fault)
+        self.assertEqual(crcs, [zlib.crc32(bytes(self.probe.flash[0x0 : 0x1000])) & 0xFFFFFFFF,
+                                zlib.crc32(bytes(self.probe.flash[0x3 : 0x14])) & 0xFFFFFFFF,
+                                0,
+                                zlib.crc32(b'\xff' * 0x100) & 0xFFFFFFFF])
+
+    def test_routine_runs_from_reset_and_the_device_is_reset_after(self):
+        runner = crc_verify.CrcRunner(self.api, self.device)
+        runner.compute([(0x0, 0x10)])
+
+        self.assertEqual(self.probe.calls['sys_reset'], 2)
+        self.assertEqual(self.probe.cpu.sp, self.device.ram_end)
+        self.assertFalse(self.probe.cpu.interrupts_enabled)
+        self.assertFalse(self.probe.cpu.running)
+        self.assertIsNone(self.probe.cpu.pc)
+
+    def test_jobs_are_run_in_batches(self):
+        runner = crc_verify.CrcRunner(self.api, self.device)
+        runner.max_jobs = 3
+
+        self.assertEqual(runner.compute([(page * 0x1000, 0x10) for page in range(7)]), [zlib.crc32(b'\xff' * 0x10) & 0xFFFFFFFF] * 7)
+
+    def test_split_pages(self):
+        pieces = crc_verify.split_pages([(0xff0, b'\x00' * 0x1020)], 0x1000)
+
+        self.assertEqual([(addr, len(data)) for addr, data in pieces], [(0xff0, 0x10), (0x1000, 0x1000), (0x2000, 0x10)])
+
+    def test_only_mismatching_pages_are_read_back(self):
+        blocks = [(0x0, b'\xff' * 0x3000)]
+        self.probe.flash[0x1800] = 0x00
+
+        report = verify.VerifyReport(self.device.page_size)
+        crc_verify.verify(self.api, self.device, blocks, report)
+
+        self.assertEqual(report.mismatches, [(0x1800, 0x1801)])
+        self.assertEqual(report.pages(), [(0x0, True), (0x1000, False), (0x2000, True)])
+
+
+class TestCrcVerifyCommand(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+
+        self.directory = tempfile.mkdtemp()
+        self.hex_path = os.path.join(self.directory, 'image.hex') # Small, as the simulated CPU runs about a million instructions per second.
+
+        hex_file = IntelHex()
+        hex_file.puts(0x1000, bytes(bytearray(range(256)) * 8))
+        hex_file.puts(0x3000, b'\x5a' * 0x100)
+        hex_file.tofile(self.hex_path, format='hex')
+
+        run_command(['program', '-f', self.hex_path, '--sectorserase', '-q'])
+        self.probe.reset_counters()
+
+    def tearDown(self):
+        simulated_api.uninstall()
+        shutil.rmtree(self.directory)
+
+    def test_verify_reads_back_nothing_when_crcs_match(self):
+        run_command(['verify', '-f', self.hex_path, '--crcverify', '-q'])
+
+        self.assertLess(self.probe.bytes_read, 0x100)
+
+    def test_verify_fails_on_changed_byte(self):
+        self.probe.flash[0x1010] ^= 0xFF
+
+        with self.assertRaises(AssertionError) as context:
+            run_command(['verify', '-f', self.hex_path, '--crcverify', '-q'])
+
+        self.assertIn('0x1010', str(context.exception))
+
+    def test_program_with_crc_verify(self):
+        run_command(['program', '-f', self.hex_path, '--sectorserase', '--verify', '--crcverify', '-q'])
+
+        self.assertIsNone(self.probe.cpu.fault)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,83 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the parts of the DAPLink backend that do not need pyOCD, against a simulated target.
+
+"""
+
+import argparse
+import unittest
+
+from nrfjprog.model.perform_command_daplink import DapLink
+
+import simulated_api
+
+
+class SimulatedBoard(object):
+    """
+    The subset of a pyOCD MbedBoard the DAPLink backend uses to identify the target.
+
+    """
+    def __init__(self, probe):
+        self.target = self
+        self.probe = probe
+
+    def getTargetType(self):
+        return self.probe.family.lower()
+
+    def readBlockMemoryUnaligned8(self, addr, size):
+        return list(self.probe.read(addr, size))
+
+
+class TestDevice(unittest.TestCase):
+
+    def device(self, device_version, deviceversion=None):
+        board = SimulatedBoard(simulated_api.SimulatedProbe(1234, device_version))
+        return DapLink()._device(board, argparse.Namespace(deviceversion=deviceversion))
+
+    def test_nrf52(self):
+        nRF5_device = self.device('NRF52_FP1')
+
+        self.assertEqual(nRF5_device.family, 'NRF52')
+        self.assertEqual(nRF5_device.flash_end, 0x80000)
+        self.assertEqual(nRF5_device.page_size, 0x1000)
+
+    def test_nrf51(self):
+        nRF5_device = self.device('NRF51_XLR3')
+
+        self.assertEqual(nRF5_device.family, 'NRF51')
+        self.assertEqual(nRF5_device.flash_end, 0x40000)
+        self.assertEqual(nRF5_device.page_size, 0x400)
+
+    def test_deviceversion_is_used_as_given(self):
+        self.assertEqual(self.device('NRF52_FP1', deviceversion='NRF52_FP1_ENGA').ram_size, 0x4000)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,99 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test differential programming against a simulated probe.
+
+"""
+
+import os
+import unittest
+
+from intelhex import IntelHex
+
+from nrfjprog.model import flash_pages
+
+import simulated_api
+from simulated_api import run_command
+
+
+S132_HEX = os.path.join(os.path.dirname(__file__), 'resources', 'ble_app_hrs_s132_with_dfu_pca10040.hex')
+
+
+class TestDifferentialProgram(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+        self.image = IntelHex(S132_HEX)
+
+        run_command(['program', '-f', S132_HEX, '--sectorserase', '-q'])
+        self.probe.reset_counters()
+
+    def tearDown(self):
+        simulated_api.uninstall()
+
+    def assertImageOnDevice(self):
+        for start_addr, end_addr in self.image.segments():
+            self.assertEqual(self.probe.flash[start_addr : end_addr], bytearray(self.image.tobinarray(start=start_addr, size=end_addr - start_addr)))
+
+    def test_unchanged_image_is_not_rewritten(self):
+        run_command(['program', '-f', S132_HEX, '--differential', '-q'])
+
+        self.assertEqual(self.probe.page_erases, 0)
+        self.assertEqual(self.probe.bytes_written, 0)
+
+    def test_only_changed_page_is_rewritten(self):
+        self.probe.flash[0x1c010] = 0x00
+
+        run_command(['program', '-f', S132_HEX, '--differential', '--verify', '-q'])
+
+        self.assertEqual(self.probe.page_erases, 1)
+        self.assertEqual(self.probe.bytes_written, 0x1000)
+        self.assertImageOnDevice()
+
+    def test_each_page_is_read_once(self):
+        self.probe.flash[0x1c010] = 0x00
+        pages = len(flash_pages.image_pages(self.image, 0x1000))
+
+        run_command(['program', '-f', S132_HEX, '--differential', '-q'])
+
+        self.assertEqual(self.probe.bytes_read // 0x1000, pages) # Besides the pages, only a few words are read.
+
+    def test_blank_device_is_fully_programmed(self):
+        self.probe.erase_all()
+
+        run_command(['program', '-f', S132_HEX, '--differential', '-q'])
+
+        self.assertEqual(self.probe.page_erases, 0) # The pages read for the comparison were found blank.
+        self.assertEqual(self.probe.bytes_written, sum(end - start for start, end in self.image.segments()))
+        self.assertImageOnDevice()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,129 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the flash loader against a simulated probe that runs the loader's code.
+
+"""
+
+import os
+import unittest
+
+from intelhex import IntelHex
+
+from nrfjprog.model import device
+from nrfjprog.model import flash_loader
+
+import simulated_api
+from simulated_api import run_command
+
+
+S130_HEX = os.path.join(os.path.dirname(__file__), 'resources', 'ble_app_hrs_s130_with_dfu_pca10028.hex')
+S132_HEX = os.path.join(os.path.dirname(__file__), 'resources', 'ble_app_hrs_s132_with_dfu_pca10040.hex')
+
+
+class TestFlashLoader(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+        self.api = simulated_api.API('NRF52')
+        self.api.connect_to_emu_with_snr(1234)
+        self.loader = flash_loader.FlashLoader(self.api, device.NRF5xDevice('NRF52_FP1'), buffer_size=0x100)
+
+    def tearDown(self):
+        simulated_api.uninstall()
+
+    def test_buffers_alternate_and_are_written(self):
+        data = bytearray(range(256)) * 5
+
+        self.loader.start()
+        self.loader.write(0x2000, data)
+        self.loader.finish()
+
+        self.assertIsNone(self.probe.cpu.fault)
+        self.assertEqual(self.probe.flash[0x2000 : 0x2000 + len(data)], data)
+        self.assertEqual(self.probe.flash[0x2000 + len(data)], 0xFF)
+        self.assertEqual(self.probe.nvmc_config, 0)
+
+    def test_loader_runs_from_reset_with_interrupts_disabled(self):
+        self.loader.start()
+        self.loader.write(0x1000, b'\x01\x02\x03\x04')
+
+        self.assertEqual(self.probe.calls['sys_reset'], 1)
+        self.assertEqual(self.probe.cpu.sp, device.NRF5xDevice('NRF52_FP1').ram_end)
+        self.assertFalse(self.probe.cpu.interrupts_enabled)
+        self.assertIsNone(self.probe.cpu.fault)
+
+    def test_unaligned_data_leaves_neighbouring_bytes(self):
+        self.probe.flash[0x1000] = 0x55
+
+        self.loader.start()
+        self.loader.write(0x1001, b'\x01\x02\x03\x04\x05')
+        self.loader.finish()
+
+        self.assertEqual(self.probe.flash[0x1000 : 0x1008], bytearray([0x55, 1, 2, 3, 4, 5, 0xFF, 0xFF]))
+
+    def test_stopped_loader_is_detected(self):
+        self.loader.timeout = 0.01
+        self.loader.start()
+        self.api.halt()
+
+        self.loader.write(0x0, b'\x00' * 0x100)
+        self.loader.write(0x100, b'\x00' * 0x100)
+        with self.assertRaises(AssertionError):
+            self.loader.write(0x200, b'\x00' * 0x100)
+
+
+class TestProgramWithFlashLoader(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+
+    def tearDown(self):
+        simulated_api.uninstall()
+
+    def assertProgrammed(self, hex_path, device_version):
+        probe = simulated_api.add_probe(1234, device_version)
+        run_command(['program', '-f', hex_path, '--sectorserase', '--flashloader', '--verify', '-q'])
+
+        image = IntelHex(hex_path)
+        for start_addr, end_addr in image.segments():
+            self.assertEqual(probe.flash[start_addr : end_addr], bytearray(image.tobinarray(start=start_addr, size=end_addr - start_addr)))
+        self.assertIsNone(probe.cpu.fault)
+        self.assertGreater(probe.cpu.steps, 0)
+
+    def test_nrf52(self):
+        self.assertProgrammed(S132_HEX, 'NRF52_FP1')
+
+    def test_nrf51(self):
+        self.assertProgrammed(S130_HEX, 'NRF51_XLR3')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
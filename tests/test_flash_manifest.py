@@ -0,0 +1,193 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the flash manifest, and incremental programming with it against a simulated probe.
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from intelhex import IntelHex
+
+import nrfjprog
+from nrfjprog.model import crc_verify
+from nrfjprog.model import flash_manifest
+from nrfjprog.model import flash_pages
+from nrfjprog.model.device import NRF5xDevice
+from nrfjprog.model.flash_image import FlashImage
+
+import simulated_api
+
+
+class TestManifest(unittest.TestCase):
+
+    def test_every_page_is_compared(self):
+        image = FlashImage([(0x1000, b'\x01' * 0x3000)])
+        manifest = flash_manifest.Manifest.for_image(image, '0000000000000000', 0x1000)
+        device = NRF5xDevice('NRF52_FP1')
+        read = lambda addr, size: b'\x00' * size
+        page_crcs = [flash_pages.page_digest(b'\x01' * 0x1000)] * 3
+        regions = []
+
+        self.assertTrue(manifest.matches(read, device, lambda pages: regions.extend(pages) or page_crcs))
+        self.assertEqual(regions, [(0x1000, 0x1000), (0x2000, 0x1000), (0x3000, 0x1000)])
+        self.assertFalse(manifest.matches(read, device, lambda pages: page_crcs[:2] + [0]))
+
+    def test_pages_with_unknown_contents_are_left_out(self):
+        image = FlashImage([(0x1000, b'\x01' * 0x2000)])
+        manifest = flash_manifest.Manifest.for_image(image, '00', 0x1000, skip_ranges=[(0x2800, 0x2810)])
+
+        self.assertEqual(list(manifest.pages), [0x1000])
+
+
+class TestIncrementalProgram(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+
+        self.directory = tempfile.mkdtemp()
+        self.hex_file = os.path.join(self.directory, 'app.hex')
+        self._write_hex(b'\x11' * 0x4000)
+
+    def tearDown(self):
+        simulated_api.uninstall()
+        shutil.rmtree(self.directory)
+
+    def _write_hex(self, data):
+        hex_file = IntelHex()
+        hex_file.frombytes(bytearray(data), offset=0x1000)
+        hex_file.write_hex_file(self.hex_file)
+
+    def _program_changed_image(self):
+        with nrfjprog.Session(snr=1234) as session:
+            session.program(self.hex_file, erase='sectors')
+
+        self._write_hex(b'\x11' * 0x2000 + b'\x22' * 0x10 + b'\x11' * 0x1FF0)
+
+        with nrfjprog.Session(snr=1234) as session:
+            self.probe.reset_counters() # Only count what program does, not connecting.
+            return session.program(self.hex_file, incremental=True, verify=True)
+
+    def test_only_changed_pages_are_programmed_without_reading_them(self):
+        result = self._program_changed_image()
+
+        self.assertTrue(result.used_manifest)
+        self.assertEqual((result.changed_pages, result.pages), (1, 4))
+        self.assertEqual(self.probe.page_erases, 1)
+        self.assertEqual(self.probe.bytes_read, 0x1000 + 2 * flash_manifest.DEVICE_ID_SIZE + 4 + 4 * crc_verify.JOB.size) # The changed page's verify, and the fingerprint: DEVICEID and the CRC routine's DONE and jobs.
+        self.assertEqual(self.probe.flash[0x3000 : 0x3010], bytearray(b'\x22' * 0x10))
+
+    def test_pages_the_manifest_knows_are_blank_are_not_erased(self):
+        self._write_hex(b'\x11' * 0x1000 + b'\xff' * 0x1000)
+        with nrfjprog.Session(snr=1234) as session:
+            session.program(self.hex_file, erase='sectors')
+
+        self._write_hex(b'\x11' * 0x1000 + b'\x22' * 0x1000)
+        with nrfjprog.Session(snr=1234) as session:
+            self.probe.reset_counters()
+            result = session.program(self.hex_file, incremental=True)
+
+        self.assertEqual((result.changed_pages, result.skipped_erases), (1, 1))
+        self.assertEqual(self.probe.page_erases, 0)
+        self.assertEqual(self.probe.bytes_read, 2 * flash_manifest.DEVICE_ID_SIZE + 4 + 2 * crc_verify.JOB.size)
+        self.assertEqual(self.probe.flash[0x2000 : 0x3000], bytearray(b'\x22' * 0x1000))
+
+    def test_replaced_device_is_read_back(self):
+        self.probe._set_ficr_word(0x60, 0x12345678) # DEVICEID[0]
+        with nrfjprog.Session(snr=1234) as session:
+            session.program(self.hex_file, erase='sectors')
+        self.probe._set_ficr_word(0x60, 0x87654321)
+
+        with nrfjprog.Session(snr=1234) as session:
+            result = session.program(self.hex_file, incremental=True)
+
+        self.assertFalse(result.used_manifest)
+        self.assertEqual(result.changed_pages, 0)
+
+    def test_device_programmed_by_other_means_is_read_back(self):
+        with nrfjprog.Session(snr=1234) as session:
+            session.program(self.hex_file, erase='sectors')
+        self.probe.flash[0x3800 : 0x3804] = b'\x00' * 4
+
+        with nrfjprog.Session(snr=1234) as session:
+            result = session.program(self.hex_file, incremental=True)
+
+        self.assertFalse(result.used_manifest)
+        self.assertEqual(result.changed_pages, 1)
+        self.assertEqual(self.probe.flash[0x3800 : 0x3804], bytearray(b'\x11' * 4))
+
+    def test_program_without_snr_updates_the_manifest(self):
+        with nrfjprog.Session(snr=1234) as session:
+            session.program(self.hex_file, erase='sectors')
+
+        other_hex_file = os.path.join(self.directory, 'other.hex')
+        hex_file = IntelHex()
+        hex_file.frombytes(bytearray(b'\x11' * 0x1000 + b'\x33' * 0x1000 + b'\x11' * 0x2000), offset=0x1000)
+        hex_file.write_hex_file(other_hex_file)
+        with nrfjprog.Session() as session:
+            session.program(other_hex_file, erase='sectors')
+
+        with nrfjprog.Session(snr=1234) as session:
+            result = session.program(self.hex_file, incremental=True, verify=True)
+
+        self.assertTrue(result.used_manifest)
+        self.assertEqual(result.changed_pages, 1)
+        self.assertTrue(result.report.passed)
+
+    def test_pages_written_by_memwr_are_forgotten(self):
+        with nrfjprog.Session(snr=1234) as session:
+            session.program(self.hex_file, erase='sectors')
+            session.memwr(0x2004, 0)
+
+        manifest = flash_manifest.Manifest.load(1234)
+        self.assertEqual(sorted(manifest.pages), [0x1000, 0x3000, 0x4000])
+
+        with nrfjprog.Session(snr=1234) as session:
+            result = session.program(self.hex_file, incremental=True)
+        self.assertEqual(result.changed_pages, 1)
+        self.assertEqual(self.probe.flash[0x2004 : 0x2008], bytearray(b'\x11' * 4))
+
+    def test_failed_verify_forgets_the_manifest(self):
+        with nrfjprog.Session(snr=1234) as session:
+            session.program(self.hex_file, erase='sectors')
+        self.probe.flash[0x1000] = 0x00
+
+        with nrfjprog.Session(snr=1234) as session:
+            result = session.program(self.hex_file, verify=True) # Writes over the 0x00 without erasing.
+
+        self.assertFalse(result.report.passed)
+        self.assertIsNone(flash_manifest.Manifest.load(1234))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,112 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test gang programming against several simulated probes.
+
+"""
+
+import os
+import time
+import unittest
+
+from nrfjprog.__main__ import Nrfjprog
+from nrfjprog.model import flash_manifest
+from nrfjprog.model import gang
+from nrfjprog.model import probe_cache
+from nrfjprog.model import write_plan
+from nrfjprog.model.perform_command_jlink import JLink
+
+import simulated_api
+
+
+S132_HEX = os.path.join(os.path.dirname(__file__), 'resources', 'ble_app_hrs_s132_with_dfu_pca10040.hex')
+
+PROBE_LATENCY = 0.005
+
+
+class TestGangProgram(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        for snr in (101, 102, 103, 104):
+            simulated_api.add_probe(snr, latency=PROBE_LATENCY)
+
+    def tearDown(self):
+        simulated_api.uninstall()
+
+    def parse_args(self, argv):
+        return Nrfjprog().parse_args(argv)
+
+    def test_multiple_snr_arguments_select_gang_mode(self):
+        args = self.parse_args(['program', '-f', S132_HEX, '-s', '101', '-s', '102'])
+        self.assertEqual(args.gang_snrs, [101, 102])
+        self.assertIsNone(args.snr)
+
+        args = self.parse_args(['program', '-f', S132_HEX, '-s', '101'])
+        self.assertIsNone(args.gang_snrs)
+        self.assertEqual(args.snr, 101)
+
+    def test_probes_are_programmed_in_parallel(self):
+        args = self.parse_args(['program', '-f', S132_HEX, '--sectorserase', '--allprobes'])
+
+        start_time = time.time()
+        results = gang.program(args, simulated_api.PROBES.keys())
+        total_seconds = time.time() - start_time
+
+        self.assertEqual([result.snr for result in results], [101, 102, 103, 104])
+        self.assertTrue(all(result.passed for result in results))
+        self.assertLess(total_seconds, sum(result.seconds for result in results) * 0.75)
+
+    def test_cache_updates_of_every_probe_are_kept(self):
+        for snr in range(105, 109):
+            simulated_api.add_probe(snr, latency=PROBE_LATENCY)
+        for probe in simulated_api.PROBES.values():
+            probe.flash[0x1000] = 0x00 # So every probe erases and measures the erase.
+        args = self.parse_args(['program', '-f', S132_HEX, '--sectorserase', '--allprobes'])
+
+        results = gang.program(args, simulated_api.PROBES.keys())
+
+        self.assertTrue(all(result.passed for result in results))
+        for name in ('devices', flash_manifest.CACHE_NAME, write_plan.ERASE_TIMINGS_CACHE_NAME):
+            cache = probe_cache.ProbeCache(name)
+            self.assertEqual([snr for snr in simulated_api.PROBES if cache.get(snr) is None], [], name)
+
+    def test_failing_probe_is_reported(self):
+        args = self.parse_args(['program', '-f', S132_HEX, '-s', '101', '-s', '999', '-q'])
+
+        with self.assertRaises(AssertionError):
+            JLink().program(args)
+
+        results = gang.program(args, args.gang_snrs)
+        self.assertTrue(results[0].passed)
+        self.assertFalse(results[1].passed)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
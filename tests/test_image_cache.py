@@ -0,0 +1,107 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the cache of parsed hex files.
+
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from intelhex import IntelHex
+
+from nrfjprog.model import image_cache, probe_cache
+
+
+RESOURCES = os.path.join(os.path.dirname(__file__), 'resources')
+S130_HEX = os.path.join(RESOURCES, 'ble_app_hrs_s130_with_dfu_pca10028.hex')
+S132_HEX = os.path.join(RESOURCES, 'ble_app_hrs_s132_with_dfu_pca10040.hex')
+
+
+class TestImageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.environ.get(probe_cache.CACHE_DIR_ENV)
+        os.environ[probe_cache.CACHE_DIR_ENV] = self.directory
+
+    def tearDown(self):
+        if self.cache_dir is None:
+            del os.environ[probe_cache.CACHE_DIR_ENV]
+        else:
+            os.environ[probe_cache.CACHE_DIR_ENV] = self.cache_dir
+        shutil.rmtree(self.directory)
+
+    def assertSameImage(self, image, hex_file):
+        self.assertEqual(image.segments(), hex_file.segments())
+        for start_addr, end_addr in hex_file.segments():
+            self.assertEqual(bytes(image.tobinarray(start=start_addr, size=end_addr - start_addr)),
+                             bytes(hex_file.tobinarray(start=start_addr, size=end_addr - start_addr)))
+
+    def test_second_load_comes_from_cache(self):
+        first = image_cache.load(S132_HEX)
+        second = image_cache.load(S132_HEX)
+
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertSameImage(second, IntelHex(S132_HEX))
+        self.assertEqual(len(os.listdir(image_cache.cache_dir())), 1)
+
+    def test_cache_is_keyed_by_content(self):
+        copy = os.path.join(self.directory, 'copy.hex')
+        shutil.copy(S132_HEX, copy)
+
+        image_cache.load(S132_HEX)
+        self.assertTrue(image_cache.load(copy).cached)
+
+    def test_no_image_cache(self):
+        image_cache.load(S132_HEX, use_cache=False)
+        self.assertFalse(os.path.exists(image_cache.cache_dir()))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        image_cache.load(S130_HEX)
+        entry_size = os.path.getsize(os.path.join(image_cache.cache_dir(), os.listdir(image_cache.cache_dir())[0]))
+        time.sleep(0.01)
+        image_cache.load(S132_HEX, size_limit=entry_size * 1.5)
+
+        self.assertEqual(len(os.listdir(image_cache.cache_dir())), 1)
+        self.assertTrue(image_cache.load(S132_HEX).cached)
+
+    def test_gaps_are_filled(self):
+        image = image_cache.load(S132_HEX)
+        data = image.tobinarray(start=0x960, size=0x10)
+
+        self.assertEqual(bytes(data[4:]), b'\xff' * 12)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
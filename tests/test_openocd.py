@@ -0,0 +1,189 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the OpenOCD TCL RPC client and the OpenOCD commands against a stand-in server that speaks the TCL RPC protocol.
+
+"""
+
+import os
+import re
+import subprocess
+import sys
+import threading
+import unittest
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from nrfjprog.__main__ import Nrfjprog
+from nrfjprog.model import openocd_rpc
+from nrfjprog.model.perform_command_openocd import OpenOCD
+
+
+class StandInServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """
+    Answers the commands nrfjprog sends like OpenOCD would, over a byte array of target memory.
+
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        socketserver.TCPServer.__init__(self, ('127.0.0.1', 0), StandInHandler)
+        self.memory = bytearray(b'\xff' * 0x10000)
+        self.commands = []
+        self.connections = 0
+
+    def evaluate(self, command):
+        self.commands.append(command)
+        words = command.split(' ', 3)
+
+        if words[0] == 'read_memory':
+            addr, count = int(words[1], 0), int(words[3], 0)
+            return ' '.join(hex(value) for value in self.memory[addr : addr + count])
+        if words[0] in ('halt', 'reset', 'resume', 'program', 'mww', 'flash', 'nrf51', 'nrf52'):
+            return ''
+        if words[0] == 'version':
+            return 'Open On-Chip Debugger (stand-in)'
+        raise ValueError('invalid command name "{}"'.format(words[0]))
+
+
+class StandInHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        self.server.connections += 1
+        buffer = b''
+        while True:
+            data = self.request.recv(4096)
+            if not data:
+                return
+            buffer += data
+
+            while openocd_rpc.TERMINATOR in buffer:
+                request, _, buffer = buffer.partition(openocd_rpc.TERMINATOR)
+                command = re.search(r'\[catch \{(.*)\} _nrfjprog_result\]', request.decode('utf-8')).group(1)
+                try:
+                    response = '0 ' + self.server.evaluate(command)
+                except ValueError as error:
+                    response = '1 ' + str(error)
+                self.request.sendall(response.encode('utf-8') + openocd_rpc.TERMINATOR)
+
+
+class TestOpenOCD(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.rpc = openocd_rpc.connect('127.0.0.1', self.server.server_address[1], start_server=False)
+
+    def tearDown(self):
+        self.rpc.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def run_command(self, argv):
+        args = Nrfjprog().parse_args(argv + ['--openocd'])
+
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            getattr(OpenOCD(self.rpc), args.command)(args)
+            return sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+
+    def test_read_memory(self):
+        self.server.memory[0x100 : 0x104] = bytearray([0x00, 0x12, 0xab, 0xff])
+
+        self.assertEqual(self.rpc.read_memory(0x100, 4), bytearray([0x00, 0x12, 0xab, 0xff]))
+        self.assertEqual(self.rpc.read_memory(0x100, 0), bytearray())
+
+    def test_failed_command_raises(self):
+        with self.assertRaises(openocd_rpc.OpenOCDError):
+            self.rpc.command('no_such_command')
+
+    def test_commands_share_one_connection(self):
+        self.run_command(['halt'])
+        self.run_command(['memrd', '-a', '0x0', '-l', '8'])
+        self.run_command(['reset'])
+
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.commands, ['halt', 'read_memory 0 8 8', 'reset'])
+
+    def test_memrd_prints_memory(self):
+        self.server.memory[0x20 : 0x24] = bytearray([1, 2, 3, 4])
+
+        output = self.run_command(['memrd', '-a', '0x20', '-l', '4'])
+
+        self.assertIn('0x20: [1, 2, 3, 4]', output)
+
+    def test_program_sends_absolute_path(self):
+        self.run_command(['program', '-f', 'image.hex'])
+
+        self.assertEqual(self.server.commands, ['program {' + os.path.abspath('image.hex') + '} verify reset'])
+
+    def test_program_erases_as_asked(self):
+        program = 'program {' + os.path.abspath('image.hex') + '} verify reset'
+
+        self.run_command(['program', '-f', 'image.hex', '--eraseall'])
+        self.run_command(['program', '-f', 'image.hex', '--sectorsanduicrerase'])
+        self.run_command(['program', '-f', 'image.hex', '--erase', 'auto'])
+
+        self.assertEqual(self.server.commands, ['nrf52 mass_erase', program, 'flash erase_sector 1 0 last', program, program])
+
+    def test_erase_uses_the_family_of_the_device_version(self):
+        self.run_command(['erase', '--deviceversion', 'NRF51_XLR3'])
+        self.run_command(['erase'])
+
+        self.assertEqual(self.server.commands, ['nrf51 mass_erase', 'nrf52 mass_erase'])
+
+    def test_started_server_is_stopped_with_the_connection(self):
+        rpc = openocd_rpc.connect('127.0.0.1', self.server.server_address[1], start_server=False)
+        rpc.server = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']) # Stands in for the OpenOCD connect() starts.
+        server = rpc.server
+
+        openocd = OpenOCD()
+        openocd.rpc = rpc
+        openocd.halt(Nrfjprog().parse_args(['halt', '--openocd']))
+
+        self.assertIsNone(openocd.rpc)
+        self.assertIsNotNone(server.poll())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,98 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the per-debugger device family cache against simulated probes.
+
+"""
+
+import time
+import unittest
+
+from nrfjprog.__main__ import Nrfjprog
+from nrfjprog.model import probe_cache
+from nrfjprog.model.perform_command_jlink import SetupCommand
+
+import simulated_api
+
+
+def connect(argv):
+    nrf = SetupCommand(Nrfjprog().parse_args(argv))
+    nrf.cleanup()
+
+
+class TestDeviceCache(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+
+    def tearDown(self):
+        simulated_api.uninstall()
+
+    def test_nrf51_family_is_cached(self):
+        probe = simulated_api.add_probe(51, 'NRF51_XLR3')
+
+        connect(['halt', '-s', '51'])
+        self.assertEqual(probe.calls['read_device_version'], 2) # NRF52 is guessed first.
+
+        probe.reset_counters()
+        connect(['halt', '-s', '51'])
+        self.assertNotIn('read_device_version', probe.calls)
+        self.assertEqual(probe_cache.ProbeCache('devices').get(51), {'family': 'NRF51', 'device_version': 'NRF51_XLR3'})
+
+    def test_replaced_target_invalidates_entry(self):
+        probe_cache.ProbeCache('devices').put(52, {'family': 'NRF51', 'device_version': 'NRF51_XLR3'})
+        simulated_api.add_probe(52, 'NRF52_FP1')
+
+        nrf = SetupCommand(Nrfjprog().parse_args(['halt', '-s', '52']))
+        self.assertEqual(nrf.device_version, 'NRF52_FP1')
+        nrf.cleanup()
+
+        self.assertEqual(probe_cache.ProbeCache('devices').get(52), {'family': 'NRF52', 'device_version': 'NRF52_FP1'})
+
+    def test_entries_expire(self):
+        cache = probe_cache.ProbeCache('devices', ttl=0)
+        cache.put(1, {'family': 'NRF52'})
+        time.sleep(0.01)
+
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(probe_cache.ProbeCache('devices').get(1), {'family': 'NRF52'})
+
+    def test_commands_without_snr_use_the_connected_debugger(self):
+        probe = simulated_api.add_probe(53)
+
+        connect(['halt'])
+        self.assertEqual(probe_cache.ProbeCache('devices').get(53), {'family': 'NRF52', 'device_version': 'NRF52_FP1'})
+
+        probe.reset_counters()
+        connect(['halt'])
+        self.assertNotIn('read_device_version', probe.calls)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
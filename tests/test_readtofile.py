@@ -0,0 +1,105 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the readtofile output formats against a simulated probe.
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from intelhex import IntelHex
+
+from nrfjprog.__main__ import Nrfjprog
+from nrfjprog.model import memory_dump
+
+import simulated_api
+from simulated_api import run_command
+
+
+class TestReadToFile(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+        self.probe.flash[0x100 : 0x108] = b'\x01\x02\x03\x04\x05\x06\x07\x08'
+        self.probe.uicr[0x14 : 0x18] = b'\x00\x10\x00\x00'
+
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'dump')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        simulated_api.uninstall()
+
+    def read_file(self):
+        with open(self.path, 'rb') as file:
+            return file.read()
+
+    def test_bin_is_read_in_chunks(self):
+        run_command(['readtofile', '-f', self.path, '--format', 'bin', '--chunksize', '0x10000', '-q'])
+
+        self.assertEqual(self.read_file(), bytes(self.probe.flash))
+        self.assertEqual(self.probe.calls['read'], len(self.probe.flash) // 0x10000)
+
+    def test_hex(self):
+        run_command(['readtofile', '-f', self.path, '--format', 'hex', '--readcode', '--readuicr', '-q'])
+
+        hex_file = IntelHex(self.path)
+        self.assertEqual(hex_file.segments(), [(0, len(self.probe.flash)), (0x10001000, 0x10001000 + len(self.probe.uicr))])
+        self.assertEqual(bytes(hex_file.tobinarray(start=0x100, size=8)), b'\x01\x02\x03\x04\x05\x06\x07\x08')
+        self.assertEqual(bytes(hex_file.tobinarray(start=0x10001014, size=4)), b'\x00\x10\x00\x00')
+
+    def test_text(self):
+        run_command(['readtofile', '-f', self.path, '--readuicr', '--chunksize', '0x100', '-q'])
+
+        lines = self.read_file().decode('ascii').splitlines()
+        self.assertEqual(lines[0], '----------UICR----------')
+        self.assertEqual(lines[2], '0x10001000: [255, 255, 255, 255]')
+        self.assertIn('0x10001014: [0, 16, 0, 0]', lines)
+        self.assertEqual(len([line for line in lines if line.startswith('0x')]), len(self.probe.uicr) // 4)
+
+    def test_bin_holds_one_region(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'kept')
+
+        with self.assertRaises(AssertionError):
+            memory_dump.dump(self.probe.read, [('Code FLASH', 0, 0x10), ('UICR', 0x10001000, 0x10)], self.path, 'bin')
+        self.assertEqual(self.read_file(), b'kept') # Checked before the file is opened.
+
+    def test_chunk_size_must_be_a_positive_multiple_of_4(self):
+        for chunk_size in ('0', '-4', '6', 'x'):
+            with self.assertRaises(SystemExit):
+                Nrfjprog().parse_args(['readtofile', '-f', self.path, '--chunksize', chunk_size])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
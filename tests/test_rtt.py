@@ -0,0 +1,129 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the rtt command against a simulated firmware that writes to its RTT up-buffers from a thread.
+
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import nrfjprog
+from nrfjprog.model import probe_cache
+from nrfjprog.model import rtt
+
+import simulated_api
+from simulated_api import run_command
+
+
+class TestLineWriter(unittest.TestCase):
+
+    def test_single_channel_is_written_as_is(self):
+        file = io.BytesIO()
+        writer = rtt.LineWriter(file, [0])
+        writer.write(0, b'partial')
+        writer.close()
+
+        self.assertEqual(file.getvalue(), b'partial')
+
+    def test_lines_of_several_channels_are_prefixed(self):
+        file = io.BytesIO()
+        writer = rtt.LineWriter(file, [0, 1])
+        writer.write(0, b'a\nb')
+        writer.write(1, b'c\n')
+        writer.write(0, b'b\n')
+        writer.write(1, b'd')
+        writer.close()
+
+        self.assertEqual(file.getvalue(), b'[0] a\n[1] c\n[0] bb\n[1] d\n')
+
+
+class TestRtt(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+
+        self.directory = tempfile.mkdtemp()
+        self.outfile = os.path.join(self.directory, 'rtt.log')
+
+    def tearDown(self):
+        simulated_api.uninstall()
+        shutil.rmtree(self.directory)
+
+    def test_lines_of_several_channels_are_streamed_in_order(self):
+        firmware = simulated_api.SimulatedRtt(self.probe, channels=2)
+        lines = [(index % 2, 'line {}\n'.format(index).encode('ascii')) for index in range(200)] # Much more than the buffers hold.
+        firmware.start(lines)
+
+        run_command(['rtt', '--channel', '0', '--channel', '1', '--outfile', self.outfile, '--duration', '1', '-q'])
+        firmware.join()
+
+        with open(self.outfile, 'rb') as file:
+            output = file.read().splitlines()
+        self.assertEqual([line for line in output if line.startswith(b'[0] ')], [b'[0] ' + data.rstrip() for channel, data in lines if channel == 0])
+        self.assertEqual([line for line in output if line.startswith(b'[1] ')], [b'[1] ' + data.rstrip() for channel, data in lines if channel == 1])
+
+    def test_control_block_location_is_cached_until_the_next_program(self):
+        firmware = simulated_api.SimulatedRtt(self.probe)
+        firmware.write(0, b'hello')
+
+        with nrfjprog.Session(snr=1234) as session:
+            self.assertEqual(session.rtt().addr, firmware.addr)
+            self.probe.reset_counters()
+            control_block = session.rtt()
+            self.assertEqual(control_block.poll([0]), {0: b'hello'})
+            self.assertEqual(control_block.poll([0]), {0: b''})
+
+        self.assertLess(self.probe.bytes_read, 0x100) # The cached block's header, not a search of RAM.
+        self.assertEqual(probe_cache.ProbeCache(rtt.CACHE_NAME).get(1234), {'addr': firmware.addr})
+
+        hex_file = os.path.join(self.directory, 'app.hex')
+        with open(hex_file, 'w') as file:
+            file.write(':0400000001020304F2\n:00000001FF\n')
+        with nrfjprog.Session(snr=1234) as session:
+            session.program(hex_file, erase='sectors')
+        self.assertIsNone(probe_cache.ProbeCache(rtt.CACHE_NAME).get(1234))
+
+    def test_control_block_across_search_chunks_is_found(self):
+        firmware = simulated_api.SimulatedRtt(self.probe, addr=simulated_api.RAM_START + 0x4000 - 8)
+
+        with nrfjprog.Session(snr=1234) as session:
+            self.assertEqual(rtt.search(session.api, session.device.ram_start, session.device.ram_size, 0x4000), firmware.addr)
+
+    def test_firmware_without_rtt(self):
+        with nrfjprog.Session(snr=1234) as session:
+            self.assertRaises(AssertionError, session.rtt)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,160 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the Session API against a simulated probe.
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from intelhex import IntelHex
+
+import nrfjprog
+from nrfjprog.model import flash_manifest
+
+import simulated_api
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+
+        self.directory = tempfile.mkdtemp()
+        self.hex_file = os.path.join(self.directory, 'app.hex')
+        hex_file = IntelHex()
+        hex_file.frombytes(bytearray(range(256)) * 8, offset=0x1000)
+        hex_file.write_hex_file(self.hex_file)
+
+    def tearDown(self):
+        simulated_api.uninstall()
+        shutil.rmtree(self.directory)
+
+    def test_connection_is_kept_for_the_session(self):
+        with nrfjprog.Session(snr=1234) as session:
+            session.memwr(0x20000000, 0x12345678)
+            data = session.memrd(0x20000000, 4)
+            session.reset()
+            api = session.api
+
+        self.assertEqual(data, b'\x78\x56\x34\x12')
+        self.assertEqual(self.probe.calls['connect_to_emu'], 1)
+        self.assertEqual(self.probe.calls['sys_reset'], 1)
+        self.assertIsNone(api.probe) # Disconnected on leaving the with block.
+
+    def test_readregs_returns_values_by_name(self):
+        with nrfjprog.Session(snr=1234) as session:
+            registers = session.readregs()
+
+        self.assertEqual(list(registers)[:2], ['R0', 'R1'])
+        self.assertEqual(registers['R15'], 0)
+
+    def test_program_returns_plan_and_report(self):
+        self.probe.flash[0x1000] = 0x00
+
+        with nrfjprog.Session(snr=1234) as session:
+            result = session.program(self.hex_file, erase='sectors', verify=True, reset='system')
+
+        self.assertEqual(result.plan.erase_pages(), [0x1000])
+        self.assertEqual(self.probe.page_erases, 1)
+        self.assertTrue(result.report.passed)
+        self.assertEqual(self.probe.flash[0x1000 : 0x1800], bytearray(range(256)) * 8)
+        self.assertEqual(self.probe.calls['sys_reset'], 1)
+
+    def test_blank_pages_are_not_erased(self):
+        self.probe.flash[0x2000] = 0x00 # Only one of the two pages the image touches needs erasing.
+        hex_file = IntelHex()
+        hex_file.frombytes(bytearray(0x2000), offset=0x1000)
+        hex_file.write_hex_file(self.hex_file)
+
+        with nrfjprog.Session(snr=1234) as session:
+            result = session.program(self.hex_file, erase='sectors')
+
+        self.assertEqual(result.plan.erase_pages(), [0x2000])
+        self.assertEqual(result.skipped_erases, 1)
+        self.assertEqual(self.probe.page_erases, 1)
+        self.assertEqual(self.probe.flash[0x1000 : 0x3000], bytearray(0x2000))
+
+    def test_pages_erased_in_the_session_are_not_read_or_erased_again(self):
+        self.probe.flash[0x1000] = 0x00
+
+        with nrfjprog.Session(snr=1234) as session:
+            session.erase(page=0x1000)
+            self.probe.reset_counters()
+            result = session.program(self.hex_file, erase='sectors')
+
+        self.assertEqual(result.skipped_erases, 1)
+        self.assertEqual(self.probe.page_erases, 0)
+        self.assertEqual(self.probe.bytes_read, flash_manifest.DEVICE_ID_SIZE) # Only the DEVICEID, for the manifest.
+
+    def test_first_page_is_erased_alone(self):
+        self.probe.flash[0x0] = 0x00
+        self.probe.flash[0x1000] = 0x00
+
+        with nrfjprog.Session(snr=1234) as session:
+            session.erase(page=0x0)
+
+        self.assertEqual(self.probe.flash[0x0], 0xFF)
+        self.assertEqual(self.probe.flash[0x1000], 0x00)
+        self.assertNotIn('erase_all', self.probe.calls)
+
+    def test_written_pages_are_erased_again(self):
+        with nrfjprog.Session(snr=1234) as session:
+            session.program(self.hex_file, erase='sectors')
+            result = session.program(self.hex_file, erase='sectors')
+
+        self.assertEqual(result.skipped_erases, 0)
+        self.assertEqual(self.probe.page_erases, 1)
+
+    def test_failed_verify_is_returned_not_raised(self):
+        with nrfjprog.Session(snr=1234) as session:
+            report = session.verify(self.hex_file)
+
+        self.assertFalse(report.passed)
+        self.assertEqual(report.mismatches[0][0], 0x1000)
+
+    def test_dry_run_does_not_touch_flash(self):
+        with nrfjprog.Session(snr=1234) as session:
+            result = session.program(self.hex_file, erase='all', dryrun=True)
+
+        self.assertTrue(result.plan.erase_all)
+        self.assertNotIn('erase_all', self.probe.calls)
+
+    def test_ids(self):
+        simulated_api.add_probe(99)
+
+        self.assertEqual(nrfjprog.Session.ids(), [99, 1234])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
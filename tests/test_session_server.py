@@ -0,0 +1,131 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the session server against a simulated probe.
+
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from nrfjprog.model import session_server
+
+import simulated_api
+
+
+class TestSessionServer(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+
+        self.directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.directory, 'session.sock')
+        self.server = session_server.SessionServer(self.socket_path, idle_timeout=60)
+        self.server.start()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        if self.thread.is_alive():
+            session_server.stop_server(self.socket_path)
+        self.thread.join()
+        shutil.rmtree(self.directory)
+        simulated_api.uninstall()
+
+    def send(self, argv):
+        return session_server.send_command(argv, self.socket_path)
+
+    def test_session_is_reused_between_commands(self):
+        self.assertTrue(session_server.server_running(self.socket_path))
+
+        self.assertEqual(self.send(['memwr', '-a', '0x1000', '--val', '0x12345678', '-q']), ('', None))
+        output, error = self.send(['memrd', '-a', '0x1000', '-q'])
+
+        self.assertIsNone(error)
+        self.assertIn('0x1000', output)
+        self.assertEqual(self.probe.calls['read_device_version'], 1)
+
+    def test_timings_of_a_reused_session_include_the_api_phases(self):
+        timings_path = os.path.join(self.directory, 'timings.jsonl')
+
+        self.send(['memrd', '-a', '0x0', '-q'])
+        self.send(['memrd', '-a', '0x0', '-q', '--timingsfile', timings_path])
+
+        with open(timings_path, 'r') as file:
+            phases = [phase['phase'] for phase in json.loads(file.read())['phases']]
+        self.assertEqual(phases, ['read'])
+
+    def test_errors_are_returned_and_session_evicted(self):
+        output, error = self.send(['run', '--pc', '0x0', '-q'])
+
+        self.assertIn('Both the PC and the SP must be specified.', error)
+        self.assertEqual(self.server.sessions, {})
+
+    def test_idle_sessions_are_evicted(self):
+        self.send(['halt', '-q'])
+        self.assertEqual(len(self.server.sessions), 1)
+
+        self.server.idle_timeout = 0
+        time.sleep(0.01)
+        self.server.evict_idle_sessions()
+        self.assertEqual(self.server.sessions, {})
+
+    def test_relative_paths_are_relative_to_the_client(self):
+        client_directory = os.path.join(self.directory, 'client')
+        os.mkdir(client_directory)
+        with open(os.path.join(client_directory, 'app.hex'), 'w') as file:
+            file.write(':0400000001020304F2\n:00000001FF\n')
+        server_cwd = os.getcwd()
+
+        output, error = session_server.send_command(['program', '-f', 'app.hex', '--sectorserase', '-q'], self.socket_path, client_directory)
+        self.assertIsNone(error)
+        output, error = session_server.send_command(['readtofile', '-f', 'dump.bin', '--format', 'bin', '--readcode', '-q'], self.socket_path, client_directory)
+        self.assertIsNone(error)
+
+        self.assertEqual(self.probe.flash[0 : 4], bytearray(b'\x01\x02\x03\x04'))
+        with open(os.path.join(client_directory, 'dump.bin'), 'rb') as file:
+            self.assertEqual(file.read(4), b'\x01\x02\x03\x04')
+        self.assertEqual(os.getcwd(), server_cwd)
+
+    def test_stop(self):
+        session_server.stop_server(self.socket_path)
+        self.thread.join()
+
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.assertFalse(session_server.server_running(self.socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,121 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test recognizing the SoftDevice in an image, and leaving out a SoftDevice the simulated device already has.
+
+"""
+
+import os
+import unittest
+
+from intelhex import IntelHex
+
+import nrfjprog
+from nrfjprog.model import softdevice
+from nrfjprog.model.flash_image import FlashImage
+
+import simulated_api
+
+
+RESOURCES = os.path.join(os.path.dirname(__file__), 'resources')
+S130_HEX = os.path.join(RESOURCES, 'ble_app_hrs_s130_with_dfu_pca10028.hex')
+S132_HEX = os.path.join(RESOURCES, 'ble_app_hrs_s132_with_dfu_pca10040.hex')
+
+
+class TestSoftDeviceInfo(unittest.TestCase):
+
+    def test_bundled_softdevices_are_recognized(self):
+        s130 = softdevice.image_info(FlashImage.from_intel_hex(IntelHex(S130_HEX)))
+        s132 = softdevice.image_info(FlashImage.from_intel_hex(IntelHex(S132_HEX)))
+
+        self.assertEqual((s130.fwid, s130.region()), (0x80, (0x0, 0x1B000)))
+        self.assertEqual((s132.fwid, s132.region()), (0x81, (0x0, 0x1C000)))
+
+    def test_image_without_softdevice(self):
+        self.assertIsNone(softdevice.image_info(FlashImage([(0x3000, b'\x00' * 0x100)])))
+        self.assertIsNone(softdevice.image_info(FlashImage([(0x1C000, b'\x00' * 0x100)])))
+
+    def test_excluding_shares_the_remaining_data(self):
+        data = bytearray(range(0x40))
+        image = FlashImage([(0x0, data[:0x20]), (0x30, data[0x30:])]).excluding(0x10, 0x38)
+
+        self.assertEqual(image.segments(), [(0x0, 0x10), (0x38, 0x40)])
+        self.assertEqual(bytes(image.tobinarray(start=0x38, size=8)), bytes(data[0x38:]))
+
+
+class TestSkipSoftDevice(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+
+        with nrfjprog.Session(snr=1234) as session:
+            session.program(S132_HEX, erase='all')
+        self.probe.reset_counters()
+
+    def tearDown(self):
+        simulated_api.uninstall()
+
+    def test_installed_softdevice_is_not_written_or_read(self):
+        with nrfjprog.Session(snr=1234) as session:
+            result = session.program(S132_HEX, erase='sectors', verify=True, skip_softdevice=True)
+
+        self.assertEqual(result.skipped_softdevice.region(), (0x0, 0x1C000))
+        self.assertTrue(result.report.passed)
+        self.assertEqual(min(result.plan.erase_pages()), 0x1C000)
+        self.assertLess(self.probe.bytes_written, 0x21BDC - 0x1C000 + 0x1000)
+        self.assertLess(self.probe.bytes_read, 2 * (0x21BDC - 0x1C000) + 0x1000)
+
+    def test_other_softdevice_is_programmed(self):
+        self.probe.flash[0x300C] = 0x80 # The FWID of the S130.
+
+        with nrfjprog.Session(snr=1234) as session:
+            result = session.program(S132_HEX, erase='sectors', verify=True, skip_softdevice=True)
+
+        self.assertIsNone(result.skipped_softdevice)
+        self.assertEqual(self.probe.flash[0x300C], 0x81)
+
+    def test_mass_erase_programs_the_softdevice(self):
+        with nrfjprog.Session(snr=1234) as session:
+            result = session.program(S132_HEX, erase='all', skip_softdevice=True)
+
+        self.assertIsNone(result.skipped_softdevice)
+        self.assertEqual(self.probe.flash[0x300C], 0x81)
+
+    def test_verify_reports_the_skipped_region(self):
+        with nrfjprog.Session(snr=1234) as session:
+            report = session.verify(S132_HEX, skip_softdevice=True)
+
+        self.assertTrue(report.passed)
+        self.assertEqual(report.skipped, [(0x0, 0x1C000)])
+        self.assertEqual(report.to_dict()['skipped'], [{'start': 0x0, 'end': 0x1C000}])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,108 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test that starting the CLI stays within its import budget: only the selected sub-command is built and the debugger libraries are only
+imported by the commands that need them.
+
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from nrfjprog.__main__ import Nrfjprog
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS = os.path.dirname(os.path.abspath(__file__))
+
+STARTUP_BUDGET_SECONDS = 0.5 # From the first import of nrfjprog until the command returns, without the interpreter's own startup.
+HEAVY_MODULES = ['intelhex', 'numpy', 'pyOCD', 'pyocd', 'pynrfjprog']
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start_time = time.time()
+sys.argv = ['nrfjprog'] + {argv!r}
+from nrfjprog.__main__ import Nrfjprog
+cli = Nrfjprog()
+{action}
+sys.stdout.write(json.dumps({{'seconds': time.time() - start_time, 'modules': sorted(sys.modules), 'commands': sorted(cli.subparsers.choices)}}))
+"""
+
+
+def start_cli(argv, action='cli.run()'):
+    """
+    Run the CLI in a fresh interpreter and return how long it took, the modules it imported, the sub-commands it built and what it printed.
+
+    """
+    lines = subprocess.check_output([sys.executable, '-c', STARTUP_SCRIPT.format(argv=argv, action=action)], cwd=ROOT).decode('utf-8').splitlines()
+    result = json.loads(lines[-1])
+    result['output'] = lines[:-1]
+    return result
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_version_imports_no_debugger_library(self):
+        result = start_cli(['version', '--daplink'])
+
+        self.assertEqual(result['commands'], ['version'])
+        self.assertEqual([module for module in HEAVY_MODULES if module in result['modules']], [])
+        self.assertLess(result['seconds'], STARTUP_BUDGET_SECONDS)
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'nrfjprog.Session is only imported lazily from Python 3.7.')
+    def test_session_is_imported_when_used(self):
+        result = start_cli(['version', '--daplink'], action='cli.run(); import nrfjprog; print(\'nrfjprog.session\' in sys.modules); nrfjprog.Session')
+
+        self.assertEqual(result['output'][-1], 'False')
+        self.assertIn('nrfjprog.session', result['modules'])
+
+    def test_ids_only_imports_pynrfjprog(self):
+        action = ('sys.path.insert(0, {!r}); import simulated_api; simulated_api.install(); simulated_api.add_probe(1234)\n'
+                  'try:\n    cli.run()\nfinally:\n    simulated_api.uninstall()').format(TESTS)
+        result = start_cli(['ids'], action=action)
+
+        self.assertEqual(result['output'][-1], '[1234]')
+        self.assertEqual(result['commands'], ['ids'])
+        self.assertEqual([module for module in HEAVY_MODULES if module in result['modules']], ['pynrfjprog'])
+        self.assertNotIn('nrfjprog.model.perform_command_daplink', result['modules'])
+        self.assertNotIn('nrfjprog.model.perform_command_openocd', result['modules'])
+        self.assertLess(result['seconds'], STARTUP_BUDGET_SECONDS)
+
+    def test_help_lists_every_command(self):
+        cli = Nrfjprog()
+        cli._add_commands()
+
+        self.assertEqual(sorted(cli.subparsers.choices), sorted(cli.help_messages))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,141 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the timings recorder and the --timings options against a simulated probe.
+
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from nrfjprog.__main__ import Nrfjprog
+from nrfjprog.model import session_server
+from nrfjprog.model import timings
+
+import simulated_api
+
+
+S132_HEX = os.path.join(os.path.dirname(__file__), 'resources', 'ble_app_hrs_s132_with_dfu_pca10040.hex')
+
+
+class Reader(object):
+
+    def read(self):
+        return b''
+
+
+class TestRecorder(unittest.TestCase):
+
+    def tearDown(self):
+        timings.disable()
+
+    def test_disabled_recording_is_a_no_op(self):
+        obj = Reader()
+
+        self.assertEqual(timings.instrument(obj, {'read': 'read'}).read, obj.read) # Not wrapped.
+        with timings.phase('erase') as phase:
+            phase.bytes += 10
+        self.assertIsNone(timings.recorder())
+
+    def test_phases_are_totalled(self):
+        recorder = timings.enable(print_summary=False)
+
+        for _ in range(3):
+            with timings.phase('write') as phase:
+                phase.bytes += 0x100
+        with timings.phase('erase'):
+            pass
+
+        self.assertEqual([(phase.name, phase.bytes, phase.calls) for phase in recorder.phases], [('write', 0x300, 3), ('erase', 0, 1)])
+
+
+class TestTimingsOptions(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+
+        self.directory = tempfile.mkdtemp()
+        self.timings_path = os.path.join(self.directory, 'timings.jsonl')
+        self.environ = dict(os.environ)
+        os.environ[session_server.SOCKET_PATH_ENV] = os.path.join(self.directory, 'no_server.sock')
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        shutil.rmtree(self.directory)
+        simulated_api.uninstall()
+
+    def run_cli(self, argv):
+        sys_argv, stdout = sys.argv, sys.stdout
+        sys.argv, sys.stdout = ['nrfjprog'] + argv, StringIO()
+        try:
+            Nrfjprog().run()
+            return sys.stdout.getvalue()
+        finally:
+            sys.argv, sys.stdout = sys_argv, stdout
+
+    def read_timings(self):
+        with open(self.timings_path, 'r') as file:
+            return [json.loads(line) for line in file]
+
+    def test_timings_file_gets_a_line_per_command(self):
+        self.probe.flash[:] = bytearray(len(self.probe.flash)) # Not blank, so the pages are erased.
+        self.run_cli(['program', '-f', S132_HEX, '--sectorserase', '--verify', '-q', '--timingsfile', self.timings_path])
+        self.run_cli(['memrd', '-a', '0x0', '-q', '--timingsfile', self.timings_path])
+
+        lines = self.read_timings()
+        self.assertEqual([line['command'] for line in lines], ['program', 'memrd'])
+
+        phases = dict((phase['phase'], phase) for phase in lines[0]['phases'])
+        self.assertEqual(set(phases), set(['connect', 'detect', 'load image', 'erase', 'write', 'read', 'compare', 'disconnect']))
+        self.assertEqual(phases['erase']['calls'], self.probe.page_erases)
+        self.assertEqual(phases['write']['bytes'], self.probe.bytes_written)
+        self.assertIsNone(timings.recorder())
+
+    def test_summary_is_printed_when_enabled_by_environment(self):
+        os.environ[timings.TIMINGS_ENV] = '1'
+
+        output = self.run_cli(['memrd', '-a', '0x0', '-q'])
+
+        self.assertIn('PHASE', output)
+        self.assertIn('connect', output)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,78 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test that the DAPLink and OpenOCD backends refuse the options they do not implement, before touching the device.
+
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from nrfjprog.__main__ import Nrfjprog
+from nrfjprog.model.perform_command_daplink import DapLink
+from nrfjprog.model.perform_command_openocd import OpenOCD
+
+
+class TestUnsupportedOptions(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.hex_file = os.path.join(self.directory, 'app.hex')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_refused(self, perform_command, argv, message):
+        args = Nrfjprog().parse_args(argv)
+        with self.assertRaises(AssertionError) as context:
+            getattr(perform_command, args.command)(args) # Would fail differently if it connected, no debugger is attached.
+        self.assertIn(message, str(context.exception))
+
+    def test_daplink(self):
+        for option in ('--dryrun', '--differential', '--incremental', '--skipsoftdevice', '--flashloader'):
+            self.assert_refused(DapLink(), ['program', '-f', self.hex_file, '--daplink', option], '--{} is not supported'.format(option[2:]))
+        self.assert_refused(DapLink(), ['program', '-f', self.hex_file, '--daplink', '--keep', '0x0-0x10'], '--keep is not supported')
+        self.assert_refused(DapLink(), ['program', '-f', self.hex_file, '--daplink', '--verify', '--crcverify'], '--crcverify is not supported')
+        self.assert_refused(DapLink(), ['program', '-f', self.hex_file, '--daplink', '--verifyreport', 'report.json'], '--verifyreport is not supported')
+
+    def test_daplink_verify(self):
+        for option in ('--crcverify', '--skipsoftdevice'):
+            self.assert_refused(DapLink(), ['verify', '-f', self.hex_file, '--daplink', option], '--{} is not supported'.format(option[2:]))
+
+    def test_openocd(self):
+        for option in ('--dryrun', '--differential', '--incremental', '--crcverify'):
+            self.assert_refused(OpenOCD(), ['program', '-f', self.hex_file, '--openocd', option], '--{} is not supported'.format(option[2:]))
+        self.assert_refused(OpenOCD(), ['program', '-f', self.hex_file, '--openocd', '--keep', '0x0-0x10'], '--keep is not supported')
+        self.assert_refused(OpenOCD(), ['program', '-f', self.hex_file, '--openocd', '--verifyreport', 'report.json'], '--verifyreport is not supported')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
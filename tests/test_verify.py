@@ -0,0 +1,115 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the verify engine and the verify command against a simulated probe.
+
+"""
+
+import array
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from nrfjprog.model import verify
+
+import simulated_api
+from simulated_api import run_command
+
+
+S132_HEX = os.path.join(os.path.dirname(__file__), 'resources', 'ble_app_hrs_s132_with_dfu_pca10040.hex')
+
+
+class TestFindMismatches(unittest.TestCase):
+
+    def setUp(self):
+        self.data = bytearray(range(256)) * 64
+        self.read_data = bytearray(self.data)
+        self.read_data[10] ^= 0xFF
+        self.read_data[300:304] = b'\x00\x00\x00\x00'
+        self.read_data[-1] ^= 0x01
+
+    def test_equal(self):
+        self.assertEqual(verify.find_mismatches(array.array('B', self.data), list(self.data)), [])
+
+    def test_mismatch_ranges(self):
+        expected = [(10, 11), (300, 304), (len(self.data) - 1, len(self.data))]
+
+        self.assertEqual(verify.find_mismatches(self.data, list(self.read_data)), expected)
+        self.assertEqual(verify._find_mismatches_blocks(bytes(self.data), bytes(self.read_data)), expected)
+
+    def test_length_difference(self):
+        self.assertEqual(verify.find_mismatches(b'\x01\x02\x03', b'\x01'), [(1, 3)])
+
+    def test_report_pages(self):
+        report = verify.VerifyReport(page_size=0x1000)
+        report.add(0x1000, self.data, self.read_data)
+
+        self.assertFalse(report.passed)
+        self.assertEqual(report.mismatched_bytes(), 6)
+        self.assertEqual(report.pages(), [(0x1000, False), (0x2000, True), (0x3000, True), (0x4000, False)])
+
+
+class TestVerifyCommand(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+        self.directory = tempfile.mkdtemp()
+        self.report_path = os.path.join(self.directory, 'report.json')
+
+        run_command(['program', '-f', S132_HEX, '--sectorserase', '-q'])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        simulated_api.uninstall()
+
+    def test_verify_passes(self):
+        run_command(['verify', '-f', S132_HEX, '--verifyreport', self.report_path, '-q'])
+
+        with open(self.report_path) as file:
+            report = json.load(file)
+        self.assertTrue(report['passed'])
+        self.assertTrue(all(page['passed'] for page in report['pages']))
+
+    def test_verify_reports_mismatching_range(self):
+        self.probe.flash[0x1d000 : 0x1d008] = b'\x00' * 8
+
+        with self.assertRaises(AssertionError):
+            run_command(['verify', '-f', S132_HEX, '--verifyreport', self.report_path, '-q'])
+
+        with open(self.report_path) as file:
+            report = json.load(file)
+        self.assertEqual(report['mismatches'], [{'start': 0x1d000, 'end': 0x1d008}])
+        self.assertEqual([page['addr'] for page in report['pages'] if not page['passed']], [0x1d000])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -0,0 +1,190 @@
+# Copyright (c) 2016, Nordic Semiconductor
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of Nordic Semiconductor ASA nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Test the write planner, and programming with it against a simulated probe.
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from intelhex import IntelHex
+
+from nrfjprog.model import device
+from nrfjprog.model import write_plan
+from nrfjprog.model.flash_image import FlashImage
+
+import simulated_api
+from simulated_api import run_command
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
+class TestWritePlan(unittest.TestCase):
+
+    def setUp(self):
+        self.device = device.NRF5xDevice('NRF52_FP1')
+
+    def test_page_shared_by_segments_is_erased_once(self):
+        image = FlashImage([(0x2000, b'\x01' * 0x10), (0x2100, b'\x02' * 0x10), (0x2ff0, b'\x03' * 0x20)])
+        plan = write_plan.WritePlan.for_image(image, self.device, erase_sectors=True)
+
+        self.assertEqual(plan.erase_pages(), [0x2000, 0x3000])
+
+    def test_segment_ending_on_page_boundary_does_not_erase_next_page(self):
+        image = FlashImage([(0x1000, b'\x01' * 0x1000)])
+        plan = write_plan.WritePlan.for_image(image, self.device, erase_sectors=True)
+
+        self.assertEqual(plan.erase_pages(), [0x1000])
+
+    def test_adjacent_and_overlapping_writes_are_joined(self):
+        plan = write_plan.WritePlan(self.device)
+        plan.add_write(0x100, b'\x02' * 0x10)
+        plan.add_write(0x0, b'\x01' * 0x100)
+        plan.add_write(0x108, b'\x03' * 0x10)
+        plan.add_write(0x400, b'\x04' * 0x10)
+
+        writes = plan.writes()
+        self.assertEqual([(addr, len(data)) for addr, data in writes], [(0x0, 0x118), (0x400, 0x10)])
+        self.assertEqual(bytes(writes[0][1][0x100 : 0x118]), b'\x02' * 8 + b'\x03' * 0x10)
+
+    def test_uicr_pages_become_uicr_erase(self):
+        image = FlashImage([(0x10001014, b'\x00' * 4)])
+        plan = write_plan.WritePlan.for_image(image, self.device, erase_sectors=True)
+
+        self.assertTrue(plan.erase_uicr)
+        self.assertEqual(plan.erase_pages(), [])
+
+    def test_estimate(self):
+        plan = write_plan.WritePlan(self.device)
+        plan.add_erase(0x0, 0x2000)
+        plan.add_write(0x0, b'\x00' * 0x2000)
+
+        erase_seconds, write_seconds = plan.estimate_seconds()
+        self.assertAlmostEqual(erase_seconds, 2 * write_plan.CostModel.ERASE_PAGE_SECONDS['NRF52'])
+        self.assertAlmostEqual(write_seconds, 0x800 * write_plan.CostModel.WRITE_WORD_SECONDS['NRF52'] + 0x2000 * write_plan.CostModel.TRANSFER_BYTE_SECONDS)
+
+    def test_cheaper_plan_erases_pages_for_small_images_and_everything_for_large_ones(self):
+        small_image = FlashImage([(0x1000, b'\x01' * 0x10)])
+        large_image = FlashImage([(0x1000, b'\x01' * 0x4000)])
+
+        self.assertFalse(write_plan.WritePlan.cheaper_for_image(small_image, self.device).erase_all)
+        self.assertTrue(write_plan.WritePlan.cheaper_for_image(large_image, self.device).erase_all)
+
+    def test_kept_region_is_read_back_if_erased(self):
+        image = FlashImage([(0x1000, b'\x01' * 0x4000)])
+        keep = [(0x7F000, 0x80000), (0x10001080, 0x10001090)]
+
+        sectors_plan = write_plan.WritePlan.for_image(image, self.device, erase_sectors=True, keep=keep)
+        all_plan = write_plan.WritePlan.for_image(image, self.device, erase_all=True, keep=keep)
+
+        self.assertEqual(sectors_plan.kept_ranges(), [])
+        self.assertEqual(all_plan.kept_ranges(), keep)
+        self.assertFalse(write_plan.WritePlan.cheaper_for_image(image, self.device, keep=[(0x40000, 0x80000)]).erase_all)
+
+    def test_kept_region_can_not_overlap_image(self):
+        image = FlashImage([(0x1000, b'\x01' * 0x10)])
+
+        self.assertRaises(AssertionError, write_plan.WritePlan.for_image, image, self.device, erase_sectors=True, keep=[(0x1008, 0x1100)])
+
+
+class TestProgramWithPlan(unittest.TestCase):
+
+    def setUp(self):
+        simulated_api.install()
+        self.probe = simulated_api.add_probe(1234)
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.hex_path = os.path.join(self.tmp_dir, 'image.hex')
+
+        hex_file = IntelHex()
+        hex_file.puts(0x2000, b'\x11' * 0x20)
+        hex_file.puts(0x2800, b'\x22' * 0x20)
+        hex_file.tofile(self.hex_path, format='hex')
+
+    def tearDown(self):
+        simulated_api.uninstall()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_segments_sharing_a_page_are_both_written(self):
+        self.probe.flash[0x2400] = 0x00
+
+        run_command(['program', '-f', self.hex_path, '--sectorserase', '--verify', '-q'])
+
+        self.assertEqual(self.probe.page_erases, 1)
+        self.assertEqual(self.probe.flash[0x2000 : 0x2020], bytearray(b'\x11' * 0x20))
+        self.assertEqual(self.probe.flash[0x2800 : 0x2820], bytearray(b'\x22' * 0x20))
+        self.assertEqual(self.probe.flash[0x2400], 0xFF)
+
+    def test_erase_auto_preserves_kept_region(self):
+        self.probe.flash[0x2400 : 0x2410] = b'\x33' * 0x10
+        self.probe.flash[0x2500] = 0x00
+
+        run_command(['program', '-f', self.hex_path, '--erase', 'auto', '--keep', '0x2400-0x2410', '--verify', '-q'])
+
+        self.assertEqual(self.probe.page_erases, 1)
+        self.assertEqual(self.probe.flash[0x2400 : 0x2410], bytearray(b'\x33' * 0x10))
+        self.assertEqual(self.probe.flash[0x2500], 0xFF)
+        self.assertEqual(self.probe.flash[0x2000 : 0x2020], bytearray(b'\x11' * 0x20))
+
+    def test_measured_erase_timings_replace_the_defaults(self):
+        nrf52 = device.NRF5xDevice('NRF52_FP1')
+        self.probe.flash[0x2000] = 0x00
+
+        run_command(['program', '-f', self.hex_path, '--sectorserase', '--snr', '1234', '-q']) # Timings are only remembered per debugger.
+        write_plan.record_erase_timings(1234, nrf52, erase_all_seconds=10.0)
+
+        cost_model = write_plan.CostModel(nrf52, 1234)
+        self.assertNotEqual(cost_model.erase_page_seconds, write_plan.CostModel.ERASE_PAGE_SECONDS['NRF52'])
+        self.assertEqual(cost_model.erase_all_seconds, 10.0)
+        self.assertEqual(write_plan.CostModel(device.NRF5xDevice('NRF51_XLR3'), 1234).erase_all_seconds, write_plan.CostModel.ERASE_ALL_SECONDS['NRF51'])
+
+    def test_dryrun_does_not_change_the_device(self):
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            run_command(['program', '-f', self.hex_path, '--sectorserase', '--dryrun'])
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+
+        self.assertEqual(self.probe.page_erases, 0)
+        self.assertEqual(self.probe.bytes_written, 0)
+        self.assertIn('Erase 1 pages from 0x2000 to 0x3000.', output)
+        self.assertIn('Estimated time', output)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)